@@ -3,7 +3,7 @@ Supply Agent Configuration
 Loads settings from environment variables using Pydantic
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional
 from pathlib import Path
 
 
@@ -25,6 +25,7 @@ class Settings(BaseSettings):
     kafka_bootstrap_servers: str = "localhost:9092"
     kafka_topic_supply_insights: str = "supply-insights"
     kafka_topic_agent_metrics: str = "agent-metrics"
+    kafka_topic_supply_heartbeats: str = "supply-heartbeats"  # "unchanged" heartbeats, kept off the insights topic
     kafka_client_id: str = "supply-agent"
     kafka_compression_type: str = "gzip"
     
@@ -38,12 +39,86 @@ class Settings(BaseSettings):
     redfin_api_key: str = ""
     mls_api_key: str = ""
     mls_api_url: str = ""
+    mls_store_path: str = "data/mls_listings.db"
+    collector_timeout_seconds: float = 20.0
+    collector_page_concurrency: int = 4
+    collector_max_pages: int = 100  # Searches that can't page through in time return partial results
+    collector_stream_chunk_bytes: int = 65536
+    collector_spool_memory_bytes: int = 1048576  # Larger bodies spill to disk and aren't cached
+    
+    # Synthetic Data (mock listings for sources without an API key)
+    mock_data_seed: Optional[int] = None
+    mock_data_reference_date: str = ""  # ISO date mock listing dates count back from (seeded default: 2026-01-01)
+    mock_listings_scale: float = 1.0
+    
+    # Geographic Tiling (split market searches by ZIP or bounding box)
+    enable_geo_tiling: bool = False  # Only used by collectors that implement tile filters (Zillow)
+    market_regions_file: str = "config/market_regions.json"
+    tile_grid_size: int = 2
+    tile_max_listings: int = 2000
+    tile_max_depth: int = 3
+    
+    # HTTP Client (connection pool shared by all collectors)
+    http_pool_limit: int = 100
+    http_pool_limit_per_host: int = 20
+    http_dns_cache_ttl_seconds: int = 300
+    http_keepalive_seconds: float = 30.0
+    http_request_timeout_seconds: float = 30.0
+    
+    # Deadlines (per-market time budget across all steps)
+    market_time_budget_seconds: float = 120.0
+    deadline_publish_grace_seconds: float = 5.0
+    partial_data_confidence_factor: float = 0.75
     
     # Agent Configuration
     agent_run_interval_minutes: int = 60
     markets: str = "Austin TX,Miami FL,Tampa FL"
     enable_web_scraping: bool = True
     enable_ai_insights: bool = True
+    enable_concurrent_markets: bool = True
+    max_concurrent_markets: int = 10
+    
+    # Pipeline Mode (staged collect -> analyze -> score -> insights -> publish)
+    enable_pipeline_mode: bool = False
+    pipeline_queue_size: int = 8
+    pipeline_collect_workers: int = 8
+    pipeline_analyze_workers: int = 2
+    pipeline_score_workers: int = 2
+    pipeline_insights_workers: int = 4
+    pipeline_publish_workers: int = 4
+    
+    # Adaptive Scheduling (per-market refresh intervals)
+    enable_adaptive_scheduling: bool = False
+    schedule_min_interval_minutes: int = 15
+    schedule_max_interval_minutes: int = 360
+    schedule_volatility_window: int = 6
+    schedule_volatility_scale: float = 0.10
+    
+    # Distributed Mode (replicas share markets via a Postgres lease table)
+    enable_distributed_mode: bool = False
+    worker_id: str = ""
+    work_queue_lease_seconds: int = 300
+    work_queue_heartbeat_seconds: int = 60
+    work_queue_poll_seconds: int = 15
+    
+    # Analysis Offload (process pool for large markets)
+    enable_analysis_offload: bool = True
+    analysis_offload_min_listings: int = 20000
+    analysis_process_workers: int = 2
+    
+    # Stale-While-Revalidate (serve last good data when a source fails)
+    enable_stale_fallback: bool = True
+    stale_max_age_seconds: int = 86400
+    stale_confidence_penalty: float = 0.5
+    
+    # Response Archive (raw collector responses, replayable offline)
+    enable_response_archive: bool = False
+    archive_dir: str = "data/archive"
+    collector_replay: bool = False
+    archive_replay_until: str = ""
+    
+    # Batch Mode (python -m src.batch)
+    batch_write_size: int = 200
     
     # Scoring Weights
     score_weight_inventory: float = 0.35
@@ -60,14 +135,37 @@ class Settings(BaseSettings):
     # Feature Flags
     enable_kafka: bool = True
     enable_database: bool = True
+    enable_fingerprint_skip: bool = True
     enable_caching: bool = True
     cache_ttl_seconds: int = 3600
+    cache_max_bytes: int = 268435456
+    cache_dir: str = ""
+    cache_disk_max_entries: int = 20000
     
     # Rate Limiting
     api_rate_limit_per_minute: int = 60
+    api_rate_limit_burst: int = 10
     scraping_delay_seconds: int = 2
     max_retries: int = 3
     retry_backoff_factor: float = 2.0
+    retry_base_delay_seconds: float = 0.5
+    retry_max_delay_seconds: float = 10.0
+    circuit_breaker_failure_threshold: int = 5
+    circuit_breaker_reset_seconds: int = 60
+    
+    # Web Scraping (headless-browser fallback when API sources fail)
+    scraping_concurrency: int = 3
+    scraping_max_pages: int = 5
+    scraping_page_timeout_seconds: float = 30.0
+    scraping_timeout_seconds: float = 90.0
+    scraping_headless: bool = True
+    
+    # Hedged Requests (re-send requests slower than recent latency percentile)
+    enable_hedged_requests: bool = False
+    hedge_percentile: float = 95.0
+    hedge_budget_fraction: float = 0.05
+    hedge_min_samples: int = 20
+    hedge_latency_window: int = 200
     
     # Health Check
     health_check_port: int = 8080
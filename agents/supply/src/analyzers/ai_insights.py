@@ -3,6 +3,7 @@ AI Insights Generator using Claude
 Generates market commentary and recommendations
 """
 import anthropic
+import asyncio
 from typing import Optional
 from loguru import logger
 
@@ -31,7 +32,8 @@ class AIInsightsGenerator:
         market: str,
         metrics: InventoryMetrics,
         trends: InventoryTrends,
-        score: SupplyScore
+        score: SupplyScore,
+        timeout: Optional[float] = None
     ) -> AIInsights:
         """
         Generate comprehensive market insights using Claude
@@ -41,6 +43,8 @@ class AIInsightsGenerator:
             metrics: Current inventory metrics
             trends: Inventory trends
             score: Supply score
+            timeout: Optional time limit in seconds; basic insights are
+                returned if Claude doesn't answer in time
             
         Returns:
             AIInsights with summary, findings, and recommendations
@@ -49,20 +53,20 @@ class AIInsightsGenerator:
             logger.info("AI insights disabled, returning basic insights")
             return self._generate_basic_insights(market, score)
         
+        if timeout is not None and timeout <= 0:
+            logger.warning(f"No time left for AI insights on {market}, returning basic insights")
+            return self._generate_basic_insights(market, score)
+        
         try:
             logger.info(f"Generating AI insights for {market} (score: {score.overall_score})")
             
             # Build prompt
             prompt = self._build_prompt(market, metrics, trends, score)
             
-            # Call Claude
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
+            # Call Claude off the event loop so other markets keep running
+            response = await asyncio.wait_for(
+                asyncio.to_thread(self._create_message, prompt, timeout),
+                timeout
             )
             
             # Track usage
@@ -79,10 +83,28 @@ class AIInsightsGenerator:
             
             return insights
             
+        except asyncio.TimeoutError:
+            logger.warning(f"AI insights for {market} timed out after {timeout:.1f}s")
+            return self._generate_basic_insights(market, score)
         except Exception as e:
             logger.error(f"AI insights generation failed: {e}")
             return self._generate_basic_insights(market, score)
     
+    def _create_message(self, prompt: str, timeout: Optional[float] = None):
+        """Blocking Claude call, with the request timeout capped if given"""
+        request = {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "messages": [{
+                "role": "user",
+                "content": prompt
+            }]
+        }
+        if timeout is not None:
+            request["timeout"] = timeout
+        
+        return self.client.messages.create(**request)
+    
     def _build_prompt(
         self,
         market: str,
@@ -4,10 +4,41 @@ Analyzes inventory trends, absorption rates, and market dynamics
 """
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
 from loguru import logger
+import asyncio
 import statistics
 
+import numpy as np
+
+from ..listings import ListingTable, Rows
 from ..models import MarketData, InventoryMetrics, InventoryTrends
+from config.settings import settings
+
+
+# Only these listing fields are used for deduplication and metrics, so only
+# they are shipped to worker processes
+ANALYSIS_FIELDS = ('address', 'city', 'zip', 'days_on_market')
+
+
+def _project_listings(listings: ListingTable) -> ListingTable:
+    """Strip listings down to the fields the metrics need"""
+    return listings.select(ANALYSIS_FIELDS)
+
+
+def _calculate_metrics_in_worker(active: ListingTable, pending: ListingTable, sold: ListingTable) -> Dict:
+    """
+    Deduplicate listings and calculate metrics in a worker process
+    
+    Runs the same code as the in-process path so results are identical.
+    """
+    analyzer = TrendAnalyzer()
+    aggregated = {
+        'active': analyzer._deduplicate_listings(active),
+        'pending': analyzer._deduplicate_listings(pending),
+        'sold': analyzer._deduplicate_listings(sold)
+    }
+    return analyzer._calculate_metrics(aggregated).model_dump()
 
 
 class TrendAnalyzer:
@@ -15,12 +46,15 @@ class TrendAnalyzer:
     
     def __init__(self):
         self.name = "TrendAnalyzer"
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.offloaded_count = 0
     
     async def analyze(
         self,
         market: str,
         current_data: List[MarketData],
-        historical_data: Optional[List[Dict]] = None
+        historical_data: Optional[List[Dict]] = None,
+        as_of: Optional[datetime] = None
     ) -> tuple[InventoryMetrics, InventoryTrends]:
         """
         Analyze inventory metrics and trends
@@ -29,20 +63,31 @@ class TrendAnalyzer:
             market: Market identifier
             current_data: List of MarketData from all collectors
             historical_data: Optional historical metrics from database
+            as_of: Date the analysis is for (defaults to now); trends compare
+                against history 30 and 90 days before it
             
         Returns:
             Tuple of (InventoryMetrics, InventoryTrends)
         """
         logger.info(f"Analyzing trends for {market}")
         
-        # Aggregate data from all sources
-        aggregated = self._aggregate_sources(current_data)
+        listing_count = sum(
+            len(data.active_listings) + len(data.pending_listings) + len(data.sold_listings)
+            for data in current_data
+        )
         
-        # Calculate current metrics
-        metrics = self._calculate_metrics(aggregated)
+        if settings.enable_analysis_offload and listing_count >= settings.analysis_offload_min_listings:
+            # Large markets: keep the event loop free for other markets' I/O
+            metrics = await self._calculate_metrics_offloaded(current_data)
+        else:
+            # Aggregate data from all sources
+            aggregated = self._aggregate_sources(current_data)
+            
+            # Calculate current metrics
+            metrics = self._calculate_metrics(aggregated)
         
         # Calculate trends (requires historical data)
-        trends = self._calculate_trends(metrics, historical_data)
+        trends = self._calculate_trends(metrics, historical_data, as_of)
         
         logger.success(
             f"Analysis complete: {metrics.total_inventory} active, "
@@ -52,20 +97,53 @@ class TrendAnalyzer:
         
         return metrics, trends
     
+    async def _calculate_metrics_offloaded(self, data_list: List[MarketData]) -> InventoryMetrics:
+        """
+        Aggregate, deduplicate and calculate metrics in a process pool
+        
+        Listings are projected to the few fields the metrics use before being
+        sent, so only a handful of NumPy columns are pickled.
+        """
+        active = ListingTable.concat(_project_listings(data.active_listings) for data in data_list)
+        pending = ListingTable.concat(_project_listings(data.pending_listings) for data in data_list)
+        sold = ListingTable.concat(_project_listings(data.sold_listings) for data in data_list)
+        
+        logger.info(
+            f"Offloading analysis of {len(active) + len(pending) + len(sold):,} listings "
+            f"to process pool"
+        )
+        
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            self._get_executor(),
+            _calculate_metrics_in_worker,
+            active, pending, sold
+        )
+        self.offloaded_count += 1
+        
+        return InventoryMetrics(**result)
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Get or create the analysis process pool"""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=settings.analysis_process_workers)
+        return self.executor
+    
+    def close(self):
+        """Shut down the analysis process pool"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+    
     def _aggregate_sources(self, data_list: List[MarketData]) -> Dict:
         """
         Aggregate data from multiple sources
         
         Combines data from Zillow, Redfin, etc. and deduplicates
         """
-        all_active = []
-        all_pending = []
-        all_sold = []
-        
-        for data in data_list:
-            all_active.extend(data.active_listings)
-            all_pending.extend(data.pending_listings)
-            all_sold.extend(data.sold_listings)
+        all_active = ListingTable.concat(data.active_listings for data in data_list)
+        all_pending = ListingTable.concat(data.pending_listings for data in data_list)
+        all_sold = ListingTable.concat(data.sold_listings for data in data_list)
         
         # Deduplicate by address (simple approach)
         active = self._deduplicate_listings(all_active)
@@ -78,35 +156,20 @@ class TrendAnalyzer:
             'sold': sold
         }
     
-    def _deduplicate_listings(self, listings: List[Dict]) -> List[Dict]:
+    def _deduplicate_listings(self, listings: Rows) -> ListingTable:
         """
         Remove duplicate listings across sources
         
-        Uses address as deduplication key
+        Uses address, city and ZIP code as deduplication key
         """
-        seen_addresses = set()
-        unique = []
-        
-        for listing in listings:
-            address = listing.get('address', '').lower().strip()
-            if not address:
-                continue
-                
-            # Create a composite key
-            key = f"{address}_{listing.get('city', '')}_{listing.get('zip', '')}"
-            
-            if key not in seen_addresses:
-                seen_addresses.add(key)
-                unique.append(listing)
-        
-        return unique
+        return ListingTable.coerce(listings).deduplicate()
     
     def _calculate_metrics(self, aggregated: Dict) -> InventoryMetrics:
         """Calculate core inventory metrics"""
         
-        active = aggregated['active']
-        pending = aggregated['pending']
-        sold = aggregated['sold']
+        active = ListingTable.coerce(aggregated['active'])
+        pending = ListingTable.coerce(aggregated['pending'])
+        sold = ListingTable.coerce(aggregated['sold'])
         
         # Total counts
         total_inventory = len(active)
@@ -132,12 +195,8 @@ class TrendAnalyzer:
         )
         
         # Median days on market
-        dom_values = [
-            listing.get('days_on_market', 0) 
-            for listing in active 
-            if listing.get('days_on_market') is not None
-        ]
-        median_dom = int(statistics.median(dom_values)) if dom_values else 30
+        median_dom = active.median('days_on_market')
+        median_dom = int(median_dom) if median_dom is not None else 30
         
         # New listings (estimate from active + sold)
         # In real scenario, would track actual new listings
@@ -160,7 +219,8 @@ class TrendAnalyzer:
     def _calculate_trends(
         self,
         current: InventoryMetrics,
-        historical: Optional[List[Dict]]
+        historical: Optional[List[Dict]],
+        as_of: Optional[datetime] = None
     ) -> InventoryTrends:
         """
         Calculate trend metrics comparing to historical data
@@ -169,6 +229,7 @@ class TrendAnalyzer:
             current: Current inventory metrics
             historical: List of historical metrics from database
                        Format: [{'timestamp': ..., 'total_inventory': ..., ...}, ...]
+            as_of: Date the current metrics are for (defaults to now)
         """
         if not historical or len(historical) == 0:
             # No historical data - return neutral trends
@@ -184,7 +245,7 @@ class TrendAnalyzer:
         historical = sorted(historical, key=lambda x: x['timestamp'], reverse=True)
         
         # Find data from 30 and 90 days ago
-        now = datetime.utcnow()
+        now = as_of or datetime.utcnow()
         thirty_days_ago = now - timedelta(days=30)
         ninety_days_ago = now - timedelta(days=90)
         
@@ -272,7 +333,7 @@ class TrendAnalyzer:
         else:
             return "stable"
     
-    def _estimate_price_reductions(self, active_listings: List[Dict]) -> int:
+    def _estimate_price_reductions(self, active_listings: ListingTable) -> int:
         """
         Estimate price reductions
         
@@ -280,10 +341,7 @@ class TrendAnalyzer:
         For MVP, estimate based on high DOM
         """
         # Assume properties with >45 days on market likely had price reduction
-        high_dom_count = sum(
-            1 for listing in active_listings 
-            if listing.get('days_on_market', 0) > 45
-        )
+        high_dom_count = int(np.count_nonzero(active_listings.column('days_on_market') > 45))
         
         # Estimate ~40% of high DOM properties had price reductions
         return int(high_dom_count * 0.4)
@@ -0,0 +1,267 @@
+"""
+Supply Agent - Batch Entry Point
+Backfills many markets (optionally at several as-of dates) in one run, then exits
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+from loguru import logger
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import settings
+from src.main import SupplyAgent
+from src.models import MarketJob, SupplyAnalysis
+
+
+class BatchSupplyAgent(SupplyAgent):
+    """
+    Supply Agent variant for one-off backfills
+    
+    Markets go through the staged pipeline once per as-of date. Every job is
+    analyzed and written even if its listings haven't changed, and database
+    rows are buffered and inserted in bulk instead of one per market.
+    
+    Backfills need replay mode: each as-of job is collected from the
+    responses archived at or before its date, never from live sources, so
+    past dates can't be filled with today's listings. The as-of date also
+    ends the history window and anchors the trend comparison. Dates run
+    oldest first, and each date's rows are flushed before the next date
+    starts, so later dates see the earlier ones as history.
+    
+    Analyses only go to Kafka when ``publish`` is set, so a backfill doesn't
+    put historical analyses on the live insights topic.
+    """
+    
+    def __init__(self, write_batch_size: Optional[int] = None, publish: bool = False):
+        super().__init__()
+        self.name = "BatchSupplyAgent"
+        self.write_batch_size = max(1, write_batch_size or settings.batch_write_size)
+        self.publish = publish
+        self.pending_writes: List[SupplyAnalysis] = []
+        self.rows_written = 0
+        self.write_failures = 0
+        self._flush_lock = asyncio.Lock()
+    
+    async def run_batch(
+        self,
+        markets: List[str],
+        as_of_dates: Optional[List[datetime]] = None
+    ) -> dict:
+        """
+        Analyze every market at every as-of date and shut down
+        
+        Args:
+            markets: Markets to analyze
+            as_of_dates: Backfill dates; None analyzes the markets once as of now
+            
+        Returns:
+            Throughput summary (see get_batch_summary)
+            
+        Raises:
+            ValueError: If as-of dates are given without replay mode
+        """
+        dates = sorted(as_of_dates) if as_of_dates else [None]
+        if as_of_dates:
+            self._prepare_backfill()
+        
+        logger.info("=" * 80)
+        logger.info(f"BATCH RUN - {len(markets)} markets x {len(dates)} dates")
+        logger.info("=" * 80)
+        
+        await self._connect_services()
+        
+        started = time.time()
+        try:
+            for as_of in dates:
+                if as_of is not None:
+                    logger.info(f"Backfilling as of {as_of.date().isoformat()}")
+                await self._run_pipeline(markets, as_of=as_of)
+                await self.flush_writes()
+        finally:
+            await self.flush_writes()
+            self.runs_completed += 1
+            summary = self.get_batch_summary(len(markets) * len(dates), time.time() - started)
+            await self._shutdown()
+        
+        logger.info("=" * 80)
+        logger.success(
+            f"BATCH COMPLETE - {summary['succeeded']}/{summary['jobs']} jobs in "
+            f"{summary['elapsed_seconds']}s ({summary['jobs_per_second']} jobs/s, "
+            f"{summary['rows_written']} rows written)"
+        )
+        if summary['write_failed']:
+            logger.error(f"{summary['write_failed']} analyses could not be written to the database")
+        logger.info("=" * 80)
+        
+        return summary
+    
+    def _prepare_backfill(self):
+        """
+        Restrict collection to archived responses for as-of runs
+        
+        The MLS collector reads its local store, which only holds current
+        listings, and the stale fallback would answer a date with data from
+        another date, so both are turned off.
+        
+        Raises:
+            ValueError: If replay mode is off
+        """
+        if not settings.collector_replay:
+            raise ValueError(
+                "As-of backfills need replay mode (--replay): live sources only "
+                "return today's listings"
+            )
+        
+        if self.mls is not None:
+            logger.warning("MLS store only holds current listings, skipping MLS for the backfill")
+            self.collectors = [c for c in self.collectors if c is not self.mls]
+        
+        for collector in [*self.collectors, self.scraper]:
+            if collector is not None:
+                collector.last_good = None
+    
+    async def _check_fingerprint(self, job: MarketJob):
+        """Backfills analyze every job, so unchanged listings aren't skipped"""
+    
+    async def _publish_kafka(self, job: MarketJob) -> bool:
+        """Publish the analysis to Kafka only if the backfill was asked to"""
+        if not self.publish:
+            return True
+        return await super()._publish_kafka(job)
+    
+    async def _write_database(self, job: MarketJob) -> bool:
+        """Buffer the analysis and write it with the next bulk insert"""
+        self.pending_writes.append(job.analysis)
+        if len(self.pending_writes) >= self.write_batch_size:
+            await self.flush_writes()
+        return True
+    
+    async def flush_writes(self):
+        """
+        Write all buffered analyses in one bulk insert
+        
+        A failed insert loses the whole batch; its rows are counted in
+        write_failures (unless the database is disabled) so the run can
+        report them.
+        """
+        async with self._flush_lock:
+            batch, self.pending_writes = self.pending_writes, []
+            if batch:
+                written = await self.database.write_analyses(batch)
+                self.rows_written += written
+                if self.database.enabled:
+                    self.write_failures += len(batch) - written
+    
+    def get_batch_summary(self, jobs: int, elapsed_seconds: float) -> dict:
+        """Get throughput statistics for a batch run"""
+        return {
+            "jobs": jobs,
+            "succeeded": self.successful_analyses,
+            "failed": self.failed_analyses,
+            "rows_written": self.rows_written,
+            "write_failed": self.write_failures,
+            "elapsed_seconds": round(elapsed_seconds, 1),
+            "jobs_per_second": round(jobs / elapsed_seconds, 2) if elapsed_seconds > 0 else 0.0
+        }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse batch command line arguments"""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.batch",
+        description="Backfill supply analyses for a list of markets and exit"
+    )
+    parser.add_argument(
+        "markets", nargs="*",
+        help='Markets to analyze, e.g. "Austin, TX" (defaults to MARKETS)'
+    )
+    parser.add_argument(
+        "--markets-file", type=Path,
+        help="File with one market per line (blank lines and # comments ignored)"
+    )
+    parser.add_argument(
+        "--as-of", nargs="+", type=datetime.fromisoformat, default=[], metavar="YYYY-MM-DD",
+        help="Backfill dates, each replayed from the responses archived by then (requires --replay)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.pipeline_collect_workers,
+        help="Markets collected and published at once"
+    )
+    parser.add_argument(
+        "--skip-ai", action="store_true",
+        help="Use basic insights instead of calling Claude"
+    )
+    parser.add_argument(
+        "--replay", action="store_true",
+        help="Answer collector requests from the response archive instead of the network"
+    )
+    parser.add_argument(
+        "--replay-until", type=datetime.fromisoformat, metavar="YYYY-MM-DDTHH:MM",
+        help="With --replay and no --as-of, use the newest responses archived at or before this time"
+    )
+    parser.add_argument(
+        "--write-batch-size", type=int, default=settings.batch_write_size,
+        help="Analyses per bulk database insert"
+    )
+    parser.add_argument(
+        "--publish", action="store_true",
+        help="Also publish the analyses to Kafka (off by default so backfills stay off the live topic)"
+    )
+    args = parser.parse_args(argv)
+    
+    if args.as_of and not args.replay:
+        parser.error("--as-of requires --replay; live sources only return today's listings")
+    if args.as_of and args.replay_until:
+        parser.error("--replay-until can't be combined with --as-of; each as-of date is its own cut-off")
+    
+    return args
+
+
+def load_markets(args: argparse.Namespace) -> List[str]:
+    """Combine markets from the command line and markets file, in order, without duplicates"""
+    markets = list(args.markets)
+    
+    if args.markets_file:
+        for line in args.markets_file.read_text().splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                markets.append(line)
+    
+    if not markets:
+        markets = settings.markets_list
+    
+    return list(dict.fromkeys(markets))
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Batch entry point
+    
+    Returns:
+        Process exit code (1 if any job failed or any analysis wasn't written)
+    """
+    args = parse_args(argv)
+    markets = load_markets(args)
+    
+    settings.pipeline_collect_workers = args.concurrency
+    settings.pipeline_publish_workers = args.concurrency
+    if args.skip_ai:
+        settings.enable_ai_insights = False
+    if args.replay:
+        settings.collector_replay = True
+        settings.archive_replay_until = args.replay_until.isoformat() if args.replay_until else ""
+    
+    agent = BatchSupplyAgent(write_batch_size=args.write_batch_size, publish=args.publish)
+    summary = await agent.run_batch(markets, args.as_of or None)
+    
+    return 1 if summary["failed"] or summary["write_failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,13 +1,53 @@
 """
 Data collectors for Supply Agent
 """
+from .archive import ArchiveError, ResponseArchive, replay_until, shared_archive
 from .base import BaseCollector, CollectorError
+from .cache import ResponseCache, shared_response_cache
+from .hedging import HedgePolicy, hedge_policy_for
+from .http import HttpClient, shared_http_client
+from .last_good import LastGoodStore, shared_last_good
+from .rate_limiter import AdaptiveRateLimiter, rate_limiter_for
+from .resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+from .single_flight import SingleFlight, shared_single_flight
+from .synthetic import SyntheticMarketGenerator, shared_synthetic_generator
+from .tiling import MarketTiler, Tile
 from .zillow import ZillowCollector
 from .redfin import RedfinCollector
+from .mls import MlsCollector, MlsListingStore
+from .scraper import BrowserPool, DomainThrottle, ScrapingCollector
 
 __all__ = [
     'BaseCollector',
     'CollectorError',
+    'ArchiveError',
+    'ResponseArchive',
+    'shared_archive',
+    'replay_until',
+    'ResponseCache',
+    'shared_response_cache',
+    'HedgePolicy',
+    'hedge_policy_for',
+    'HttpClient',
+    'shared_http_client',
+    'LastGoodStore',
+    'shared_last_good',
+    'AdaptiveRateLimiter',
+    'rate_limiter_for',
+    'CircuitBreaker',
+    'CircuitOpenError',
+    'RetryPolicy',
+    'SingleFlight',
+    'shared_single_flight',
+    'SyntheticMarketGenerator',
+    'shared_synthetic_generator',
+    'MarketTiler',
+    'Tile',
     'ZillowCollector',
-    'RedfinCollector'
+    'RedfinCollector',
+    'MlsCollector',
+    'MlsListingStore',
+    'BrowserPool',
+    'DomainThrottle',
+    'ScrapingCollector'
 ]
@@ -0,0 +1,248 @@
+"""
+Raw-response archive for data collectors
+Append-only, compressed record of every response, with offline replay
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import shutil
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlencode
+from loguru import logger
+
+from .tiling import AGENT_ROOT
+from config.settings import settings
+
+
+# Market being collected, set by BaseCollector.collect_safe for its requests
+current_market: ContextVar[Optional[str]] = ContextVar("current_market", default=None)
+
+# Replay cut-off for the current collection, set per job by as-of backfills;
+# overrides ARCHIVE_REPLAY_UNTIL
+replay_until: ContextVar[Optional[datetime]] = ContextVar("replay_until", default=None)
+
+
+def _hash_file(body: BinaryIO) -> Tuple[str, int]:
+    """SHA-256 and size of a file's contents, read from the start in chunks"""
+    body.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := body.read(1 << 20):
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+class ArchiveError(Exception):
+    """Raised when an archived response is missing or corrupt"""
+    pass
+
+
+class ResponseArchive:
+    """
+    Append-only archive of raw collector responses
+    
+    Layout under the archive directory:
+    - ``objects/<sha[:2]>/<sha>.gz``: each distinct response body, gzipped
+      and named by its SHA-256, written once
+    - ``index/<source>/<YYYY-MM-DD>.jsonl.gz``: one JSON line per response
+      (source, market, status, URL, parameters, timestamp, hash), appended
+      as a new gzip member per write
+      
+    Identical bodies (e.g. cache hits, unchanged pages) only add an index
+    line. Replay looks a request up in the index and returns the newest
+    archived body for it, optionally as of a cut-off time.
+    """
+    
+    def __init__(self, directory: Optional[str] = None):
+        self.name = "ResponseArchive"
+        location = Path(directory if directory is not None else settings.archive_dir)
+        self.directory = location if location.is_absolute() else AGENT_ROOT / location
+        self._lock = asyncio.Lock()
+        # source -> request key -> [(fetched_at, sha256)], loaded on first replay
+        self._index: Dict[str, Dict[str, List[Tuple[str, str]]]] = {}
+        
+        # Metrics
+        self.recorded_count = 0
+        self.stored_bytes = 0
+        self.deduplicated_count = 0
+        self.replayed_count = 0
+        self.miss_count = 0
+    
+    @staticmethod
+    def request_key(url: str, params: Optional[Dict[str, Any]] = None, ignore: Iterable[str] = ()) -> str:
+        """Key identifying a request, without parameters that vary between runs"""
+        skipped = set(ignore)
+        query = urlencode(sorted(
+            (name, value) for name, value in (params or {}).items() if name not in skipped
+        ))
+        return f"{url}?{query}"
+    
+    async def record(
+        self,
+        source: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        body: Union[bytes, BinaryIO],
+        ignore: Iterable[str] = ()
+    ):
+        """
+        Archive a response body
+        
+        Args:
+            source: Collector name
+            url: Request URL
+            params: Query parameters
+            body: Raw response body, or a file holding it (read from the
+                start, in chunks, so large bodies aren't loaded whole)
+            ignore: Parameters left out of the replay key
+        """
+        if isinstance(body, bytes):
+            digest, size = hashlib.sha256(body).hexdigest(), len(body)
+        else:
+            digest, size = await asyncio.to_thread(_hash_file, body)
+        fetched_at = datetime.utcnow().isoformat()
+        entry = {
+            "source": source,
+            "market": current_market.get(),
+            "status": (params or {}).get("status"),
+            "url": url,
+            "params": params or {},
+            "key": self.request_key(url, params, ignore),
+            "fetched_at": fetched_at,
+            "sha256": digest,
+            "size": size
+        }
+        
+        async with self._lock:
+            written = await asyncio.to_thread(self._write, entry, body)
+        
+        self.recorded_count += 1
+        if written:
+            self.stored_bytes += size
+        else:
+            self.deduplicated_count += 1
+        
+        if source in self._index:
+            self._index[source].setdefault(entry["key"], []).append((fetched_at, digest))
+    
+    def _object_path(self, digest: str) -> Path:
+        """Where a body with the given hash is stored"""
+        return self.directory / "objects" / digest[:2] / f"{digest}.gz"
+    
+    def _write(self, entry: Dict[str, Any], body: Union[bytes, BinaryIO]) -> bool:
+        """Store the body if it is new and append the index line"""
+        path = self._object_path(entry["sha256"])
+        written = False
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_suffix(".tmp")
+            with gzip.open(partial, "wb") as f:
+                if isinstance(body, bytes):
+                    f.write(body)
+                else:
+                    body.seek(0)
+                    shutil.copyfileobj(body, f)
+            partial.replace(path)
+            written = True
+        
+        index_path = (
+            self.directory / "index" / entry["source"] / f"{entry['fetched_at'][:10]}.jsonl.gz"
+        )
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(index_path, "ab") as f:
+            f.write(json.dumps(entry).encode() + b"\n")
+        
+        return written
+    
+    async def lookup(
+        self,
+        source: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        ignore: Iterable[str] = (),
+        until: Optional[datetime] = None
+    ) -> Optional[bytes]:
+        """
+        Newest archived body for a request
+        
+        Args:
+            source: Collector name
+            url: Request URL
+            params: Query parameters
+            ignore: Parameters left out of the replay key
+            until: Only consider responses fetched at or before this time
+            
+        Returns:
+            The archived body, or None if the request was never archived
+            
+        Raises:
+            ArchiveError: If the stored body doesn't match its hash
+        """
+        if source not in self._index:
+            async with self._lock:
+                if source not in self._index:
+                    self._index[source] = await asyncio.to_thread(self._load_index, source)
+        
+        versions = self._index[source].get(self.request_key(url, params, ignore), [])
+        cutoff = until.isoformat() if until is not None else None
+        candidates = [v for v in versions if cutoff is None or v[0] <= cutoff]
+        if not candidates:
+            self.miss_count += 1
+            return None
+        
+        _, digest = max(candidates)
+        body = await asyncio.to_thread(self._read_object, digest)
+        self.replayed_count += 1
+        return body
+    
+    def _load_index(self, source: str) -> Dict[str, List[Tuple[str, str]]]:
+        """Read every index file of a source"""
+        index: Dict[str, List[Tuple[str, str]]] = {}
+        for path in sorted((self.directory / "index" / source).glob("*.jsonl.gz")):
+            try:
+                with gzip.open(path, "rt") as f:
+                    for line in f:
+                        entry = json.loads(line)
+                        index.setdefault(entry["key"], []).append(
+                            (entry["fetched_at"], entry["sha256"])
+                        )
+            except (OSError, EOFError, ValueError) as e:
+                # A write cut off by a crash leaves a truncated last member
+                logger.warning(f"Archive index {path} is damaged, read up to the error: {e}")
+        
+        logger.info(f"Archive index for {source}: {len(index)} requests")
+        return index
+    
+    def _read_object(self, digest: str) -> bytes:
+        """Read a stored body and check it against its hash"""
+        with gzip.open(self._object_path(digest), "rb") as f:
+            body = f.read()
+        if hashlib.sha256(body).hexdigest() != digest:
+            raise ArchiveError(f"Archived response {digest} is corrupt")
+        return body
+    
+    def get_stats(self) -> dict:
+        """Get archive statistics"""
+        return {
+            "recorded": self.recorded_count,
+            "stored_bytes": self.stored_bytes,
+            "deduplicated": self.deduplicated_count,
+            "replayed": self.replayed_count,
+            "misses": self.miss_count
+        }
+
+
+_shared_archive: Optional[ResponseArchive] = None
+
+
+def shared_archive() -> ResponseArchive:
+    """Get the process-wide response archive used by collectors by default"""
+    global _shared_archive
+    if _shared_archive is None:
+        _shared_archive = ResponseArchive()
+    return _shared_archive
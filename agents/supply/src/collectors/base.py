@@ -2,18 +2,165 @@
 Base collector interface for data sources
 """
 from abc import ABC, abstractmethod
-from typing import Optional
+from contextvars import ContextVar
+from typing import (
+    Any, AsyncIterator, Awaitable, BinaryIO, Callable, Dict, List, Mapping, NamedTuple,
+    Optional, Tuple, Union
+)
+import asyncio
+import functools
+import math
+import tempfile
 import time
+from datetime import datetime
+import aiohttp
 from loguru import logger
 
+from .archive import ResponseArchive, current_market, replay_until, shared_archive
+from .cache import ResponseCache, shared_response_cache
+from .hedging import HedgePolicy, hedge_policy_for
+from .http import HttpClient, shared_http_client
+from .json_stream import stream_json_items
+from .last_good import LastGoodStore, shared_last_good
+from .rate_limiter import AdaptiveRateLimiter, parse_retry_after, rate_limiter_for
+from .resilience import CircuitBreaker, RetryPolicy, circuit_breaker_for
+from .single_flight import SingleFlight, shared_single_flight
+from .tiling import MarketTiler, Tile, market_key, shared_tiler
+from ..listings import ListingTable, ListingTableBuilder
 from ..models import MarketData, CollectorResult
+from config.settings import settings
+
+
+# Decodes a response body given as an async stream of byte chunks
+BodyDecoder = Callable[[AsyncIterator[bytes]], Awaitable[Any]]
+
+
+class ListingPage(NamedTuple):
+    """One page of a listing search, normalized as it was decoded"""
+    listings: ListingTable
+    count: int
+    total: Optional[Any]
+    fields: Dict[str, Any]
+
+
+class CollectionBudget:
+    """
+    Time left for one collect() call, shared by all of its page requests
+    
+    Pagination asks the budget before each page and skips pages it can't
+    expect to finish in time, so a market too large for the collector
+    timeout yields the pages fetched so far instead of nothing. Skipped
+    pages lower the collection's completeness.
+    
+    A budget with a parent shares the parent's deadline but keeps its own
+    page counts, so a search shared by several collections can hand its
+    counts to each of them (see absorb).
+    """
+    
+    # Keep this many average page times in reserve before starting a page
+    reserve_pages = 2.0
+    
+    def __init__(self, timeout: Optional[float] = None, parent: Optional["CollectionBudget"] = None):
+        self.expires_at = None if timeout is None else time.monotonic() + timeout
+        self.parent = parent
+        self.pages_fetched = 0
+        self.pages_skipped = 0
+        self.page_seconds = 0.0
+    
+    def remaining(self) -> float:
+        """Seconds left (infinite without a timeout)"""
+        if self.parent is not None:
+            return self.parent.remaining()
+        if self.expires_at is None:
+            return math.inf
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def allows_page(self) -> bool:
+        """Whether another page is likely to finish within the budget"""
+        if self.pages_fetched == 0:
+            return True
+        average = self.page_seconds / self.pages_fetched
+        return self.remaining() > average * self.reserve_pages
+    
+    def renew(self, timeout: Optional[float]):
+        """
+        Restart the clock for a collection that carries on past its timeout
+        
+        A late collection left to finish in the background would otherwise
+        skip every remaining page against the expired deadline.
+        """
+        self.expires_at = None if timeout is None else time.monotonic() + timeout
+    
+    def record_page(self, seconds: float):
+        """Count a fetched page and how long it took, rate-limit wait included"""
+        self.pages_fetched += 1
+        self.page_seconds += seconds
+    
+    def absorb(self, other: "CollectionBudget"):
+        """Add the page counts of a search done under another budget"""
+        self.pages_fetched += other.pages_fetched
+        self.pages_skipped += other.pages_skipped
+        self.page_seconds += other.page_seconds
+    
+    @property
+    def completeness(self) -> float:
+        """Share of the needed pages that were fetched"""
+        needed = self.pages_fetched + self.pages_skipped
+        return self.pages_fetched / needed if needed else 1.0
+
+
+# Budget of the collection in progress, set by BaseCollector.collect_safe
+collection_budget: ContextVar[Optional[CollectionBudget]] = ContextVar("collection_budget", default=None)
+
+
+async def _iter_body(body: bytes) -> AsyncIterator[bytes]:
+    """Present an already-read body as a chunk stream"""
+    yield body
 
 
 class BaseCollector(ABC):
     """Abstract base class for all data collectors"""
     
-    def __init__(self, name: str):
+    # Listing searches are paged with limit/offset; page_size is the API maximum
+    page_size = 1000
+    # Response field holding the total result count, if the API reports it
+    total_key = "total"
+    # Request parameters that change between runs (e.g. date cutoffs) and
+    # are ignored when matching archived responses in replay mode
+    replay_ignore_params: Tuple[str, ...] = ()
+    
+    def __init__(
+        self,
+        name: str,
+        http: Optional[HttpClient] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        tiler: Optional[MarketTiler] = None,
+        cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        last_good: Optional[LastGoodStore] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        archive: Optional[ResponseArchive] = None
+    ):
         self.name = name
+        self.http = http or shared_http_client()
+        self.rate_limiter = rate_limiter or rate_limiter_for(name)
+        self.circuit_breaker = circuit_breaker or circuit_breaker_for(name)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.tiler = tiler or shared_tiler()
+        self.cache = cache or (shared_response_cache() if settings.enable_caching else None)
+        self.single_flight = single_flight or shared_single_flight()
+        self.last_good = last_good or (shared_last_good() if settings.enable_stale_fallback else None)
+        self.hedge_policy = hedge_policy or (
+            hedge_policy_for(name) if settings.enable_hedged_requests else None
+        )
+        self.archive = archive or (
+            shared_archive()
+            if settings.enable_response_archive or settings.collector_replay
+            else None
+        )
+        self.headers: Dict[str, str] = {}
         self.call_count = 0
         self.error_count = 0
         self.total_response_time_ms = 0
@@ -34,27 +181,55 @@ class BaseCollector(ABC):
         """
         pass
     
-    async def collect_safe(self, market: str) -> CollectorResult:
+    async def collect_safe(self, market: str, timeout: Optional[float] = None) -> CollectorResult:
         """
         Safely collect data with error handling and metrics
         
+        With stale fallback enabled, a failed or late collection is answered
+        with the source's last good data for the market (marked
+        ``is_stale``), and a late collection keeps running in the background,
+        with a fresh time budget for its remaining pages, to refresh that
+        data.
+        
         Args:
             market: Market identifier
+            timeout: Optional deadline in seconds; collection is cancelled
+                (or left to finish in the background) and reported as failed
+                when it is exceeded
             
         Returns:
             CollectorResult with success status and data or error
         """
         start_time = time.time()
+        budget = CollectionBudget(timeout)
+        
+        # The collection task inherits the market for archived responses and
+        # the budget its pagination is held to
+        token = current_market.set(market)
+        budget_token = collection_budget.set(budget)
+        try:
+            collection = asyncio.ensure_future(self.collect(market))
+        finally:
+            collection_budget.reset(budget_token)
+            current_market.reset(token)
         
         try:
             logger.info(f"{self.name}: Collecting data for {market}")
             
-            market_data = await self.collect(market)
+            if timeout is not None:
+                market_data = await asyncio.wait_for(asyncio.shield(collection), timeout)
+            else:
+                market_data = await collection
             
             response_time = int((time.time() - start_time) * 1000)
             self.call_count += 1
             self.total_response_time_ms += response_time
             
+            market_data = self._mark_truncated(market, market_data, budget)
+            
+            if self.last_good is not None:
+                self.last_good.put(self.name, market, market_data)
+            
             logger.success(
                 f"{self.name}: Successfully collected {market_data.total_active} "
                 f"active listings for {market} in {response_time}ms"
@@ -70,16 +245,500 @@ class BaseCollector(ABC):
         except Exception as e:
             response_time = int((time.time() - start_time) * 1000)
             self.error_count += 1
-            error_msg = f"{self.name} failed for {market}: {str(e)}"
+            timed_out = isinstance(e, asyncio.TimeoutError)
+            reason = f"timed out after {timeout:.1f}s" if timed_out else str(e)
+            error_msg = f"{self.name} failed for {market}: {reason}"
             
             logger.error(error_msg)
             
+            if self.last_good is not None and timed_out:
+                # Let the late collection finish and refresh the stored data,
+                # with a fresh budget for its remaining pages
+                refresh_timeout = settings.collector_timeout_seconds
+                budget.renew(refresh_timeout)
+                self.last_good.refresh_in_background(
+                    self.name,
+                    market,
+                    asyncio.ensure_future(self._finish_late(market, collection, budget)),
+                    refresh_timeout
+                )
+            else:
+                collection.cancel()
+            
+            stale = self.last_good.get(self.name, market) if self.last_good is not None else None
+            
+            if stale is not None:
+                age_minutes = LastGoodStore.age_seconds(stale) / 60
+                logger.warning(
+                    f"{self.name}: serving {market} data from {age_minutes:.0f} minutes ago"
+                )
+                return CollectorResult(
+                    source=self.name,
+                    success=True,
+                    market_data=stale,
+                    error=error_msg,
+                    timed_out=timed_out,
+                    response_time_ms=response_time
+                )
+            
             return CollectorResult(
                 source=self.name,
                 success=False,
                 error=error_msg,
+                timed_out=timed_out,
                 response_time_ms=response_time
             )
+        except BaseException:
+            collection.cancel()
+            raise
+    
+    def _mark_truncated(
+        self,
+        market: str,
+        market_data: MarketData,
+        budget: CollectionBudget
+    ) -> MarketData:
+        """Flag data whose collection skipped pages and scale its completeness"""
+        if not budget.pages_skipped:
+            return market_data
+        
+        logger.warning(
+            f"{self.name}: {market} is too large to page through in time, "
+            f"using {budget.pages_fetched} of {budget.pages_fetched + budget.pages_skipped} pages"
+        )
+        return market_data.model_copy(update={
+            'completeness': round(market_data.completeness * budget.completeness, 3),
+            'is_truncated': True
+        })
+    
+    async def _finish_late(
+        self,
+        market: str,
+        collection: "asyncio.Future[MarketData]",
+        budget: CollectionBudget
+    ) -> MarketData:
+        """Wait for a collection that ran past its timeout and mark any truncation"""
+        return self._mark_truncated(market, await collection, budget)
+    
+    async def _request_page(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        items_key: str,
+        normalize: Callable[[List[Dict]], List[Dict[str, Any]]]
+    ) -> ListingPage:
+        """
+        GET one page of a listing search, decoding it as a stream
+        
+        Listings are decoded and normalized one at a time as the body
+        arrives and go straight into the page's columns, so neither raw nor
+        normalized listing dicts of a page are ever all in memory at once.
+        
+        Args:
+            url: Search URL
+            params: Search parameters, including paging
+            items_key: Response field holding the page's listings
+            normalize: Converts raw listings to the standard format
+            
+        Returns:
+            ListingPage with the normalized listings, the raw listing count,
+            the reported total (if any) and the response's other fields
+        """
+        async def decode(chunks: AsyncIterator[bytes]) -> ListingPage:
+            listings = ListingTableBuilder()
+            count = 0
+            
+            def on_item(item: Any):
+                nonlocal count
+                count += 1
+                listings.extend(normalize([item]))
+            
+            fields = await stream_json_items(chunks, items_key, on_item)
+            return ListingPage(listings.build(), count, fields.get(self.total_key), fields)
+        
+        return await self._request(url, params, decode)
+    
+    async def _request(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        decode: BodyDecoder
+    ) -> Any:
+        """
+        GET from the source and decode the body as it streams in
+        
+        Fresh cached responses are decoded without a request; stale ones
+        are revalidated with a conditional request. Every request waits for
+        the source's rate limiter, and 429 responses slow the limiter down
+        for all requests to the source. With hedging enabled, an attempt
+        that runs past the source's latency percentile is raced against a
+        second identical request. Transient failures are retried with
+        backoff; a request that still fails counts towards opening the
+        source's circuit breaker.
+        
+        With caching or the response archive enabled the raw body is also
+        spooled as it streams, so it can be stored once it has decoded
+        successfully (see _store_body). In replay mode the response comes
+        from the archive and nothing is sent.
+        
+        Args:
+            url: Request URL
+            params: Query parameters
+            decode: Turns the body's chunk stream into the result
+            
+        Returns:
+            Whatever ``decode`` returns
+            
+        Raises:
+            CircuitOpenError: If the source's circuit is open
+        """
+        if settings.collector_replay:
+            return await self._replay(url, params, decode)
+        
+        cache_key = cached = None
+        if self.cache is not None:
+            cache_key = ResponseCache.key(self.name, url, params)
+            cached = await self.cache.get(cache_key)
+            if cached is not None and self.cache.is_fresh(cached):
+                data = await decode(_iter_body(cached.body))
+                await self._archive(url, params, cached.body)
+                return data
+        
+        self.circuit_breaker.before_request()
+        
+        async def attempt() -> Any:
+            headers = {**self.headers, **self.cache.validators(cached)} if cached else self.headers
+            try:
+                async with self.http.stream(url, params=params, headers=headers) as response:
+                    self.rate_limiter.on_success()
+                    
+                    if response.status == 304 and cached is not None:
+                        await self.cache.renew(cache_key, cached)
+                        data = await decode(_iter_body(cached.body))
+                        await self._archive(url, params, cached.body)
+                        return data
+                    
+                    chunks = response.content.iter_chunked(
+                        max(1, settings.collector_stream_chunk_bytes)
+                    )
+                    if self.cache is None and self.archive is None:
+                        return await decode(chunks)
+                    
+                    memory_limit = settings.collector_spool_memory_bytes
+                    spool: Optional[BinaryIO] = tempfile.SpooledTemporaryFile(max_size=memory_limit)
+                    
+                    async def tee() -> AsyncIterator[bytes]:
+                        nonlocal spool
+                        async for chunk in chunks:
+                            if spool is not None:
+                                spool.write(chunk)
+                                if self.archive is None and spool.tell() > memory_limit:
+                                    # Too large to cache and nothing to archive
+                                    spool.close()
+                                    spool = None
+                            yield chunk
+                    
+                    try:
+                        data = await decode(tee())
+                        if spool is not None:
+                            await self._store_body(url, params, cache_key, spool, response.headers)
+                    finally:
+                        if spool is not None:
+                            spool.close()
+                    return data
+            except aiohttp.ClientResponseError as e:
+                if e.status == 429:
+                    retry_after = e.headers.get("Retry-After") if e.headers else None
+                    self.rate_limiter.on_throttled(parse_retry_after(retry_after))
+                raise
+        
+        async def send() -> Any:
+            await self.rate_limiter.acquire()
+            return await attempt()
+        
+        if self.hedge_policy is not None:
+            # Rate-limit waits stay out of the hedge's latency samples and delay
+            send = functools.partial(
+                self.hedge_policy.run, attempt, acquire=self.rate_limiter.acquire
+            )
+        
+        try:
+            data = await self.retry_policy.run(send, f"{self.name} request")
+        except Exception:
+            self.circuit_breaker.record_failure()
+            raise
+        except BaseException:
+            self.circuit_breaker.release()
+            raise
+        
+        self.circuit_breaker.record_success()
+        return data
+    
+    async def _replay(self, url: str, params: Optional[Dict[str, Any]], decode: BodyDecoder) -> Any:
+        """
+        Answer a request from the response archive (replay mode)
+        
+        Raises:
+            CollectorError: If the request was never archived
+        """
+        until = replay_until.get()
+        if until is None and settings.archive_replay_until:
+            until = datetime.fromisoformat(settings.archive_replay_until)
+        body = await self.archive.lookup(self.name, url, params, self.replay_ignore_params, until)
+        if body is None:
+            raise CollectorError(f"{self.name}: no archived response for {url} {params or {}}")
+        return await decode(_iter_body(body))
+    
+    async def _store_body(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        cache_key: Optional[str],
+        spool: BinaryIO,
+        headers: Mapping[str, str]
+    ):
+        """
+        Cache and archive a response body spooled while it streamed
+        
+        A body up to collector_spool_memory_bytes stayed in memory and is
+        cached. A larger one has spilled to disk; it isn't cached, and the
+        archive copies it from the spool file, so it is never held in
+        memory whole.
+        """
+        size = spool.tell()
+        if self.cache is not None:
+            if size <= settings.collector_spool_memory_bytes:
+                spool.seek(0)
+                await self.cache.put(cache_key, spool.read(), headers)
+            else:
+                logger.debug(f"{self.name}: {size}-byte response for {url} is too large to cache")
+        await self._archive(url, params, spool)
+    
+    async def _archive(self, url: str, params: Optional[Dict[str, Any]], body: Union[bytes, BinaryIO]):
+        """Write a response to the archive, if enabled (failures are only logged)"""
+        if self.archive is None:
+            return
+        try:
+            await self.archive.record(self.name, url, params, body, self.replay_ignore_params)
+        except OSError as e:
+            logger.warning(f"{self.name}: could not archive response for {url}: {e}")
+    
+    async def _fetch_listings(
+        self,
+        market: str,
+        url: str,
+        params: Dict[str, Any],
+        items_key: str,
+        normalize: Callable[[List[Dict]], List[Dict[str, Any]]]
+    ) -> ListingTable:
+        """
+        Fetch a listing search for a market, split into geographic tiles
+        
+        Markets in the region table are searched one tile at a time, with all
+        tiles in parallel, so each request is a small, even work unit, if the
+        collector knows how to filter its search by tile (see _tile_params).
+        Other markets, sources without tile filters, and all markets with
+        tiling disabled are searched whole.
+        
+        Identical searches already in flight (same source, market, URL and
+        parameters, e.g. from overlapping scheduled and on-demand runs) are
+        joined rather than repeated, and share the returned table. The
+        search counts its pages on a budget of its own (bounded by the
+        starting caller's deadline), and every caller adds those counts to
+        its collection's budget, so a truncated search is flagged for all of
+        them.
+        
+        Args:
+            market: Market name (e.g., "Austin, TX")
+            url: Search URL
+            params: Search parameters, without paging or tile filters
+            items_key: Response field holding the page's listings
+            normalize: Converts raw listings to the standard format
+            
+        Returns:
+            Normalized listings, without duplicates from shared tile borders
+        """
+        async def search() -> Tuple[ListingTable, CollectionBudget]:
+            search_budget = CollectionBudget(parent=collection_budget.get())
+            collection_budget.set(search_budget)
+            listings = await self._fetch_tiled(market, url, params, items_key, normalize)
+            return listings, search_budget
+        
+        key = (self.name, market_key(market), url, tuple(sorted(params.items())))
+        listings, search_budget = await self.single_flight.do(key, search)
+        
+        budget = collection_budget.get()
+        if budget is not None:
+            budget.absorb(search_budget)
+        return listings
+    
+    async def _fetch_tiled(
+        self,
+        market: str,
+        url: str,
+        params: Dict[str, Any],
+        items_key: str,
+        normalize: Callable[[List[Dict]], List[Dict[str, Any]]]
+    ) -> ListingTable:
+        """Run a listing search over the market's tiles (see _fetch_listings)"""
+        tiles = self.tiler.tiles_for(market) if settings.enable_geo_tiling else []
+        if not tiles or self._tile_params(tiles[0]) is None:
+            return await self._fetch_pages(url, params, items_key, normalize)
+        
+        results = await self._gather_all(*(
+            self._fetch_tile(url, params, items_key, normalize, tile)
+            for tile in tiles
+        ))
+        
+        return ListingTable.concat(results).unique_by('id')
+    
+    async def _fetch_tile(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        items_key: str,
+        normalize: Callable[[List[Dict]], List[Dict[str, Any]]],
+        tile: Tile
+    ) -> ListingTable:
+        """
+        Fetch one tile, splitting it into quadrants if it turns out too large
+        
+        The tile's first page shows its size. An oversized tile's first page
+        is dropped and its quadrants are fetched in parallel instead.
+        """
+        tile_params = {**params, **self._tile_params(tile)}
+        started = time.monotonic()
+        first_page = await self._request_page(
+            url, {**tile_params, "limit": self.page_size, "offset": 0}, items_key, normalize
+        )
+        budget = collection_budget.get()
+        if budget is not None:
+            budget.record_page(time.monotonic() - started)
+        first_page_full = first_page.count >= self.page_size
+        
+        if self.tiler.should_split(tile, first_page.total, first_page_full):
+            del first_page
+            logger.debug(f"{self.name}: splitting oversized {tile}")
+            parts = await self._gather_all(*(
+                self._fetch_tile(url, params, items_key, normalize, child)
+                for child in self.tiler.split(tile)
+            ))
+            return ListingTable.concat(parts)
+        
+        return await self._fetch_pages(url, tile_params, items_key, normalize, first_page)
+    
+    def _tile_params(self, tile: Tile) -> Optional[Dict[str, Any]]:
+        """
+        Search parameters restricting a search to a tile
+        
+        Collectors whose search API can filter by ZIP code or bounding box
+        override this to opt in to tiling. The default (None) means the
+        source has no such filter and is always searched whole.
+        """
+        return None
+    
+    async def _fetch_pages(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        items_key: str,
+        normalize: Callable[[List[Dict]], List[Dict[str, Any]]],
+        first_page: Optional[ListingPage] = None
+    ) -> ListingTable:
+        """
+        Fetch every page of a listing search and normalize it
+        
+        The first page tells us whether there is more. If the API reports a
+        total, the remaining pages are requested concurrently; otherwise pages
+        are requested in concurrent waves until one comes back short. At most
+        collector_page_concurrency pages are in flight (all still subject to
+        the source's rate limit), and each listing is normalized as soon as
+        it is decoded so raw responses don't pile up.
+        
+        Pages that won't fit in the collection's time budget, or beyond
+        collector_max_pages, are skipped and recorded on the budget, so the
+        collection returns partial results with lowered completeness.
+        
+        Args:
+            url: Search URL
+            params: Search parameters, without paging
+            items_key: Response field holding the page's listings
+            normalize: Converts raw listings to the standard format
+            first_page: Already-fetched first page, if any
+            
+        Returns:
+            Normalized listings from all pages
+        """
+        pages_by_number: Dict[int, ListingTable] = {}
+        semaphore = asyncio.Semaphore(max(1, settings.collector_page_concurrency))
+        max_pages = max(1, settings.collector_max_pages)
+        budget = collection_budget.get() or CollectionBudget()
+        
+        async def fetch_page(page: int, result: Optional[ListingPage] = None) -> Optional[Tuple[int, Any]]:
+            if result is None:
+                page_params = {**params, "limit": self.page_size, "offset": page * self.page_size}
+                async with semaphore:
+                    if page > 0 and not budget.allows_page():
+                        return None
+                    started = time.monotonic()
+                    result = await self._request_page(url, page_params, items_key, normalize)
+                    budget.record_page(time.monotonic() - started)
+            pages_by_number[page] = result.listings
+            return result.count, result.total
+        
+        count, total = await fetch_page(0, first_page)
+        pages = 1
+        exhausted = count < self.page_size
+        skipped = 0
+        
+        if not exhausted and isinstance(total, int):
+            needed = math.ceil(total / self.page_size)
+            pages = min(needed, max_pages)
+            results = await self._gather_all(*(fetch_page(page) for page in range(1, pages)))
+            skipped = results.count(None) + needed - pages
+            exhausted = True
+        
+        while not exhausted and pages < max_pages:
+            wave = range(pages, min(pages + settings.collector_page_concurrency, max_pages))
+            results = await self._gather_all(*(fetch_page(page) for page in wave))
+            pages += len(wave)
+            if None in results:
+                # Out of time; the number of pages left is unknown
+                skipped = results.count(None)
+                break
+            exhausted = any(count < self.page_size for count, _ in results)
+        
+        if not exhausted and not skipped:
+            skipped = 1  # Stopped at max_pages without reaching the end
+        
+        if skipped:
+            budget.pages_skipped += skipped
+            logger.warning(
+                f"{self.name}: stopped paging {url} early (time budget or "
+                f"{max_pages}-page limit), results truncated"
+            )
+        
+        return ListingTable.concat(pages_by_number[page] for page in sorted(pages_by_number))
+    
+    async def _gather_all(self, *aws: Awaitable[Any]) -> List[Any]:
+        """
+        Run requests concurrently, cancelling the rest if one fails
+        
+        Unlike a bare asyncio.gather, a failed collection doesn't leave
+        sibling requests running against a source that is already failing.
+        """
+        tasks = [asyncio.ensure_future(aw) for aw in aws]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    
+    async def close(self):
+        """Release any resources held by the collector"""
+        pass
     
     @property
     def average_response_time_ms(self) -> float:
@@ -97,13 +756,19 @@ class BaseCollector(ABC):
     
     def get_stats(self) -> dict:
         """Get collector statistics"""
-        return {
+        stats = {
             "name": self.name,
             "calls": self.call_count,
             "errors": self.error_count,
             "success_rate": self.success_rate,
-            "avg_response_time_ms": self.average_response_time_ms
+            "avg_response_time_ms": self.average_response_time_ms,
+            "retries": self.retry_policy.retry_count,
+            "rate_limit": self.rate_limiter.get_stats(),
+            "circuit": self.circuit_breaker.get_stats()
         }
+        if self.hedge_policy is not None:
+            stats["hedging"] = self.hedge_policy.get_stats()
+        return stats
 
 
 class CollectorError(Exception):
@@ -0,0 +1,280 @@
+"""
+Response cache for data collectors
+Keeps recent API responses in memory (and optionally on disk) with revalidation
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import urlencode
+from loguru import logger
+
+from config.settings import settings
+
+
+class CacheEntry:
+    """A cached response body with its validators"""
+    
+    __slots__ = ("body", "stored_at", "etag", "last_modified")
+    
+    def __init__(
+        self,
+        body: bytes,
+        stored_at: float,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ):
+        self.body = body
+        self.stored_at = stored_at
+        self.etag = etag
+        self.last_modified = last_modified
+    
+    @property
+    def revalidatable(self) -> bool:
+        """Whether the origin can confirm this entry with a 304"""
+        return self.etag is not None or self.last_modified is not None
+    
+    @property
+    def size(self) -> int:
+        """Body size in bytes"""
+        return len(self.body)
+
+
+def _default_ttl() -> float:
+    """
+    Configured TTL, capped at the shortest time between refreshes of a market
+    
+    A response that outlives the refresh interval is served to the next
+    refresh, which then fingerprints as unchanged and makes the adaptive
+    scheduler back the market off, so the hottest markets would slow down.
+    """
+    refresh_minutes = (
+        settings.schedule_min_interval_minutes
+        if settings.enable_adaptive_scheduling
+        else settings.agent_run_interval_minutes
+    )
+    return min(settings.cache_ttl_seconds, refresh_minutes * 60)
+
+
+class ResponseCache:
+    """
+    Two-tier cache of raw collector responses
+    
+    Entries younger than the TTL are served without a request; by default
+    the TTL never exceeds the shortest market refresh interval. Older
+    entries that carry an ETag or Last-Modified are kept so the next request
+    can be made conditional (If-None-Match / If-Modified-Since); a 304
+    answer renews the entry without transferring the body. Older entries
+    without validators are evicted when read.
+    
+    The memory tier is an LRU bounded by total body size. When a cache
+    directory is configured, entries are also written there and survive
+    restarts; the disk tier keeps at most ``disk_max_entries`` files.
+    """
+    
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        disk_max_entries: Optional[int] = None
+    ):
+        self.name = "ResponseCache"
+        self.ttl = ttl_seconds if ttl_seconds is not None else _default_ttl()
+        self.max_bytes = max_bytes if max_bytes is not None else settings.cache_max_bytes
+        directory = cache_dir if cache_dir is not None else settings.cache_dir
+        self.cache_dir = Path(directory) if directory else None
+        self.disk_max_entries = (
+            disk_max_entries if disk_max_entries is not None else settings.cache_disk_max_entries
+        )
+        
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._disk_writes = 0
+        
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Metrics
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.revalidated = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def key(source: str, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Cache key for a source's request"""
+        query = urlencode(sorted((params or {}).items()))
+        return f"{source} {url}?{query}"
+    
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Whether an entry can be served without asking the origin"""
+        return time.time() - entry.stored_at < self.ttl
+    
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Look up a response
+        
+        Returns:
+            A fresh entry, a stale entry that can be revalidated, or None
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        elif self.cache_dir is not None:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self.disk_hits += 1
+                self._remember(key, entry)
+        
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        if self.is_fresh(entry):
+            self.hits += 1
+            return entry
+        
+        if entry.revalidatable:
+            self.stale += 1
+            return entry
+        
+        self._forget(key)
+        self.misses += 1
+        return None
+    
+    def validators(self, entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """Conditional request headers for revalidating a stale entry"""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+    
+    async def put(self, key: str, body: bytes, headers: Mapping[str, str]):
+        """Store a response body along with its validators"""
+        entry = CacheEntry(
+            body,
+            time.time(),
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified")
+        )
+        self._remember(key, entry)
+        
+        if self.cache_dir is not None:
+            await asyncio.to_thread(self._write_disk, key, entry)
+    
+    async def renew(self, key: str, entry: CacheEntry):
+        """Mark a stale entry fresh again after the origin answered 304"""
+        self.revalidated += 1
+        entry.stored_at = time.time()
+        self._remember(key, entry)
+        
+        if self.cache_dir is not None:
+            await asyncio.to_thread(self._write_disk, key, entry)
+    
+    def _remember(self, key: str, entry: CacheEntry):
+        """Insert into the memory tier, evicting least recently used entries"""
+        self._forget(key, disk=False)
+        if entry.size > self.max_bytes:
+            return
+        
+        self._entries[key] = entry
+        self._bytes += entry.size
+        
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+    
+    def _forget(self, key: str, disk: bool = True):
+        """Drop an entry from memory (and disk)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        if disk and self.cache_dir is not None:
+            self._path(key).unlink(missing_ok=True)
+    
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.cache"
+    
+    def _read_disk(self, key: str) -> Optional[CacheEntry]:
+        """Load an entry from the disk tier"""
+        try:
+            with open(self._path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug(f"Unreadable cache file for {key}: {e}")
+            return None
+        
+        return CacheEntry(body, meta["stored_at"], meta.get("etag"), meta.get("last_modified"))
+    
+    def _write_disk(self, key: str, entry: CacheEntry):
+        """Persist an entry: one JSON metadata line followed by the body"""
+        meta = {
+            "key": key,
+            "stored_at": entry.stored_at,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified
+        }
+        path = self._path(key)
+        temp = path.with_suffix(".tmp")
+        try:
+            with open(temp, "wb") as f:
+                f.write(json.dumps(meta).encode() + b"\n")
+                f.write(entry.body)
+            temp.replace(path)
+            
+            self._disk_writes += 1
+            if self._disk_writes % 100 == 0:
+                self._prune_disk()
+        except OSError as e:
+            logger.warning(f"Failed to write cache file for {key}: {e}")
+    
+    def _prune_disk(self):
+        """Delete the oldest cache files beyond the disk entry limit"""
+        files = list(self.cache_dir.glob("*.cache"))
+        excess = len(files) - self.disk_max_entries
+        if excess <= 0:
+            return
+        
+        files.sort(key=lambda path: path.stat().st_mtime)
+        for path in files[:excess]:
+            path.unlink(missing_ok=True)
+            self.evictions += 1
+    
+    def get_stats(self) -> dict:
+        """Get cache statistics"""
+        lookups = self.hits + self.stale + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 2) if lookups else 0.0
+        }
+
+
+_shared_cache: Optional[ResponseCache] = None
+
+
+def shared_response_cache() -> ResponseCache:
+    """Get the process-wide collector response cache"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ResponseCache()
+    return _shared_cache
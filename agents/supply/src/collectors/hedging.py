@@ -0,0 +1,170 @@
+"""
+Hedged requests for data collectors
+Re-sends slow requests once they pass a latency percentile
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+from loguru import logger
+
+from config.settings import settings
+
+
+class HedgePolicy:
+    """
+    Per-source request hedging
+    
+    Latencies of recent requests to the source are kept in a sliding
+    window. A request still running after the configured percentile of that
+    window (e.g. p95) gets one identical backup request; whichever succeeds
+    first wins and the other is cancelled.
+    
+    Hedges are paid for from a budget that grows by ``budget_fraction`` per
+    request, up to ``budget_burst``, so hedging adds at most that fraction
+    of extra requests (and quota) on top of normal traffic.
+    
+    Latency is measured from when a request is sent. Time spent waiting for
+    a rate-limit token (``acquire``) is excluded, both from the samples and
+    from the wait before hedging, so throttling doesn't look like a slow
+    source and trigger hedges that only wait for tokens too.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        percentile: Optional[float] = None,
+        budget_fraction: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        window: Optional[int] = None,
+        budget_burst: float = 10.0
+    ):
+        self.name = name
+        self.percentile = percentile if percentile is not None else settings.hedge_percentile
+        self.budget_fraction = (
+            budget_fraction if budget_fraction is not None else settings.hedge_budget_fraction
+        )
+        self.min_samples = min_samples if min_samples is not None else settings.hedge_min_samples
+        self.budget_burst = budget_burst
+        self._latencies: Deque[float] = deque(
+            maxlen=window if window is not None else settings.hedge_latency_window
+        )
+        self._budget = 0.0
+        
+        # Metrics
+        self.request_count = 0
+        self.hedge_count = 0
+        self.hedge_wins = 0
+        self.skipped_count = 0
+    
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None without enough samples"""
+        if len(self._latencies) < max(1, self.min_samples):
+            return None
+        
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, math.ceil(self.percentile / 100 * len(ordered)) - 1)
+        return ordered[max(0, index)]
+    
+    def record(self, seconds: float):
+        """Record the latency of a completed request"""
+        self._latencies.append(seconds)
+    
+    async def run(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        acquire: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Any:
+        """
+        Call ``func``, hedging it with a second call if it is slow
+        
+        Args:
+            func: Zero-argument coroutine function making one request
+            acquire: Optional coroutine function awaited before each call
+                (e.g. a rate limiter); its wait isn't counted as latency
+            
+        Returns:
+            The result of the first call to succeed
+            
+        Raises:
+            Exception: The primary call's error if every call failed
+        """
+        self.request_count += 1
+        self._budget = min(self.budget_burst, self._budget + self.budget_fraction)
+        
+        if acquire is not None:
+            await acquire()
+        
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._timed(func)
+        
+        primary = asyncio.ensure_future(self._timed(func))
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+            
+            if self._budget < 1:
+                self.skipped_count += 1
+                return await primary
+            
+            self._budget -= 1
+            self.hedge_count += 1
+            logger.debug(f"{self.name}: hedging request still running after {delay:.2f}s")
+            hedge = asyncio.ensure_future(self._timed(func, acquire))
+            return await self._first_success(primary, hedge)
+        finally:
+            primary.cancel()
+    
+    async def _first_success(self, primary: asyncio.Future, hedge: asyncio.Future) -> Any:
+        """Result of whichever call succeeds first, cancelling the other"""
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+            # Both failed; surface the original request's error
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                task.cancel()
+    
+    async def _timed(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        acquire: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Any:
+        """Run one call and record its latency, from when it is sent, if it succeeds"""
+        if acquire is not None:
+            await acquire()
+        started = time.monotonic()
+        result = await func()
+        self.record(time.monotonic() - started)
+        return result
+    
+    def get_stats(self) -> dict:
+        """Get hedging statistics"""
+        delay = self.hedge_delay()
+        return {
+            "requests": self.request_count,
+            "hedged": self.hedge_count,
+            "hedge_wins": self.hedge_wins,
+            "skipped_no_budget": self.skipped_count,
+            "hedge_after_ms": round(delay * 1000) if delay is not None else None
+        }
+
+
+_policies: Dict[str, HedgePolicy] = {}
+
+
+def hedge_policy_for(source: str) -> HedgePolicy:
+    """Get the process-wide hedge policy for a data source"""
+    if source not in _policies:
+        _policies[source] = HedgePolicy(source)
+    return _policies[source]
@@ -0,0 +1,198 @@
+"""
+Shared HTTP client for data collectors
+One tuned aiohttp connection pool reused by every collector
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+import aiohttp
+from loguru import logger
+
+from config.settings import settings
+
+
+class HttpClient:
+    """
+    Pooled aiohttp session shared across collectors
+    
+    The connector caps total and per-host connections, caches DNS lookups
+    and keeps idle connections alive, so concurrent markets reuse sockets
+    (and their TLS sessions) instead of opening new ones per request.
+    Collectors pass their own headers with each request rather than owning
+    a session.
+    
+    The session is created lazily on first use, and again if the running
+    event loop changes; the previous loop's session is closed first so its
+    pooled connections aren't leaked.
+    """
+    
+    def __init__(
+        self,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        dns_cache_ttl: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+        request_timeout: Optional[float] = None
+    ):
+        self.name = "HttpClient"
+        self.limit = limit if limit is not None else settings.http_pool_limit
+        self.limit_per_host = (
+            limit_per_host if limit_per_host is not None else settings.http_pool_limit_per_host
+        )
+        self.dns_cache_ttl = (
+            dns_cache_ttl if dns_cache_ttl is not None else settings.http_dns_cache_ttl_seconds
+        )
+        self.keepalive_timeout = (
+            keepalive_timeout if keepalive_timeout is not None else settings.http_keepalive_seconds
+        )
+        self.request_timeout = (
+            request_timeout if request_timeout is not None else settings.http_request_timeout_seconds
+        )
+        
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # Metrics
+        self.request_count = 0
+        self.error_count = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.waiting = 0
+        self.max_waiting = 0
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            await self._close_stale_session()
+            self._connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=self._connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                trace_configs=[self._trace_config()]
+            )
+            self._loop = loop
+            logger.debug(
+                f"HTTP pool created (limit {self.limit}, {self.limit_per_host} per host)"
+            )
+        return self._session
+    
+    @asynccontextmanager
+    async def stream(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        GET a URL and hand back the response before its body is read
+        
+        The caller reads the body incrementally (e.g. from
+        ``response.content.iter_chunked``) inside the ``async with`` block;
+        the connection returns to the pool when the block exits.
+        
+        Args:
+            url: Request URL
+            params: Query parameters
+            headers: Per-request headers (e.g. a collector's API key)
+            
+        Yields:
+            The open aiohttp response (status 304 responses are yielded, not raised)
+            
+        Raises:
+            aiohttp.ClientError: On connection errors or 4xx/5xx responses
+        """
+        session = await self.get_session()
+        self.request_count += 1
+        
+        try:
+            async with session.get(url, params=params, headers=headers) as response:
+                response.raise_for_status()
+                yield response
+        except Exception:
+            self.error_count += 1
+            raise
+    
+    async def _close_stale_session(self):
+        """Close a session left behind by a previous event loop"""
+        session = self._session
+        self._session = None
+        self._connector = None
+        if session is None or session.closed:
+            return
+        try:
+            await session.close()
+            logger.debug("Closed HTTP pool of a previous event loop")
+        except Exception as e:
+            # The old loop may already be closed; the session is dropped either way
+            logger.debug(f"Could not close HTTP pool of a previous event loop: {e}")
+    
+    async def close(self):
+        """Close the session and all pooled connections"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.info("HTTP connection pool closed")
+        self._session = None
+        self._connector = None
+    
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """Hook connection events to track reuse and pool waits"""
+        trace = aiohttp.TraceConfig()
+        
+        async def on_queued_start(session, context, params):
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        
+        async def on_queued_end(session, context, params):
+            self.waiting -= 1
+        
+        async def on_create_end(session, context, params):
+            self.connections_created += 1
+        
+        async def on_reuse(session, context, params):
+            self.connections_reused += 1
+        
+        trace.on_connection_queued_start.append(on_queued_start)
+        trace.on_connection_queued_end.append(on_queued_end)
+        trace.on_connection_create_end.append(on_create_end)
+        trace.on_connection_reuseconn.append(on_reuse)
+        return trace
+    
+    def get_stats(self) -> dict:
+        """Get connection pool statistics"""
+        idle = in_use = 0
+        if self._connector is not None and not self._connector.closed:
+            # aiohttp doesn't expose pool occupancy publicly
+            idle = sum(len(conns) for conns in getattr(self._connector, "_conns", {}).values())
+            in_use = len(getattr(self._connector, "_acquired", ()))
+        
+        connections = self.connections_created + self.connections_reused
+        return {
+            "requests": self.request_count,
+            "errors": self.error_count,
+            "open": idle + in_use,
+            "idle": idle,
+            "in_use": in_use,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "connections_created": self.connections_created,
+            "reuse_rate": round(self.connections_reused / connections, 2) if connections else 0.0
+        }
+
+
+_shared_client: Optional[HttpClient] = None
+
+
+def shared_http_client() -> HttpClient:
+    """Get the process-wide HTTP client used by collectors by default"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = HttpClient()
+    return _shared_client
@@ -0,0 +1,140 @@
+"""
+Streaming JSON decoding for data collectors
+Decodes the listing array of a search response one element at a time
+"""
+import codecs
+import json
+from typing import Any, AsyncIterable, Callable, Dict
+
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class _StreamReader:
+    """
+    Text cursor over an async stream of UTF-8 byte chunks
+    
+    Only the unparsed tail of the input is kept in the buffer; consumed
+    text is dropped each time a new chunk is appended.
+    """
+    
+    def __init__(self, chunks: AsyncIterable[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+    
+    async def _fill(self) -> bool:
+        """Append the next chunk to the buffer (False once input is exhausted)"""
+        if self.eof:
+            return False
+        
+        try:
+            text = self._utf8.decode(await self._chunks.__anext__())
+        except StopAsyncIteration:
+            self.eof = True
+            text = self._utf8.decode(b"", final=True)
+        
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
+    
+    async def peek(self) -> str:
+        """Next non-whitespace character, or "" at end of input"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not await self._fill():
+                return ""
+    
+    async def expect(self, allowed: str) -> str:
+        """Consume the next character, which must be one of ``allowed``"""
+        char = await self.peek()
+        if not char or char not in allowed:
+            raise ValueError(f"Expected one of {allowed!r} in JSON stream, got {char or 'end'!r}")
+        self.pos += 1
+        return char
+    
+    async def value(self) -> Any:
+        """Decode the next complete JSON value"""
+        await self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Most likely the value continues in the next chunk
+                if not await self._fill():
+                    raise
+                continue
+            
+            # A number or literal ending exactly at the buffer's end may be cut off
+            if end == len(self.buffer) and await self._fill():
+                continue
+            
+            self.pos = end
+            return value
+
+
+async def stream_json_items(
+    chunks: AsyncIterable[bytes],
+    array_key: str,
+    on_item: Callable[[Any], None]
+) -> Dict[str, Any]:
+    """
+    Decode a JSON response incrementally, handing array elements to a callback
+    
+    The response is either an object whose ``array_key`` field holds the
+    items (e.g. ``{"total": 5120, "homes": [...]}``) or a bare array of items.
+    Each item is decoded and passed to ``on_item`` as soon as it is complete,
+    so only one item is held in decoded form at a time.
+    
+    Args:
+        chunks: Response body as an async stream of byte chunks
+        array_key: Field of the top-level object that holds the items
+        on_item: Called with each decoded item, in order
+        
+    Returns:
+        The other top-level fields of the object (empty for a bare array)
+        
+    Raises:
+        ValueError: If the body isn't valid JSON of the expected shape
+    """
+    reader = _StreamReader(chunks)
+    fields: Dict[str, Any] = {}
+    
+    async def read_array():
+        await reader.expect("[")
+        if await reader.peek() == "]":
+            reader.pos += 1
+            return
+        while True:
+            on_item(await reader.value())
+            if await reader.expect(",]") == "]":
+                return
+    
+    if await reader.peek() == "[":
+        await read_array()
+        return fields
+    
+    await reader.expect("{")
+    if await reader.peek() == "}":
+        reader.pos += 1
+        return fields
+    
+    while True:
+        key = await reader.value()
+        if not isinstance(key, str):
+            raise ValueError(f"Invalid JSON object key: {key!r}")
+        await reader.expect(":")
+        
+        if key == array_key and await reader.peek() == "[":
+            await read_array()
+        else:
+            fields[key] = await reader.value()
+        
+        if await reader.expect(",}") == "}":
+            return fields
@@ -0,0 +1,149 @@
+"""
+Last-good collector results for stale-while-revalidate
+Keeps each source's latest successful MarketData per market
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+from loguru import logger
+
+from .tiling import market_key
+from ..models import MarketData
+from config.settings import settings
+
+
+class LastGoodStore:
+    """
+    Latest successful collection per source and market
+    
+    When a collection fails or misses its deadline, the collector serves the
+    stored copy marked ``is_stale`` instead of dropping the source, as long
+    as it is no older than ``max_age_seconds``. A collection that merely ran
+    late keeps going in the background and replaces the stored copy when it
+    finishes, so the next cycle sees fresh data.
+    """
+    
+    def __init__(self, max_age_seconds: Optional[float] = None):
+        self.name = "LastGoodStore"
+        self.max_age_seconds = (
+            max_age_seconds if max_age_seconds is not None else settings.stale_max_age_seconds
+        )
+        self._entries: Dict[Tuple[str, str], MarketData] = {}
+        self._refreshing: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        
+        # Metrics
+        self.stored_count = 0
+        self.served_count = 0
+        self.expired_count = 0
+        self.refresh_count = 0
+        self.refresh_failures = 0
+    
+    @staticmethod
+    def age_seconds(data: MarketData) -> float:
+        """Seconds since the data was collected"""
+        return max(0.0, (datetime.utcnow() - data.timestamp).total_seconds())
+    
+    def put(self, source: str, market: str, data: MarketData):
+        """Remember a successful collection"""
+        if data.is_stale:
+            return
+        self._entries[(source, market_key(market))] = data
+        self.stored_count += 1
+    
+    def get(self, source: str, market: str) -> Optional[MarketData]:
+        """
+        Get the last good data for a source and market
+        
+        Returns:
+            A copy marked ``is_stale``, or None if there is nothing stored
+            or it is older than max_age_seconds
+        """
+        data = self._entries.get((source, market_key(market)))
+        if data is None:
+            return None
+        
+        if self.age_seconds(data) > self.max_age_seconds:
+            self.expired_count += 1
+            return None
+        
+        self.served_count += 1
+        return data.model_copy(update={'is_stale': True})
+    
+    def refresh_in_background(
+        self,
+        source: str,
+        market: str,
+        collection: "asyncio.Future[MarketData]",
+        timeout: Optional[float] = None
+    ):
+        """
+        Let a late collection finish and store its result
+        
+        Args:
+            source: Collector name
+            market: Market the collection is for
+            collection: The still-running collection
+            timeout: Extra time the collection gets before it is cancelled
+        """
+        key = (source, market_key(market))
+        if key in self._refreshing:
+            # One background refresh per source and market is enough
+            collection.cancel()
+            return
+        
+        timeout = timeout if timeout is not None else settings.collector_timeout_seconds
+        
+        async def finish():
+            try:
+                data = await asyncio.wait_for(collection, timeout)
+            except Exception as e:
+                self.refresh_failures += 1
+                logger.debug(f"Background refresh of {source} for {market} failed: {e}")
+                return
+            finally:
+                self._refreshing.pop(key, None)
+            
+            self.refresh_count += 1
+            self.put(source, market, data)
+            logger.info(f"Background refresh of {source} for {market} finished")
+        
+        task = asyncio.ensure_future(finish())
+        self._refreshing[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    @property
+    def refreshing(self) -> int:
+        """Background refreshes still running"""
+        return len(self._refreshing)
+    
+    async def close(self):
+        """Cancel background refreshes"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def get_stats(self) -> dict:
+        """Get stale-while-revalidate statistics"""
+        return {
+            "entries": len(self._entries),
+            "stored": self.stored_count,
+            "served_stale": self.served_count,
+            "expired": self.expired_count,
+            "refreshing": self.refreshing,
+            "refreshed": self.refresh_count,
+            "refresh_failures": self.refresh_failures
+        }
+
+
+_shared_store: Optional[LastGoodStore] = None
+
+
+def shared_last_good() -> LastGoodStore:
+    """Get the process-wide last-good store used by collectors by default"""
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = LastGoodStore()
+    return _shared_store
@@ -0,0 +1,401 @@
+"""
+MLS data collector
+Syncs listings from a RESO Web API (OData) feed into a local store
+"""
+import asyncio
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+from .base import BaseCollector, CollectorError
+from .tiling import AGENT_ROOT, market_key
+from ..listings import ListingTable
+from ..models import MarketData
+from config.settings import settings
+
+
+ACTIVE_STATUSES = ("Active",)
+PENDING_STATUSES = ("Pending", "Active Under Contract")
+SOLD_STATUSES = ("Closed",)
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse a RESO timestamp (ISO 8601, usually UTC with a Z suffix)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class MlsListingStore:
+    """
+    Local SQLite copy of each market's MLS listings
+    
+    Listings are upserted by ListingKey as changes arrive, so the store
+    always holds the latest version of every listing seen. Each market also
+    keeps a high-water mark: the newest ModificationTimestamp it has synced.
+    SQLite calls run in a worker thread, one at a time.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.name = "MlsListingStore"
+        location = Path(path if path is not None else settings.mls_store_path)
+        self.path = location if location.is_absolute() else AGENT_ROOT / location
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = asyncio.Lock()
+        self.upserted_count = 0
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create its tables on first use"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS mls_listings (
+                    market TEXT NOT NULL,
+                    listing_key TEXT NOT NULL,
+                    status TEXT,
+                    close_date TEXT,
+                    modified TEXT,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (market, listing_key)
+                );
+                
+                CREATE INDEX IF NOT EXISTS idx_mls_listings_status
+                    ON mls_listings(market, status);
+                    
+                CREATE TABLE IF NOT EXISTS mls_sync_state (
+                    market TEXT PRIMARY KEY,
+                    high_water TEXT,
+                    synced_at TEXT
+                );
+            """)
+        return self._conn
+    
+    async def _run(self, func, *args):
+        """Run a blocking database call off the event loop"""
+        async with self._lock:
+            return await asyncio.to_thread(func, *args)
+    
+    async def high_water(self, market: str) -> Optional[str]:
+        """Newest ModificationTimestamp synced for a market (None before the first load)"""
+        def query():
+            row = self._connect().execute(
+                "SELECT high_water FROM mls_sync_state WHERE market = ?", (market_key(market),)
+            ).fetchone()
+            return row[0] if row else None
+        
+        return await self._run(query)
+    
+    async def upsert(self, market: str, listings: List[Dict[str, Any]]):
+        """Insert new listings and replace changed ones"""
+        rows = [
+            (
+                market_key(market),
+                str(listing['id']),
+                listing.get('status'),
+                listing.get('close_date'),
+                listing.get('modified'),
+                json.dumps(listing)
+            )
+            for listing in listings
+            if listing.get('id') is not None
+        ]
+        if not rows:
+            return
+        
+        def write():
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    """
+                    INSERT INTO mls_listings (market, listing_key, status, close_date, modified, data)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (market, listing_key) DO UPDATE SET
+                        status = excluded.status,
+                        close_date = excluded.close_date,
+                        modified = excluded.modified,
+                        data = excluded.data
+                    """,
+                    rows
+                )
+        
+        await self._run(write)
+        self.upserted_count += len(rows)
+    
+    async def set_high_water(self, market: str, high_water: str):
+        """Record the newest ModificationTimestamp stored for a market"""
+        def write():
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    """
+                    INSERT INTO mls_sync_state (market, high_water, synced_at)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (market) DO UPDATE SET
+                        high_water = excluded.high_water,
+                        synced_at = excluded.synced_at
+                    """,
+                    (market_key(market), high_water, datetime.utcnow().isoformat())
+                )
+        
+        await self._run(write)
+    
+    async def listings(
+        self,
+        market: str,
+        statuses: Tuple[str, ...],
+        closed_since: Optional[datetime] = None
+    ) -> ListingTable:
+        """
+        Stored listings of a market with the given statuses
+        
+        Args:
+            market: Market name
+            statuses: RESO StandardStatus values to include
+            closed_since: Only include listings that closed on or after this date
+        """
+        sql = (
+            "SELECT data FROM mls_listings WHERE market = ? "
+            f"AND status IN ({', '.join('?' * len(statuses))})"
+        )
+        args: List[Any] = [market_key(market), *statuses]
+        if closed_since is not None:
+            sql += " AND close_date >= ?"
+            args.append(closed_since.date().isoformat())
+        
+        def query():
+            return ListingTable.from_records(
+                json.loads(row[0]) for row in self._connect().execute(sql, args)
+            )
+        
+        return await self._run(query)
+    
+    async def close(self):
+        """Close the database"""
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+
+
+class MlsCollector(BaseCollector):
+    """
+    Collect inventory from an MLS through its RESO Web API
+    
+    The first run for a market downloads every listing; later runs request
+    only listings whose ModificationTimestamp is at or after the market's
+    high-water mark and update the local store in place. Active, pending
+    and recently sold listings are then read from the store.
+    """
+    
+    page_size = 1000
+    
+    def __init__(self, store: Optional[MlsListingStore] = None, **kwargs):
+        super().__init__("mls", **kwargs)
+        self.api_key = settings.mls_api_key
+        self.base_url = settings.mls_api_url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        self.store = store or MlsListingStore()
+        
+        # Delta queries change every run, so caching them would only delay updates
+        self.cache = None
+        
+        self.full_loads = 0
+        self.delta_syncs = 0
+        self.records_synced = 0
+    
+    async def collect(self, market: str) -> MarketData:
+        """
+        Sync and collect MLS data for a market
+        
+        Args:
+            market: Market name (e.g., "Austin, TX")
+            
+        Returns:
+            MarketData with listings and statistics from the local store
+        """
+        if not self.base_url:
+            raise CollectorError("MLS API URL not configured")
+        
+        try:
+            city, state = self._parse_market(market)
+            await self._sync(market, city, state)
+            
+            closed_since = datetime.utcnow() - timedelta(days=30)
+            active, pending, sold = await asyncio.gather(
+                self.store.listings(market, ACTIVE_STATUSES),
+                self.store.listings(market, PENDING_STATUSES),
+                self.store.listings(market, SOLD_STATUSES, closed_since=closed_since)
+            )
+            
+            return MarketData(
+                source=self.name,
+                market=market,
+                active_listings=active,
+                pending_listings=pending,
+                sold_listings=sold,
+                total_active=len(active),
+                total_pending=len(pending),
+                total_sold_30d=len(sold),
+                median_list_price=self._calculate_median_price(active, 'list_price'),
+                median_sold_price=self._calculate_median_price(sold, 'sold_price'),
+                completeness=self._assess_completeness(active, pending, sold),
+                is_stale=False
+            )
+        
+        except CollectorError:
+            raise
+        except Exception as e:
+            raise CollectorError(f"MLS collection failed: {str(e)}")
+    
+    async def _sync(self, market: str, city: str, state: str) -> int:
+        """
+        Pull listings changed since the market's high-water mark
+        
+        Pages are followed through ``@odata.nextLink`` and written to the
+        store as they arrive. Results are ordered by ModificationTimestamp,
+        so the mark advances after each stored page: a sync interrupted
+        part way (e.g. a large initial load cut off by the collector
+        timeout) resumes from the last page it stored instead of starting
+        over.
+        
+        Returns:
+            Number of listings received
+        """
+        high_water = await self.store.high_water(market)
+        
+        query = f"City eq '{self._quote(city)}' and StateOrProvince eq '{self._quote(state)}'"
+        if high_water:
+            # "ge" re-reads the boundary records, so changes stamped with the
+            # same timestamp as the mark aren't missed
+            query += f" and ModificationTimestamp ge {high_water}"
+        
+        url: Optional[str] = f"{self.base_url}/Property"
+        params: Optional[Dict[str, Any]] = {
+            "$filter": query,
+            "$orderby": "ModificationTimestamp",
+            "$top": self.page_size
+        }
+        
+        received = 0
+        newest = parse_timestamp(high_water)
+        while url:
+            page = await self._request_page(url, params, 'value', self._normalize_listings)
+            listings = page.listings.to_records()
+            await self.store.upsert(market, listings)
+            received += len(listings)
+            
+            page_newest = newest
+            for listing in listings:
+                modified = parse_timestamp(listing.get('modified'))
+                if modified is not None and (page_newest is None or modified > page_newest):
+                    page_newest = modified
+            
+            if page_newest is not None and page_newest != newest:
+                newest = page_newest
+                mark = newest.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+                await self.store.set_high_water(market, mark)
+            
+            url = page.fields.get("@odata.nextLink")
+            params = None
+        
+        if high_water:
+            self.delta_syncs += 1
+        else:
+            self.full_loads += 1
+        self.records_synced += received
+        
+        logger.info(
+            f"{self.name}: {'delta' if high_water else 'full'} sync for {market} "
+            f"received {received} listings"
+        )
+        return received
+    
+    @staticmethod
+    def _quote(value: str) -> str:
+        """Escape a value for an OData string literal"""
+        return value.replace("'", "''")
+    
+    def _normalize_listings(self, listings: List[Dict]) -> List[Dict[str, Any]]:
+        """Normalize RESO Property records to standard format"""
+        normalized = []
+        
+        for listing in listings:
+            try:
+                normalized.append({
+                    'id': listing.get('ListingKey'),
+                    'address': listing.get('UnparsedAddress'),
+                    'city': listing.get('City'),
+                    'state': listing.get('StateOrProvince'),
+                    'zip': listing.get('PostalCode'),
+                    'list_price': listing.get('ListPrice'),
+                    'sold_price': listing.get('ClosePrice'),
+                    'beds': listing.get('BedroomsTotal'),
+                    'baths': listing.get('BathroomsTotalInteger'),
+                    'sqft': listing.get('LivingArea'),
+                    'lot_size': listing.get('LotSizeSquareFeet'),
+                    'property_type': listing.get('PropertySubType') or listing.get('PropertyType'),
+                    'year_built': listing.get('YearBuilt'),
+                    'days_on_market': listing.get('DaysOnMarket'),
+                    'list_date': listing.get('ListingContractDate'),
+                    'close_date': listing.get('CloseDate'),
+                    'status': listing.get('StandardStatus'),
+                    'modified': listing.get('ModificationTimestamp'),
+                    'lat': listing.get('Latitude'),
+                    'lng': listing.get('Longitude'),
+                    'source': 'mls'
+                })
+            except Exception as e:
+                logger.debug(f"Failed to normalize MLS listing: {e}")
+                continue
+        
+        return normalized
+    
+    def _parse_market(self, market: str) -> tuple[str, str]:
+        """Parse market string"""
+        parts = market.strip().split(',')
+        if len(parts) != 2:
+            raise ValueError(f"Invalid market format: {market}")
+        return parts[0].strip(), parts[1].strip()
+    
+    def _calculate_median_price(self, listings: ListingTable, price_field: str) -> Optional[float]:
+        """Calculate median price"""
+        return listings.median(price_field)
+    
+    def _assess_completeness(
+        self,
+        active: ListingTable,
+        pending: ListingTable,
+        sold: ListingTable
+    ) -> float:
+        """Assess data quality"""
+        total = len(active) + len(pending) + len(sold)
+        if total == 0:
+            return 0.0
+        
+        required = ['id', 'list_price', 'beds', 'baths', 'sqft']
+        complete = sum(table.count_complete(required) for table in (active, pending, sold))
+        
+        return complete / total
+    
+    async def close(self):
+        """Close the local listing store"""
+        await self.store.close()
+    
+    def get_stats(self) -> dict:
+        """Get collector statistics"""
+        stats = super().get_stats()
+        stats.update({
+            "full_loads": self.full_loads,
+            "delta_syncs": self.delta_syncs,
+            "records_synced": self.records_synced
+        })
+        return stats
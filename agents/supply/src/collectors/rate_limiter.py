@@ -0,0 +1,154 @@
+"""
+Adaptive rate limiting for data collectors
+Token bucket per data source that backs off when the API throttles us
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from loguru import logger
+
+from config.settings import settings
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket limiting requests to one data source
+    
+    Tokens refill at the current rate, up to ``burst`` tokens. The rate
+    starts at the configured ceiling (the API quota). When the source answers
+    429, the rate is halved and requests pause for its Retry-After; each
+    successful request afterwards adds back a slice of the ceiling until the
+    full quota is reached again (additive increase, multiplicative decrease).
+    
+    Waiters are served in arrival order.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        rate_per_minute: Optional[float] = None,
+        burst: Optional[int] = None,
+        min_rate_fraction: float = 0.1,
+        recovery_steps: int = 20
+    ):
+        self.name = name
+        self.ceiling = float(
+            rate_per_minute if rate_per_minute is not None else settings.api_rate_limit_per_minute
+        )
+        if self.ceiling <= 0:
+            raise ValueError(f"Rate limit for {name} must be positive")
+        
+        self.burst = max(1, burst if burst is not None else settings.api_rate_limit_burst)
+        self.min_rate = self.ceiling * min_rate_fraction
+        self.recovery_step = self.ceiling / max(1, recovery_steps)
+        self.rate = self.ceiling
+        
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        
+        # Metrics
+        self.acquired_count = 0
+        self.throttled_count = 0
+        self.total_wait_seconds = 0.0
+    
+    async def acquire(self):
+        """Wait until a request to the source is allowed"""
+        started = time.monotonic()
+        
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                
+                await asyncio.sleep((1 - self._tokens) * 60 / self.rate)
+        
+        self.acquired_count += 1
+        self.total_wait_seconds += time.monotonic() - started
+    
+    def on_success(self):
+        """Ramp the rate back towards the ceiling after a throttle"""
+        if self.rate < self.ceiling:
+            self._refill(time.monotonic())
+            self.rate = min(self.ceiling, self.rate + self.recovery_step)
+    
+    def on_throttled(self, retry_after: Optional[float] = None):
+        """
+        Back off after the source rejected a request for exceeding its quota
+        
+        Args:
+            retry_after: Seconds the source asked us to wait, if given
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.throttled_count += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = 0.0
+        
+        pause = retry_after if retry_after is not None else 60 / self.rate
+        self._paused_until = max(self._paused_until, now + pause)
+        
+        logger.warning(
+            f"{self.name} throttled, pausing {pause:.1f}s and slowing to "
+            f"{self.rate:.0f} requests/minute"
+        )
+    
+    def _refill(self, now: float):
+        """Add the tokens earned since the last update"""
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate / 60)
+        self._updated = now
+    
+    def get_stats(self) -> dict:
+        """Get rate limiter statistics"""
+        return {
+            "rate_per_minute": round(self.rate, 1),
+            "ceiling_per_minute": self.ceiling,
+            "requests": self.acquired_count,
+            "throttled": self.throttled_count,
+            "total_wait_seconds": round(self.total_wait_seconds, 1)
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header (delay in seconds or an HTTP date)
+    
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+
+
+def rate_limiter_for(source: str) -> AdaptiveRateLimiter:
+    """Get the process-wide rate limiter for a data source"""
+    if source not in _limiters:
+        _limiters[source] = AdaptiveRateLimiter(source)
+    return _limiters[source]
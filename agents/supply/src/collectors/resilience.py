@@ -0,0 +1,197 @@
+"""
+Retry and circuit breaking for data collectors
+Retries transient request failures and stops calling sources that keep failing
+"""
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+import aiohttp
+from loguru import logger
+
+from config.settings import settings
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a source whose circuit is open"""
+    pass
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether a request failure is worth retrying
+    
+    Connection problems, timeouts, 429 and 5xx responses are transient;
+    other HTTP errors (bad key, bad request) and bad payloads are not.
+    """
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+class RetryPolicy:
+    """
+    Retry transient failures with jittered exponential backoff
+    
+    The delay before retry ``n`` is drawn uniformly from
+    ``[0, min(max_delay, base_delay * backoff_factor ** n)]`` ("full jitter"),
+    so replicas and markets that failed together don't retry in lockstep.
+    """
+    
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        backoff_factor: Optional[float] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None
+    ):
+        self.max_retries = max_retries if max_retries is not None else settings.max_retries
+        self.backoff_factor = (
+            backoff_factor if backoff_factor is not None else settings.retry_backoff_factor
+        )
+        self.base_delay = base_delay if base_delay is not None else settings.retry_base_delay_seconds
+        self.max_delay = max_delay if max_delay is not None else settings.retry_max_delay_seconds
+        self.retry_count = 0
+    
+    def backoff(self, attempt: int) -> float:
+        """Jittered delay in seconds before retry number ``attempt`` (0-based)"""
+        ceiling = min(self.max_delay, self.base_delay * self.backoff_factor ** attempt)
+        return random.uniform(0, ceiling)
+    
+    async def run(self, func: Callable[[], Awaitable[Any]], description: str = "request") -> Any:
+        """
+        Call ``func`` until it succeeds, fails permanently or retries run out
+        
+        Args:
+            func: Zero-argument coroutine function making one attempt
+            description: What is being attempted, for logging
+            
+        Returns:
+            The first successful result
+        """
+        attempt = 0
+        while True:
+            try:
+                return await func()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient(e):
+                    raise
+                
+                delay = self.backoff(attempt)
+                attempt += 1
+                self.retry_count += 1
+                logger.warning(
+                    f"{description} failed ({type(e).__name__}: {e}), "
+                    f"retry {attempt}/{self.max_retries} "
+                    f"in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Per-source circuit breaker
+    
+    After ``failure_threshold`` consecutive failed requests the circuit
+    opens and requests fail immediately for ``reset_seconds``. Then a single
+    trial request is let through (half-open): success closes the circuit,
+    failure opens it for another cool-down.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Optional[int] = None,
+        reset_seconds: Optional[float] = None
+    ):
+        self.name = name
+        self.failure_threshold = max(1, (
+            failure_threshold
+            if failure_threshold is not None
+            else settings.circuit_breaker_failure_threshold
+        ))
+        self.reset_seconds = (
+            reset_seconds if reset_seconds is not None else settings.circuit_breaker_reset_seconds
+        )
+        
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        
+        # Metrics
+        self.open_count = 0
+        self.rejected_count = 0
+    
+    def before_request(self):
+        """
+        Check that a request may be made
+        
+        Raises:
+            CircuitOpenError: If the source is cooling down
+        """
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0:
+                self.rejected_count += 1
+                raise CircuitOpenError(
+                    f"{self.name} circuit open after repeated failures, "
+                    f"retrying in {remaining:.0f}s"
+                )
+            self.state = self.HALF_OPEN
+        
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                self.rejected_count += 1
+                raise CircuitOpenError(f"{self.name} circuit half-open, trial request in flight")
+            self._trial_in_flight = True
+    
+    def release(self):
+        """Forget a request that was abandoned without an outcome (e.g. cancelled)"""
+        self._trial_in_flight = False
+    
+    def record_success(self):
+        """Record a successful request"""
+        if self.state != self.CLOSED:
+            logger.info(f"{self.name} circuit closed, source recovered")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+    
+    def record_failure(self):
+        """Record a request that failed after its retries"""
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.open_count += 1
+                logger.error(
+                    f"{self.name} circuit opened after {self.consecutive_failures} failures, "
+                    f"pausing requests for {self.reset_seconds}s"
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+    
+    def get_stats(self) -> dict:
+        """Get circuit breaker statistics"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.open_count,
+            "rejected": self.rejected_count
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def circuit_breaker_for(source: str) -> CircuitBreaker:
+    """Get the process-wide circuit breaker for a data source"""
+    if source not in _breakers:
+        _breakers[source] = CircuitBreaker(source)
+    return _breakers[source]
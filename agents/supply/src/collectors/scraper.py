@@ -0,0 +1,453 @@
+"""
+Web scraping collector for data sources
+Headless-browser fallback with a warm pool of browser contexts
+"""
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import numpy as np
+from loguru import logger
+
+from .base import BaseCollector, CollectorError
+from .rate_limiter import parse_retry_after
+from ..listings import ListingTable
+from ..models import MarketData
+from config.settings import settings
+
+
+# Resource types that search pages don't need; blocking them speeds up loads
+BLOCKED_RESOURCES = {"image", "media", "font"}
+
+# Zillow embeds the search results as JSON for client-side hydration
+NEXT_DATA_SCRIPT = (
+    "() => { const el = document.getElementById('__NEXT_DATA__'); "
+    "return el ? el.textContent : null; }"
+)
+
+
+async def _read_text(chunks: AsyncIterator[bytes]) -> str:
+    """Read an archived page's embedded data back as text"""
+    return b"".join([chunk async for chunk in chunks]).decode()
+
+
+class DomainThrottle:
+    """
+    Minimum spacing between page loads to the same domain
+    
+    Each load reserves the next free slot for its domain, so concurrent
+    scrapes of one site are spaced ``delay_seconds`` apart while different
+    sites don't wait on each other.
+    """
+    
+    def __init__(self, delay_seconds: Optional[float] = None):
+        self.name = "DomainThrottle"
+        self.delay = delay_seconds if delay_seconds is not None else settings.scraping_delay_seconds
+        self._next_slot: Dict[str, float] = {}
+        self.waited_seconds = 0.0
+    
+    async def wait(self, url: str):
+        """Wait for the URL's domain to be free"""
+        domain = urlsplit(url).hostname or ""
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(domain, now))
+        self._next_slot[domain] = slot + self.delay
+        
+        if slot > now:
+            self.waited_seconds += slot - now
+            await asyncio.sleep(slot - now)
+
+
+class BrowserPool:
+    """
+    Warm pool of browser contexts shared by scraping requests
+    
+    The browser is launched once, on first use, along with ``size``
+    contexts. Each page borrows a context, so at most ``size`` pages load at
+    once, and returns it afterwards; pages are closed but contexts (and
+    their cookies and HTTP cache) are kept. A context that fails mid-page is
+    replaced with a fresh one.
+    
+    Playwright is imported lazily so the agent runs without it when
+    scraping isn't used.
+    """
+    
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        headless: Optional[bool] = None,
+        browser: Optional[Any] = None
+    ):
+        self.name = "BrowserPool"
+        self.size = max(1, size if size is not None else settings.scraping_concurrency)
+        self.headless = headless if headless is not None else settings.scraping_headless
+        self._browser = browser
+        self._owns_browser = browser is None
+        self._playwright = None
+        self._contexts: Optional[asyncio.Queue] = None
+        self._start_lock = asyncio.Lock()
+        
+        # Metrics
+        self.contexts_created = 0
+        self.contexts_replaced = 0
+        self.pages_opened = 0
+    
+    async def _start(self):
+        """Launch the browser and fill the pool on first use"""
+        async with self._start_lock:
+            if self._contexts is not None:
+                return
+            
+            if self._browser is None:
+                try:
+                    from playwright.async_api import async_playwright
+                except ImportError as e:
+                    raise CollectorError(
+                        "Web scraping requires playwright "
+                        "(pip install playwright && playwright install chromium)"
+                    ) from e
+                
+                started = time.time()
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+                logger.info(f"Browser launched in {int((time.time() - started) * 1000)}ms")
+            
+            contexts: asyncio.Queue = asyncio.Queue()
+            for _ in range(self.size):
+                contexts.put_nowait(await self._new_context())
+            self._contexts = contexts
+    
+    async def _new_context(self) -> Any:
+        """Create a browser context that skips heavy resources"""
+        context = await self._browser.new_context()
+        await context.route("**/*", self._route)
+        self.contexts_created += 1
+        return context
+    
+    @staticmethod
+    async def _route(route):
+        """Abort requests for resources the scraper doesn't need"""
+        if route.request.resource_type in BLOCKED_RESOURCES:
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Any]:
+        """
+        Borrow a context from the pool and open a page in it
+        
+        Waits while every context is in use. The page is closed and the
+        context returned to the pool when the block exits.
+        """
+        await self._start()
+        context = await self._contexts.get()
+        healthy = False
+        
+        try:
+            page = await context.new_page()
+            self.pages_opened += 1
+            try:
+                yield page
+            finally:
+                await page.close()
+            healthy = True
+        finally:
+            if not healthy:
+                context = await self._replace(context)
+            self._contexts.put_nowait(context)
+    
+    async def _replace(self, context: Any) -> Any:
+        """Swap a possibly broken context for a new one"""
+        try:
+            await context.close()
+        except Exception:
+            pass
+        
+        try:
+            fresh = await self._new_context()
+        except Exception as e:
+            logger.warning(f"Could not replace browser context: {e}")
+            return context
+        
+        self.contexts_replaced += 1
+        return fresh
+    
+    async def close(self):
+        """Close all contexts and the browser"""
+        if self._contexts is not None:
+            while not self._contexts.empty():
+                context = self._contexts.get_nowait()
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            self._contexts = None
+        
+        if self._owns_browser:
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+            logger.info("Browser pool closed")
+    
+    def get_stats(self) -> dict:
+        """Get browser pool statistics"""
+        return {
+            "size": self.size,
+            "idle": self._contexts.qsize() if self._contexts is not None else 0,
+            "contexts_created": self.contexts_created,
+            "contexts_replaced": self.contexts_replaced,
+            "pages_opened": self.pages_opened
+        }
+
+
+class ScrapingCollector(BaseCollector):
+    """
+    Collect inventory by scraping Zillow search pages
+    
+    Used as a fallback when API collectors fail (e.g. quota exhausted).
+    Search pages are loaded in pooled browser contexts, spaced per domain
+    by scraping_delay_seconds, and the listing data Zillow embeds in each
+    page is read instead of parsing the rendered HTML. Like API requests,
+    page loads wait for the scraper's rate limiter and count towards its
+    circuit breaker.
+    
+    The sold search isn't limited by date, so sold listings are filtered
+    to the last 30 days by their sale date; a sold price is only reported
+    when the page gives one.
+    """
+    
+    base_url = "https://www.zillow.com"
+    
+    def __init__(
+        self,
+        pool: Optional[BrowserPool] = None,
+        throttle: Optional[DomainThrottle] = None,
+        **kwargs
+    ):
+        super().__init__("scraper", **kwargs)
+        self.pool = pool or BrowserPool()
+        self.throttle = throttle or DomainThrottle()
+        self.max_pages = max(1, settings.scraping_max_pages)
+        self.page_timeout = settings.scraping_page_timeout_seconds
+        self.page_count = 0
+    
+    async def collect(self, market: str) -> MarketData:
+        """
+        Scrape listings for a market
+        
+        Args:
+            market: Market name (e.g., "Austin, TX")
+            
+        Returns:
+            MarketData with listings and statistics
+        """
+        try:
+            city, state = self._parse_market(market)
+            slug = f"{city}-{state}".lower().replace(" ", "-")
+            
+            for_sale, sold = await self._gather_all(
+                self._scrape_search(f"{self.base_url}/{slug}"),
+                self._scrape_search(f"{self.base_url}/{slug}/sold")
+            )
+            
+            is_pending = for_sale.isin('status', ('PENDING', 'UNDER_CONTRACT'))
+            active = for_sale.take(~is_pending)
+            pending = for_sale.take(is_pending)
+            sold = self._sold_since(sold, datetime.utcnow() - timedelta(days=30))
+            
+            return MarketData(
+                source=self.name,
+                market=market,
+                active_listings=active,
+                pending_listings=pending,
+                sold_listings=sold,
+                total_active=len(active),
+                total_pending=len(pending),
+                total_sold_30d=len(sold),
+                median_list_price=self._calculate_median_price(active, 'list_price'),
+                median_sold_price=self._calculate_median_price(sold, 'sold_price'),
+                completeness=self._assess_completeness(active, pending, sold),
+                is_stale=False
+            )
+        
+        except CollectorError:
+            raise
+        except Exception as e:
+            raise CollectorError(f"Scraping failed: {str(e)}")
+    
+    @staticmethod
+    def _sold_since(sold: ListingTable, since: datetime) -> ListingTable:
+        """Sold listings that closed on or after a date (undated ones are dropped)"""
+        cutoff = since.date().isoformat()
+        return sold.take(np.array(
+            [date is not None and date >= cutoff for date in sold.column('close_date')],
+            dtype=bool
+        ))
+    
+    async def _scrape_search(self, search_url: str) -> ListingTable:
+        """
+        Scrape every page of a search
+        
+        The first page reports how many pages there are; the rest are loaded
+        concurrently (bounded by the browser pool and the domain throttle).
+        """
+        first, total_pages = await self._scrape_page(f"{search_url}/")
+        pages = min(total_pages, self.max_pages)
+        
+        rest = await self._gather_all(*(
+            self._scrape_page(f"{search_url}/{page}_p/")
+            for page in range(2, pages + 1)
+        ))
+        
+        return ListingTable.concat(
+            ListingTable.from_records(self._normalize_listings(results))
+            for results in [first, *(results for results, _ in rest)]
+        )
+    
+    async def _scrape_page(self, url: str) -> Tuple[List[Dict], int]:
+        """
+        Load one search page and read its embedded results
+        
+        Returns:
+            Tuple of (raw results, total pages reported by the search)
+        """
+        if settings.collector_replay:
+            raw = await self._replay(url, None, _read_text)
+            if not raw:
+                raise CollectorError(f"No search data on {url} (blocked or page layout changed)")
+        else:
+            raw = await self._load_page(url)
+            await self._archive(url, None, raw.encode())
+        
+        state = json.loads(raw).get("props", {}).get("pageProps", {}).get("searchPageState", {})
+        search = state.get("cat1", {})
+        results = search.get("searchResults", {}).get("listResults") or []
+        total_pages = search.get("searchList", {}).get("totalPages") or 1
+        return results, int(total_pages)
+    
+    async def _load_page(self, url: str) -> str:
+        """
+        Load a search page in the browser pool and return its embedded data
+        
+        Raises:
+            CircuitOpenError: If the scraper's circuit is open
+            CollectorError: If the page was throttled, blocked or has no data
+        """
+        self.circuit_breaker.before_request()
+        try:
+            await self.rate_limiter.acquire()
+            await self.throttle.wait(url)
+            
+            async with self.pool.page() as page:
+                response = await page.goto(
+                    url, wait_until="domcontentloaded", timeout=self.page_timeout * 1000
+                )
+                if response is not None and response.status == 429:
+                    self.rate_limiter.on_throttled(parse_retry_after(response.headers.get("retry-after")))
+                    raise CollectorError(f"Throttled loading {url}")
+                raw = await page.evaluate(NEXT_DATA_SCRIPT)
+            self.page_count += 1
+            
+            if not raw:
+                raise CollectorError(f"No search data on {url} (blocked or page layout changed)")
+        except Exception:
+            self.circuit_breaker.record_failure()
+            raise
+        except BaseException:
+            self.circuit_breaker.release()
+            raise
+        
+        self.rate_limiter.on_success()
+        self.circuit_breaker.record_success()
+        return raw
+    
+    def _normalize_listings(self, listings: List[Dict]) -> List[Dict[str, Any]]:
+        """Normalize scraped Zillow search results to standard format"""
+        normalized = []
+        
+        for listing in listings:
+            try:
+                home = (listing.get('hdpData') or {}).get('homeInfo') or {}
+                lat_long = listing.get('latLong') or {}
+                normalized.append({
+                    'id': listing.get('zpid'),
+                    'address': listing.get('addressStreet') or listing.get('address'),
+                    'city': listing.get('addressCity'),
+                    'state': listing.get('addressState'),
+                    'zip': listing.get('addressZipcode'),
+                    'list_price': listing.get('unformattedPrice'),
+                    'sold_price': home.get('soldPrice'),
+                    'beds': listing.get('beds'),
+                    'baths': listing.get('baths'),
+                    'sqft': listing.get('area'),
+                    'lot_size': home.get('lotAreaValue'),
+                    'property_type': home.get('homeType'),
+                    'year_built': home.get('yearBuilt'),
+                    'days_on_market': home.get('daysOnZillow'),
+                    'list_date': None,
+                    'close_date': self._sold_date(home.get('dateSold')),
+                    'status': listing.get('statusType') or home.get('homeStatus'),
+                    'lat': lat_long.get('latitude'),
+                    'lng': lat_long.get('longitude'),
+                    'source': 'zillow_scrape'
+                })
+            except Exception as e:
+                logger.debug(f"Failed to normalize scraped listing: {e}")
+                continue
+        
+        return normalized
+    
+    @staticmethod
+    def _sold_date(value: Any) -> Optional[str]:
+        """ISO date of a sale from Zillow's epoch-millisecond dateSold"""
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return None
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).date().isoformat()
+    
+    def _parse_market(self, market: str) -> tuple[str, str]:
+        """Parse market string"""
+        parts = market.strip().split(',')
+        if len(parts) != 2:
+            raise ValueError(f"Invalid market format: {market}")
+        return parts[0].strip(), parts[1].strip()
+    
+    def _calculate_median_price(self, listings: ListingTable, price_field: str) -> Optional[float]:
+        """Calculate median price"""
+        return listings.median(price_field)
+    
+    def _assess_completeness(
+        self,
+        active: ListingTable,
+        pending: ListingTable,
+        sold: ListingTable
+    ) -> float:
+        """Assess data quality"""
+        total = len(active) + len(pending) + len(sold)
+        if total == 0:
+            return 0.0
+        
+        required = ['id', 'list_price', 'beds', 'baths', 'sqft']
+        complete = sum(table.count_complete(required) for table in (active, pending, sold))
+        
+        return complete / total
+    
+    async def close(self):
+        """Shut down the browser pool"""
+        await self.pool.close()
+    
+    def get_stats(self) -> dict:
+        """Get collector statistics"""
+        stats = super().get_stats()
+        stats.update({
+            "pages_scraped": self.page_count,
+            "throttle_wait_seconds": round(self.throttle.waited_seconds, 1),
+            "browser_pool": self.pool.get_stats()
+        })
+        return stats
@@ -0,0 +1,93 @@
+"""
+Request coalescing for data collectors
+Concurrent identical fetches share one upstream call and its result
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """An in-flight call and the number of callers waiting on it"""
+    
+    __slots__ = ("task", "waiters")
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls by key
+    
+    The first caller for a key starts the call; callers arriving while it is
+    in flight wait for the same result (or exception) instead of starting
+    their own. The result object is shared, so callers must not mutate it.
+    A caller that is cancelled (e.g. by its market's deadline) only stops
+    waiting; the call itself is cancelled once nobody is waiting for it.
+    """
+    
+    def __init__(self):
+        self.name = "SingleFlight"
+        self._calls: Dict[Hashable, _Call] = {}
+        self.call_count = 0
+        self.shared_count = 0
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``func`` unless an identical call is already in flight
+        
+        Args:
+            key: Identity of the call
+            func: Zero-argument coroutine function making the call
+            
+        Returns:
+            The call's result
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._finish(key, call))
+            self.call_count += 1
+        else:
+            self.shared_count += 1
+        
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+    
+    def _finish(self, key: Hashable, call: _Call):
+        """Forget a completed call so the next caller starts a fresh one"""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            call.task.exception()  # Mark retrieved; waiters have already seen it
+    
+    @property
+    def in_flight(self) -> int:
+        """Calls currently running"""
+        return len(self._calls)
+    
+    def get_stats(self) -> dict:
+        """Get coalescing statistics"""
+        return {
+            "calls": self.call_count,
+            "coalesced": self.shared_count,
+            "in_flight": self.in_flight
+        }
+
+
+_shared_single_flight: Optional[SingleFlight] = None
+
+
+def shared_single_flight() -> SingleFlight:
+    """Get the process-wide request coalescer used by collectors"""
+    global _shared_single_flight
+    if _shared_single_flight is None:
+        _shared_single_flight = SingleFlight()
+    return _shared_single_flight
@@ -0,0 +1,222 @@
+"""
+Synthetic market data for data collectors
+Seedable NumPy generator for mock listings and load tests
+"""
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .tiling import market_key, shared_tiler
+from ..listings import ListingTable
+from config.settings import settings
+
+
+# Property mix: type, share, median sqft
+PROPERTY_MIX = (
+    ("single_family", 0.60, 2000),
+    ("condo", 0.20, 1100),
+    ("townhouse", 0.15, 1600),
+    ("multi_family", 0.05, 2800),
+)
+
+# Listings per status before scaling (low, high)
+STATUS_COUNTS = {
+    "active": (800, 1200),
+    "pending": (400, 700),
+    "sold": (600, 900),
+}
+
+# Markets missing from the region table are placed around Austin
+DEFAULT_BBOX = (30.10, -97.94, 30.52, -97.56)
+
+# "Today" for seeded output, so the same seed gives the same dates every day
+SEEDED_REFERENCE_DATE = datetime(2026, 1, 1)
+
+
+class SyntheticMarketGenerator:
+    """
+    Reproducible synthetic listings, generated a column at a time
+    
+    Every (source, market, status) gets its own random stream derived from
+    the seed, so output doesn't depend on the order in which collectors
+    call the generator. Without a seed each call draws fresh entropy.
+    
+    Dates (list date, year built) count back from a reference date. Seeded
+    generators default to the fixed SEEDED_REFERENCE_DATE so their output
+    doesn't change from day to day; unseeded ones use the current time.
+    
+    Distributions:
+    - property type: categorical mix (PROPERTY_MIX)
+    - size: lognormal around the type's median sqft
+    - price: lognormal price per sqft (market level varies by market) x sqft
+    - beds/baths: derived from size with noise
+    - days on market: gamma, shorter for pending and sold listings
+    - location: normal around the market's centre, clipped to its bounding
+      box from the region table
+    - sold price: list price x normal(0.985, 0.02)
+    """
+    
+    def __init__(self, seed: Optional[int] = None, reference_date: Optional[datetime] = None):
+        self.name = "SyntheticMarketGenerator"
+        self.seed = seed
+        self.reference_date = reference_date or (SEEDED_REFERENCE_DATE if seed is not None else None)
+        self.generated_count = 0
+    
+    def _rng(self, source: str, market: str, status: str) -> np.random.Generator:
+        """Random stream for one (source, market, status)"""
+        if self.seed is None:
+            return np.random.default_rng()
+        stream = zlib.crc32(f"{source}|{market_key(market)}|{status}".encode())
+        return np.random.default_rng([self.seed, stream])
+    
+    def _market_profile(self, market: str) -> Tuple[Tuple[float, float, float, float], float, List[str]]:
+        """Bounding box, median price per sqft and ZIP codes for a market"""
+        region = shared_tiler().regions.get(market_key(market)) or {}
+        bbox = tuple(region.get("bbox") or DEFAULT_BBOX)
+        zips = [str(zip_code) for zip_code in region.get("zips") or []]
+        
+        # Stable per-market price level between $180 and $420 per sqft
+        level = zlib.crc32(market_key(market).encode()) % 1000 / 1000
+        return bbox, 180 + 240 * level, zips
+    
+    def count_for(self, status: str, rng: np.random.Generator) -> int:
+        """Listing count for a status, scaled by mock_listings_scale"""
+        low, high = STATUS_COUNTS.get(status, (500, 500))
+        return max(0, int(rng.integers(low, high + 1) * settings.mock_listings_scale))
+    
+    def columns(
+        self,
+        market: str,
+        status: str,
+        count: Optional[int] = None,
+        source: str = "synthetic"
+    ) -> Dict[str, np.ndarray]:
+        """
+        Generate listings as NumPy columns
+        
+        Args:
+            market: Market name (e.g., "Austin, TX")
+            status: "active", "pending" or "sold"
+            count: Number of listings (default: drawn from STATUS_COUNTS)
+            source: Source the listings pretend to come from (separates streams)
+            
+        Returns:
+            Dict of column name to array, all of the same length; ids are
+            listing numbers and list dates are datetime64
+        """
+        rng = self._rng(source, market, status)
+        n = self.count_for(status, rng) if count is None else count
+        bbox, price_per_sqft, zips = self._market_profile(market)
+        
+        names = np.array([name for name, _, _ in PROPERTY_MIX])
+        shares = np.array([share for _, share, _ in PROPERTY_MIX])
+        medians = np.array([median for _, _, median in PROPERTY_MIX], dtype=float)
+        type_codes = rng.choice(len(PROPERTY_MIX), size=n, p=shares / shares.sum())
+        
+        sqft = np.clip(rng.lognormal(np.log(medians[type_codes]), 0.3), 400, 12000).round()
+        list_price = (sqft * rng.lognormal(np.log(price_per_sqft), 0.25, n)).round(-3)
+        beds = np.clip(np.round(sqft / 650 + rng.normal(0, 0.6, n)), 1, 6)
+        baths = np.clip(np.round(beds * 0.75 + rng.normal(0, 0.5, n)), 1, 5)
+        
+        is_condo = names[type_codes] == "condo"
+        lot_size = np.where(is_condo, 0, np.clip(rng.lognormal(np.log(7000), 0.4, n), 1500, 60000)).round()
+        today = (self.reference_date or datetime.utcnow()).replace(microsecond=0)
+        this_year = today.year
+        year_built = np.clip(this_year - rng.gamma(2.0, 15.0, n), 1900, this_year).astype(np.int64)
+        
+        mean_dom = {"active": 45.0, "pending": 25.0, "sold": 30.0}.get(status, 40.0)
+        days_on_market = np.maximum(1, rng.gamma(1.5, mean_dom / 1.5, n)).astype(np.int64)
+        list_date = np.datetime64(today, "s") - days_on_market.astype("timedelta64[D]")
+        
+        min_lat, min_lng, max_lat, max_lng = bbox
+        lat = np.clip(rng.normal((min_lat + max_lat) / 2, (max_lat - min_lat) / 6, n), min_lat, max_lat)
+        lng = np.clip(rng.normal((min_lng + max_lng) / 2, (max_lng - min_lng) / 6, n), min_lng, max_lng)
+        
+        if status == "sold":
+            sold_price = (list_price * rng.normal(0.985, 0.02, n)).round()
+        else:
+            sold_price = np.full(n, np.nan)
+        
+        zip_pool = np.array(zips or ["78701", "78702", "78704", "78745", "78758"])
+        city, state = self._split_market(market)
+        
+        # Ids, addresses and dates stay numeric here; listings() formats them
+        self.generated_count += n
+        return {
+            "id": np.arange(n),
+            "city": np.full(n, city),
+            "state": np.full(n, state),
+            "zip": zip_pool[rng.integers(0, len(zip_pool), n)],
+            "list_price": list_price,
+            "sold_price": sold_price,
+            "beds": beds.astype(np.int64),
+            "baths": baths.astype(np.int64),
+            "sqft": sqft.astype(np.int64),
+            "lot_size": lot_size.astype(np.int64),
+            "property_type": names[type_codes],
+            "year_built": year_built,
+            "days_on_market": days_on_market,
+            "list_date": list_date,
+            "status": np.full(n, status),
+            "lat": lat,
+            "lng": lng,
+            "source": np.full(n, source),
+        }
+    
+    def table(
+        self,
+        market: str,
+        status: str,
+        count: Optional[int] = None,
+        source: str = "synthetic",
+        status_label: Optional[str] = None,
+        id_prefix: Optional[str] = None
+    ) -> ListingTable:
+        """
+        Generate listings as a ListingTable in the standard collector format
+        
+        Args:
+            market: Market name (e.g., "Austin, TX")
+            status: "active", "pending" or "sold"
+            count: Number of listings (default: drawn from STATUS_COUNTS)
+            source: Value of each listing's ``source`` field
+            status_label: Value of each listing's ``status`` field (default: status)
+            id_prefix: Prefix of listing ids (default: "<source>_<status>_")
+        """
+        columns = self.columns(market, status, count, source)
+        numbers = columns["id"].astype(np.bytes_)
+        prefix = f"{source}_{status}_" if id_prefix is None else id_prefix
+        columns["id"] = np.char.add(prefix.encode(), numbers)
+        columns["address"] = np.char.add(numbers, b" Main St")
+        columns["list_date"] = columns["list_date"].astype(str)
+        if status_label is not None:
+            columns["status"] = np.full(len(numbers), status_label)
+        
+        return ListingTable.from_columns(columns)
+    
+    def listings(self, market: str, status: str, **kwargs) -> List[Dict[str, Any]]:
+        """Generate listings as dicts (see table for arguments)"""
+        return self.table(market, status, **kwargs).to_records()
+    
+    @staticmethod
+    def _split_market(market: str) -> Tuple[str, str]:
+        """City and state of a market name"""
+        city, _, state = market.partition(",")
+        return city.strip(), state.strip()
+
+
+_shared_generator: Optional[SyntheticMarketGenerator] = None
+
+
+def shared_synthetic_generator() -> SyntheticMarketGenerator:
+    """Get the process-wide generator used for mock data"""
+    global _shared_generator
+    if _shared_generator is None:
+        reference_date = (
+            datetime.fromisoformat(settings.mock_data_reference_date)
+            if settings.mock_data_reference_date else None
+        )
+        _shared_generator = SyntheticMarketGenerator(settings.mock_data_seed, reference_date)
+    return _shared_generator
@@ -0,0 +1,153 @@
+"""
+Geographic tiling for data collectors
+Splits a market into ZIP code or bounding-box tiles that are fetched separately
+"""
+import json
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from loguru import logger
+
+from config.settings import settings
+
+
+# Relative region files are resolved against the agent directory
+AGENT_ROOT = Path(__file__).resolve().parents[2]
+
+BoundingBox = Tuple[float, float, float, float]  # min_lat, min_lng, max_lat, max_lng
+
+
+class Tile(NamedTuple):
+    """One geographic work unit: a ZIP code or a bounding box"""
+    zip: Optional[str] = None
+    bbox: Optional[BoundingBox] = None
+    depth: int = 0
+    
+    @property
+    def can_split(self) -> bool:
+        """Only bounding boxes can be divided further"""
+        return self.bbox is not None
+    
+    def split(self) -> List["Tile"]:
+        """Divide a bounding-box tile into four quadrants"""
+        if self.bbox is None:
+            raise ValueError("ZIP code tiles can't be split")
+        
+        min_lat, min_lng, max_lat, max_lng = self.bbox
+        mid_lat = (min_lat + max_lat) / 2
+        mid_lng = (min_lng + max_lng) / 2
+        return [
+            Tile(bbox=(lat0, lng0, lat1, lng1), depth=self.depth + 1)
+            for lat0, lat1 in ((min_lat, mid_lat), (mid_lat, max_lat))
+            for lng0, lng1 in ((min_lng, mid_lng), (mid_lng, max_lng))
+        ]
+    
+    def __str__(self) -> str:
+        if self.zip is not None:
+            return f"zip {self.zip}"
+        return "bbox " + ",".join(f"{value:.4f}" for value in self.bbox)
+
+
+def market_key(market: str) -> str:
+    """Normalize 'Austin, TX' / 'Austin TX' / 'austin,tx' to one key"""
+    return " ".join(market.replace(",", " ").lower().split())
+
+
+class MarketTiler:
+    """
+    Tiles markets using the local region reference table
+    
+    Each market in the table has a bounding box and optionally a list of ZIP
+    codes. Markets with ZIP codes are tiled one tile per ZIP; otherwise the
+    bounding box is cut into a tile_grid_size x tile_grid_size grid, and
+    collectors split grid tiles further while they are too large. Markets
+    missing from the table aren't tiled.
+    """
+    
+    def __init__(self, regions_file: Optional[str] = None):
+        self.name = "MarketTiler"
+        path = Path(regions_file or settings.market_regions_file)
+        self.regions_file = path if path.is_absolute() else AGENT_ROOT / path
+        self.regions = self._load_regions()
+        self.split_count = 0
+    
+    def _load_regions(self) -> Dict[str, dict]:
+        """Read the region table, keyed by normalized market name"""
+        try:
+            raw = json.loads(self.regions_file.read_text())
+        except FileNotFoundError:
+            logger.warning(f"Market regions file not found: {self.regions_file}")
+            return {}
+        
+        return {
+            market_key(market): region
+            for market, region in raw.items()
+            if not market.startswith("_")
+        }
+    
+    def tiles_for(self, market: str) -> List[Tile]:
+        """
+        Initial tiles for a market
+        
+        Returns:
+            Tiles covering the market, or an empty list if it isn't in the table
+        """
+        region = self.regions.get(market_key(market))
+        if region is None:
+            return []
+        
+        zips = region.get("zips")
+        if zips:
+            return [Tile(zip=str(zip_code)) for zip_code in zips]
+        
+        grid = max(1, settings.tile_grid_size)
+        min_lat, min_lng, max_lat, max_lng = region["bbox"]
+        lat_step = (max_lat - min_lat) / grid
+        lng_step = (max_lng - min_lng) / grid
+        return [
+            Tile(bbox=(
+                min_lat + row * lat_step,
+                min_lng + col * lng_step,
+                min_lat + (row + 1) * lat_step,
+                min_lng + (col + 1) * lng_step
+            ))
+            for row in range(grid)
+            for col in range(grid)
+        ]
+    
+    def should_split(self, tile: Tile, total: Optional[int], first_page_full: bool) -> bool:
+        """
+        Whether a tile is too large to fetch as one work unit
+        
+        Args:
+            tile: Tile whose first page was just fetched
+            total: Result count reported by the API, if any
+            first_page_full: Whether the first page came back full
+        """
+        if not tile.can_split or tile.depth >= settings.tile_max_depth:
+            return False
+        if isinstance(total, int):
+            return total > settings.tile_max_listings
+        return first_page_full
+    
+    def split(self, tile: Tile) -> List[Tile]:
+        """Split an oversized tile into quadrants"""
+        self.split_count += 1
+        return tile.split()
+    
+    def get_stats(self) -> dict:
+        """Get tiler statistics"""
+        return {
+            "markets": len(self.regions),
+            "splits": self.split_count
+        }
+
+
+_shared_tiler: Optional[MarketTiler] = None
+
+
+def shared_tiler() -> MarketTiler:
+    """Get the process-wide market tiler"""
+    global _shared_tiler
+    if _shared_tiler is None:
+        _shared_tiler = MarketTiler()
+    return _shared_tiler
@@ -2,13 +2,14 @@
 Zillow data collector
 Collects real estate listings from Zillow API and web scraping
 """
-import asyncio
-import aiohttp
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from loguru import logger
 
 from .base import BaseCollector, CollectorError
+from .synthetic import shared_synthetic_generator
+from .tiling import Tile
+from ..listings import ListingTable
 from ..models import MarketData
 from config.settings import settings
 
@@ -16,28 +17,17 @@ from config.settings import settings
 class ZillowCollector(BaseCollector):
     """Collect inventory data from Zillow"""
     
+    # The sold cutoff moves daily; replays match sold searches without it
+    replay_ignore_params = ("sold_after",)
+    
     def __init__(self):
         super().__init__("zillow")
         self.api_key = settings.zillow_api_key
         self.base_url = "https://api.bridgedataoutput.com/api/v2/zillow"
-        self.session: Optional[aiohttp.ClientSession] = None
-    
-    async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create aiohttp session"""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                timeout=aiohttp.ClientTimeout(total=30)
-            )
-        return self.session
-    
-    async def close(self):
-        """Close the aiohttp session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
     
     async def collect(self, market: str) -> MarketData:
         """
@@ -58,16 +48,10 @@ class ZillowCollector(BaseCollector):
             pending_task = self._get_pending_listings(city, state)
             sold_task = self._get_sold_listings(city, state)
             
-            active, pending, sold = await asyncio.gather(
-                active_task, pending_task, sold_task,
-                return_exceptions=True
+            active, pending, sold = await self._gather_all(
+                active_task, pending_task, sold_task
             )
             
-            # Handle any errors
-            active = active if not isinstance(active, Exception) else []
-            pending = pending if not isinstance(pending, Exception) else []
-            sold = sold if not isinstance(sold, Exception) else []
-            
             # Calculate statistics
             total_active = len(active)
             total_pending = len(pending)
@@ -98,84 +82,71 @@ class ZillowCollector(BaseCollector):
         except Exception as e:
             raise CollectorError(f"Zillow collection failed: {str(e)}")
     
-    async def _get_active_listings(self, city: str, state: str) -> List[Dict[str, Any]]:
+    async def _get_active_listings(self, city: str, state: str) -> ListingTable:
         """Get active listings for a market"""
-        if not self.api_key:
+        if not self.api_key and not settings.collector_replay:
             logger.warning("Zillow API key not configured, using mock data")
             return self._generate_mock_active_listings(city, state)
         
-        try:
-            session = await self._get_session()
-            
-            params = {
-                "city": city,
-                "state": state,
-                "status": "for_sale",
-                "limit": 1000
-            }
-            
-            async with session.get(f"{self.base_url}/listings", params=params) as response:
-                response.raise_for_status()
-                data = await response.json()
-                
-                return self._normalize_listings(data.get('listings', []))
-                
-        except Exception as e:
-            logger.warning(f"Zillow API failed, using mock data: {e}")
-            return self._generate_mock_active_listings(city, state)
+        params = {
+            "city": city,
+            "state": state,
+            "status": "for_sale"
+        }
+        
+        return await self._fetch_listings(
+            f"{city}, {state}", f"{self.base_url}/listings", params,
+            'listings', self._normalize_listings
+        )
     
-    async def _get_pending_listings(self, city: str, state: str) -> List[Dict[str, Any]]:
+    async def _get_pending_listings(self, city: str, state: str) -> ListingTable:
         """Get pending listings"""
-        if not self.api_key:
+        if not self.api_key and not settings.collector_replay:
             return self._generate_mock_pending_listings(city, state)
         
-        try:
-            session = await self._get_session()
-            
-            params = {
-                "city": city,
-                "state": state,
-                "status": "pending",
-                "limit": 1000
-            }
-            
-            async with session.get(f"{self.base_url}/listings", params=params) as response:
-                response.raise_for_status()
-                data = await response.json()
-                
-                return self._normalize_listings(data.get('listings', []))
-                
-        except Exception as e:
-            logger.warning(f"Zillow pending listings failed: {e}")
-            return self._generate_mock_pending_listings(city, state)
+        params = {
+            "city": city,
+            "state": state,
+            "status": "pending"
+        }
+        
+        return await self._fetch_listings(
+            f"{city}, {state}", f"{self.base_url}/listings", params,
+            'listings', self._normalize_listings
+        )
     
-    async def _get_sold_listings(self, city: str, state: str) -> List[Dict[str, Any]]:
+    async def _get_sold_listings(self, city: str, state: str) -> ListingTable:
         """Get sold listings (last 30 days)"""
-        if not self.api_key:
+        if not self.api_key and not settings.collector_replay:
             return self._generate_mock_sold_listings(city, state)
         
-        try:
-            session = await self._get_session()
-            
-            thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).isoformat()
-            
-            params = {
-                "city": city,
-                "state": state,
-                "status": "sold",
-                "sold_after": thirty_days_ago,
-                "limit": 1000
-            }
-            
-            async with session.get(f"{self.base_url}/listings", params=params) as response:
-                response.raise_for_status()
-                data = await response.json()
-                
-                return self._normalize_listings(data.get('listings', []))
-                
-        except Exception as e:
-            logger.warning(f"Zillow sold listings failed: {e}")
-            return self._generate_mock_sold_listings(city, state)
+        # Day precision keeps the query identical across a day's runs, so it
+        # can be cached and coalesced
+        thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).date().isoformat()
+        
+        params = {
+            "city": city,
+            "state": state,
+            "status": "sold",
+            "sold_after": thirty_days_ago
+        }
+        
+        return await self._fetch_listings(
+            f"{city}, {state}", f"{self.base_url}/listings", params,
+            'listings', self._normalize_listings
+        )
+    
+    def _tile_params(self, tile: Tile) -> Optional[Dict[str, Any]]:
+        """
+        Restrict a listing search to a tile
+        
+        ZIP tiles filter on ``zipcode``; bounding-box tiles use the API's
+        ``box`` geo filter, given as min_lng,min_lat,max_lng,max_lat.
+        """
+        if tile.zip is not None:
+            return {"zipcode": tile.zip}
+        min_lat, min_lng, max_lat, max_lng = tile.bbox
+        return {"box": ",".join(f"{value:.6f}" for value in (min_lng, min_lat, max_lng, max_lat))}
     
     def _normalize_listings(self, listings: List[Dict]) -> List[Dict[str, Any]]:
         """Normalize Zillow listing data to standard format"""
@@ -221,90 +192,51 @@ class ZillowCollector(BaseCollector):
         
         return city, state
     
-    def _calculate_median_price(self, listings: List[Dict], price_field: str) -> Optional[float]:
+    def _calculate_median_price(self, listings: ListingTable, price_field: str) -> Optional[float]:
         """Calculate median price from listings"""
-        prices = [
-            listing[price_field] 
-            for listing in listings 
-            if listing.get(price_field) is not None
-        ]
-        
-        if not prices:
-            return None
-        
-        prices.sort()
-        n = len(prices)
-        
-        if n % 2 == 0:
-            return (prices[n//2 - 1] + prices[n//2]) / 2
-        else:
-            return prices[n//2]
+        return listings.median(price_field)
     
-    def _assess_completeness(self, active: List, pending: List, sold: List) -> float:
+    def _assess_completeness(
+        self,
+        active: ListingTable,
+        pending: ListingTable,
+        sold: ListingTable
+    ) -> float:
         """Assess data completeness (0-1)"""
-        total_listings = len(active) + len(pending) + len(sold)
-        
-        if total_listings == 0:
+        total = len(active) + len(pending) + len(sold)
+        if total == 0:
             return 0.0
         
-        # Check for required fields
-        required_fields = ['id', 'list_price', 'beds', 'baths', 'sqft', 'days_on_market']
-        complete_count = 0
-        
-        for listing in active + pending + sold:
-            if all(listing.get(field) is not None for field in required_fields):
-                complete_count += 1
+        required = ['id', 'list_price', 'beds', 'baths', 'sqft', 'days_on_market']
+        complete = sum(table.count_complete(required) for table in (active, pending, sold))
         
-        return complete_count / total_listings if total_listings > 0 else 0.0
+        return complete / total
     
     # Mock data generators (for testing without API keys)
-    def _generate_mock_active_listings(self, city: str, state: str) -> List[Dict[str, Any]]:
+    def _generate_mock_active_listings(self, city: str, state: str) -> ListingTable:
         """Generate mock active listings for testing"""
-        import random
-        
-        count = random.randint(800, 1200)
-        listings = []
-        
-        for i in range(count):
-            listings.append({
-                'id': f"zpid_{i}",
-                'address': f"{i} Main St",
-                'city': city,
-                'state': state,
-                'zip': '78701',
-                'list_price': random.randint(200000, 800000),
-                'beds': random.randint(2, 5),
-                'baths': random.randint(1, 3),
-                'sqft': random.randint(1000, 3000),
-                'lot_size': random.randint(5000, 10000),
-                'property_type': random.choice(['single_family', 'condo', 'townhouse']),
-                'year_built': random.randint(1970, 2023),
-                'days_on_market': random.randint(1, 90),
-                'list_date': (datetime.utcnow() - timedelta(days=random.randint(1, 90))).isoformat(),
-                'status': 'for_sale',
-                'lat': 30.267 + random.uniform(-0.1, 0.1),
-                'lng': -97.743 + random.uniform(-0.1, 0.1),
-                'source': 'zillow_mock'
-            })
-        
-        return listings
+        return self._generate_mock_listings(city, state, 'active', 'for_sale')
     
-    def _generate_mock_pending_listings(self, city: str, state: str) -> List[Dict[str, Any]]:
+    def _generate_mock_pending_listings(self, city: str, state: str) -> ListingTable:
         """Generate mock pending listings"""
-        import random
-        count = random.randint(400, 700)
-        # Similar to active but with pending status
-        listings = self._generate_mock_active_listings(city, state)[:count]
-        for listing in listings:
-            listing['status'] = 'pending'
-        return listings
+        return self._generate_mock_listings(city, state, 'pending', 'pending')
     
-    def _generate_mock_sold_listings(self, city: str, state: str) -> List[Dict[str, Any]]:
+    def _generate_mock_sold_listings(self, city: str, state: str) -> ListingTable:
         """Generate mock sold listings"""
-        import random
-        count = random.randint(600, 900)
-        listings = self._generate_mock_active_listings(city, state)[:count]
-        for listing in listings:
-            listing['status'] = 'sold'
-            listing['sold_price'] = listing['list_price'] * random.uniform(0.95, 1.05)
-        return listings
+        return self._generate_mock_listings(city, state, 'sold', 'sold')
+    
+    def _generate_mock_listings(
+        self,
+        city: str,
+        state: str,
+        status: str,
+        status_label: str
+    ) -> ListingTable:
+        """Generate mock listings in Zillow's status vocabulary"""
+        return shared_synthetic_generator().table(
+            f"{city}, {state}",
+            status,
+            source='zillow_mock',
+            status_label=status_label,
+            id_prefix='zpid_'
+        )
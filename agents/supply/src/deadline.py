@@ -0,0 +1,74 @@
+"""
+Per-market deadlines for Supply Agent
+A time budget passed down through every step of a market's analysis
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a market's time budget runs out"""
+    pass
+
+
+class Deadline:
+    """
+    Time budget shared by all steps of one market's analysis
+    
+    Steps ask the deadline for their timeout instead of using a fixed one,
+    so no step can run past the market's overall budget. The clock can be
+    paused while the market waits for a worker (e.g. in a pipeline queue),
+    so only time spent working counts against the budget.
+    """
+    
+    def __init__(self, budget_seconds: float):
+        self.budget = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+        self.paused_at: Optional[float] = None
+    
+    def remaining(self) -> float:
+        """Seconds left in the budget (never negative)"""
+        now = self.paused_at if self.paused_at is not None else time.monotonic()
+        return max(0.0, self.expires_at - now)
+    
+    def pause(self):
+        """Stop the clock until resume is called"""
+        if self.paused_at is None:
+            self.paused_at = time.monotonic()
+    
+    def resume(self):
+        """Restart the clock, extending the budget by the time spent paused"""
+        if self.paused_at is not None:
+            self.expires_at += time.monotonic() - self.paused_at
+            self.paused_at = None
+    
+    @property
+    def expired(self) -> bool:
+        """Whether the budget has run out"""
+        return self.remaining() <= 0
+    
+    def cap(self, timeout: Optional[float] = None, floor: float = 0.0) -> float:
+        """
+        Timeout for a step, limited by the remaining budget
+        
+        Args:
+            timeout: The step's own timeout, if it has one
+            floor: Minimum time to allow even when the budget is spent
+                (e.g. to publish results that are already computed)
+        """
+        remaining = max(self.remaining(), floor)
+        return remaining if timeout is None else min(timeout, remaining)
+    
+    async def run(self, awaitable: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """
+        Await a step within the remaining budget, cancelling it on overrun
+        
+        Raises:
+            DeadlineExceeded: If the step doesn't finish in time
+        """
+        limit = self.cap(timeout)
+        try:
+            return await asyncio.wait_for(awaitable, limit)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"step exceeded its {limit:.1f}s share of the time budget")
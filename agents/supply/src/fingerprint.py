@@ -0,0 +1,44 @@
+"""
+Input fingerprinting for Supply Agent
+Detects when a market's collected listings are identical to the last run
+"""
+import hashlib
+from typing import List
+
+from .models import MarketData
+
+
+class MarketUnchanged(Exception):
+    """Raised to stop a market's analysis when its inputs haven't changed"""
+    pass
+
+
+def fingerprint_market_data(market_data: List[MarketData]) -> str:
+    """
+    Content fingerprint of normalized listings from all sources
+    
+    Each status's ListingTable is hashed column by column in a canonical
+    row order (see ListingTable.update_digest), so the fingerprint doesn't
+    depend on the order a source returned listings in and no per-listing
+    objects are built. Collection timestamps are not part of the fingerprint.
+    
+    Args:
+        market_data: MarketData from every source that returned data
+        
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    
+    for data in sorted(market_data, key=lambda d: d.source):
+        digest.update(f"source={data.source}\n".encode('utf-8'))
+        
+        for status, listings in (
+            ('active', data.active_listings),
+            ('pending', data.pending_listings),
+            ('sold', data.sold_listings)
+        ):
+            digest.update(f"{status}\n".encode('utf-8'))
+            listings.update_digest(digest)
+    
+    return digest.hexdigest()
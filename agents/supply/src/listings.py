@@ -0,0 +1,599 @@
+"""
+Columnar listing storage for Supply Agent
+Keeps a source's listings as typed NumPy columns instead of one dict per listing
+"""
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from pydantic_core import core_schema
+
+
+# Standard listing fields, in the order collectors normalize them
+LISTING_FIELDS = (
+    'id', 'address', 'city', 'state', 'zip', 'list_price', 'sold_price',
+    'beds', 'baths', 'sqft', 'lot_size', 'property_type', 'year_built',
+    'days_on_market', 'list_date', 'close_date', 'status', 'modified',
+    'lat', 'lng', 'source'
+)
+
+# Numeric fields and their storage type; missing values are NaN
+NUMERIC_FIELDS = {
+    'list_price': np.float64,
+    'sold_price': np.float64,
+    'lot_size': np.float64,
+    'lat': np.float64,
+    'lng': np.float64,
+    'beds': np.float32,
+    'baths': np.float32,
+    'sqft': np.float32,
+    'year_built': np.float32,
+    'days_on_market': np.float32,
+}
+
+# Numeric fields handed back as ints when they hold whole numbers
+INTEGER_FIELDS = frozenset({'beds', 'sqft', 'lot_size', 'year_built', 'days_on_market'})
+
+# Strings that repeat across listings, stored as int32 codes into a category
+# list (-1 = missing)
+CATEGORICAL_FIELDS = frozenset({
+    'city', 'state', 'zip', 'property_type', 'status', 'source', 'list_date', 'close_date'
+})
+
+# Everything else (ids, addresses, timestamps) is close to unique per listing
+# and stored as UTF-8 bytes when all values are strings
+
+Rows = Union["ListingTable", Iterable[Dict[str, Any]]]
+
+
+def _numeric(values: Sequence[Any], dtype) -> np.ndarray:
+    """Convert values to a float array, turning None and junk into NaN"""
+    try:
+        return np.array(values, dtype=dtype)
+    except (TypeError, ValueError):
+        converted = []
+        for value in values:
+            try:
+                converted.append(float(value))
+            except (TypeError, ValueError):
+                converted.append(math.nan)
+        return np.array(converted, dtype=dtype)
+
+
+def _text(values: Sequence[Any]) -> np.ndarray:
+    """Store near-unique values compactly: UTF-8 bytes, int64 or (mixed) object"""
+    if all(isinstance(value, str) for value in values):
+        return np.array([value.encode('utf-8') for value in values], dtype=np.bytes_)
+    if all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+        return np.array(values, dtype=np.int64)
+    return np.array(values, dtype=object)
+
+
+def _text_values(column: np.ndarray) -> List[Any]:
+    """Python values of a text column"""
+    if column.dtype.kind == 'S':
+        return [value.decode('utf-8') for value in column.tolist()]
+    return column.tolist()
+
+
+def _object_values(column: np.ndarray) -> np.ndarray:
+    """Text column as an object array of Python values"""
+    values = np.empty(len(column), dtype=object)
+    values[:] = _text_values(column)
+    return values
+
+
+def _text_nulls(column: np.ndarray) -> np.ndarray:
+    """Missing-value mask of a text column"""
+    if column.dtype == object:
+        return np.array([value is None for value in column], dtype=bool)
+    return np.zeros(len(column), dtype=bool)
+
+
+class ListingTable:
+    """
+    Immutable, columnar set of normalized listings
+    
+    Numeric fields are float arrays with NaN for missing values, repeated
+    strings (city, status, source, ...) are int32 codes into a per-table
+    category list, and ids and addresses are packed UTF-8 bytes. A listing
+    takes roughly a tenth of the memory of the equivalent dict.
+    
+    Only fields that some listing had are stored; reading any other field
+    gives missing values. Fields outside LISTING_FIELDS are dropped.
+    
+    Iterating (or indexing with an int) yields listing dicts, so code that
+    works on lists of listings keeps working; counts, medians and
+    deduplication are done on the columns.
+    """
+    
+    def __init__(
+        self,
+        length: int = 0,
+        columns: Optional[Dict[str, np.ndarray]] = None,
+        categories: Optional[Dict[str, List[Any]]] = None
+    ):
+        self._length = length
+        self._columns = columns or {}
+        self._categories = categories or {}
+    
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "ListingTable":
+        """Build a table from listing dicts"""
+        builder = ListingTableBuilder()
+        builder.extend(records)
+        return builder.build()
+    
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Sequence[Any]]) -> "ListingTable":
+        """
+        Build a table from whole columns
+        
+        Args:
+            columns: Field name to equal-length values (lists or arrays);
+                categorical arrays are encoded with np.unique
+        """
+        length = len(next(iter(columns.values()))) if columns else 0
+        stored: Dict[str, np.ndarray] = {}
+        categories: Dict[str, List[Any]] = {}
+        
+        for field in LISTING_FIELDS:
+            if field not in columns:
+                continue
+            values = columns[field]
+            if len(values) != length:
+                raise ValueError(f"Column {field} has {len(values)} values, expected {length}")
+            
+            if field in NUMERIC_FIELDS:
+                stored[field] = _numeric(values, NUMERIC_FIELDS[field])
+            elif field in CATEGORICAL_FIELDS:
+                if isinstance(values, np.ndarray) and values.dtype != object:
+                    unique, codes = np.unique(values, return_inverse=True)
+                    stored[field] = codes.astype(np.int32)
+                    categories[field] = unique.tolist()
+                else:
+                    stored[field], categories[field] = cls._encode(values)
+            elif isinstance(values, np.ndarray) and values.dtype.kind in 'iS':
+                stored[field] = values
+            else:
+                stored[field] = _text(list(values))
+        
+        return cls(length, stored, categories)
+    
+    @classmethod
+    def coerce(cls, value: Rows) -> "ListingTable":
+        """Return value as a table, converting an iterable of listing dicts"""
+        if isinstance(value, ListingTable):
+            return value
+        return cls.from_records(value)
+    
+    @classmethod
+    def concat(cls, tables: Iterable["ListingTable"]) -> "ListingTable":
+        """
+        Stack tables, merging their category lists
+        
+        Args:
+            tables: Tables to stack, in order
+        """
+        tables = [table for table in tables if len(table)]
+        if not tables:
+            return cls()
+        if len(tables) == 1:
+            return tables[0]
+        
+        length = sum(len(table) for table in tables)
+        columns: Dict[str, np.ndarray] = {}
+        categories: Dict[str, List[Any]] = {}
+        
+        for field in LISTING_FIELDS:
+            if not any(field in table._columns for table in tables):
+                continue
+            
+            if field in CATEGORICAL_FIELDS:
+                merged: List[Any] = []
+                index: Dict[Any, int] = {}
+                parts = []
+                for table in tables:
+                    names = table._categories.get(field, [])
+                    for name in names:
+                        if name not in index:
+                            index[name] = len(merged)
+                            merged.append(name)
+                    # The trailing -1 keeps missing codes (-1) missing
+                    mapping = np.array([index[name] for name in names] + [-1], dtype=np.int32)
+                    parts.append(mapping[table.codes(field)])
+                columns[field] = np.concatenate(parts)
+                categories[field] = merged
+            else:
+                parts = [table._raw(field) for table in tables]
+                if len({part.dtype.kind for part in parts}) > 1:
+                    parts = [_object_values(part) for part in parts]
+                columns[field] = np.concatenate(parts)
+        
+        return cls(length, columns, categories)
+    
+    @staticmethod
+    def _encode(values: Iterable[Any]) -> Tuple[np.ndarray, List[Any]]:
+        """Categorical codes and categories of a sequence of values"""
+        index: Dict[Any, int] = {}
+        categories: List[Any] = []
+        codes = []
+        for value in values:
+            if value is None:
+                codes.append(-1)
+                continue
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(categories)
+                categories.append(value)
+            codes.append(code)
+        return np.array(codes, dtype=np.int32), categories
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_records())
+    
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        if not isinstance(index, (int, np.integer)):
+            raise TypeError("ListingTable indices must be integers; use take() for subsets")
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("ListingTable index out of range")
+        return self.take(np.array([index])).to_records()[0]
+    
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, list):
+            return self.to_records() == other
+        if not isinstance(other, ListingTable):
+            return NotImplemented
+        return self.to_records() == other.to_records()
+    
+    def __repr__(self) -> str:
+        return f"ListingTable({self._length} listings, {len(self._columns)} fields)"
+    
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source_type: Any, handler: Any) -> core_schema.CoreSchema:
+        """Validate from a table or listing dicts; serialize to listing dicts"""
+        return core_schema.no_info_plain_validator_function(
+            cls.coerce,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda table: table.to_records()
+            )
+        )
+    
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        """Fields stored in this table"""
+        return tuple(self._columns)
+    
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the table"""
+        total = sum(column.nbytes for column in self._columns.values())
+        total += sum(
+            sum(len(str(name)) for name in names) + 8 * len(names)
+            for names in self._categories.values()
+        )
+        return total
+    
+    def codes(self, field: str) -> np.ndarray:
+        """Category codes of a categorical field (-1 = missing)"""
+        if field not in CATEGORICAL_FIELDS:
+            raise ValueError(f"{field} is not a categorical field")
+        column = self._columns.get(field)
+        return column if column is not None else np.full(self._length, -1, dtype=np.int32)
+    
+    def categories(self, field: str) -> List[Any]:
+        """Category values of a categorical field"""
+        return list(self._categories.get(field, []))
+    
+    def column(self, field: str) -> np.ndarray:
+        """
+        Values of a field as an array
+        
+        Numeric fields come back as float arrays with NaN for missing values;
+        other fields as object arrays with None for missing values.
+        """
+        if field in NUMERIC_FIELDS:
+            return self._raw(field)
+        
+        if field in CATEGORICAL_FIELDS:
+            lookup = np.array(self._categories.get(field, []) + [None], dtype=object)
+            return lookup[self.codes(field)]
+        
+        return _object_values(self._raw(field))
+    
+    def not_null(self, field: str) -> np.ndarray:
+        """Mask of listings that have a value for a field"""
+        if field not in self._columns:
+            return np.zeros(self._length, dtype=bool)
+        if field in NUMERIC_FIELDS:
+            return ~np.isnan(self._columns[field])
+        if field in CATEGORICAL_FIELDS:
+            return self._columns[field] >= 0
+        return ~_text_nulls(self._columns[field])
+    
+    def isin(self, field: str, values: Iterable[Any]) -> np.ndarray:
+        """Mask of listings whose field is one of the given values"""
+        if field in CATEGORICAL_FIELDS:
+            wanted = set(values)
+            matching = [code for code, name in enumerate(self._categories.get(field, [])) if name in wanted]
+            return np.isin(self.codes(field), matching)
+        return np.isin(self.column(field), list(values))
+    
+    def take(self, rows: np.ndarray) -> "ListingTable":
+        """Subset of listings by index array or boolean mask"""
+        rows = np.asarray(rows)
+        length = int(rows.sum()) if rows.dtype == bool else len(rows)
+        columns = {field: column[rows] for field, column in self._columns.items()}
+        return ListingTable(length, columns, dict(self._categories))
+    
+    def select(self, fields: Iterable[str]) -> "ListingTable":
+        """Table with only the given fields (cheaper to pickle)"""
+        fields = set(fields)
+        columns = {field: column for field, column in self._columns.items() if field in fields}
+        categories = {field: names for field, names in self._categories.items() if field in fields}
+        return ListingTable(self._length, columns, categories)
+    
+    def with_column(self, field: str, values: Sequence[Any]) -> "ListingTable":
+        """Copy of the table with one field replaced"""
+        replacement = ListingTable.from_columns({field: values})
+        columns = {**self._columns, **replacement._columns}
+        categories = {**self._categories, **replacement._categories}
+        return ListingTable(self._length, columns, categories)
+    
+    def median(self, field: str) -> Optional[float]:
+        """Median of a numeric field over listings that have it"""
+        values = self._raw(field)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return None
+        return float(np.median(values))
+    
+    def count_complete(self, fields: Iterable[str]) -> int:
+        """Number of listings that have every one of the given fields"""
+        mask = np.ones(self._length, dtype=bool)
+        for field in fields:
+            mask &= self.not_null(field)
+        return int(mask.sum())
+    
+    def unique_by(self, field: str) -> "ListingTable":
+        """
+        Drop repeated values of a field, keeping the first listing with each
+        
+        Listings missing the field are all kept.
+        """
+        if field not in self._columns or self._length == 0:
+            return self
+        
+        present = np.flatnonzero(self.not_null(field))
+        keys = self._columns[field][present]
+        if keys.dtype == object:
+            keys = np.array([repr(key) for key in keys])
+        
+        _, first = np.unique(keys, return_index=True)
+        keep = np.zeros(self._length, dtype=bool)
+        keep[~self.not_null(field)] = True
+        keep[present[first]] = True
+        
+        if keep.all():
+            return self
+        return self.take(keep)
+    
+    def deduplicate(self) -> "ListingTable":
+        """
+        Remove listings that share an address, city and ZIP code
+        
+        Addresses are compared case-insensitively and ignoring surrounding
+        whitespace. Listings without an address are dropped. The first
+        listing of each address is kept.
+        """
+        if self._length == 0:
+            return self
+        
+        # Normalize each distinct address once
+        addresses = self.column('address')
+        normalized = np.array(
+            [address.lower().strip() if isinstance(address, str) else "" for address in addresses],
+            dtype=object
+        )
+        distinct, address_codes = np.unique(normalized.astype(str), return_inverse=True)
+        has_address = distinct[address_codes] != ""
+        
+        keys = np.stack([
+            address_codes.astype(np.int64),
+            self._category_key('city'),
+            self._category_key('zip')
+        ], axis=1)[has_address]
+        rows = np.flatnonzero(has_address)
+        
+        _, first = np.unique(keys, axis=0, return_index=True)
+        return self.take(np.sort(rows[first]))
+    
+    def update_digest(self, digest: Any):
+        """
+        Feed the table's content into a hashlib digest, independent of row order
+        
+        Each stored field is reduced to a canonical array (categorical codes
+        are renumbered by category value, so the order categories were first
+        seen in doesn't matter), rows are put in a canonical order by sorting
+        on the id (or on every field when ids repeat), and each column is
+        hashed as one block of bytes. No listing dicts are built.
+        
+        Args:
+            digest: hashlib object to update
+        """
+        keys: Dict[str, np.ndarray] = {}
+        blocks = []
+        for field in sorted(self._columns):
+            key, header, values = self._canonical_column(field)
+            keys[field] = key
+            blocks.append((f"{field}:{values.dtype.str}:{header}\n".encode('utf-8'), values))
+        
+        order = self._canonical_order(keys)
+        
+        digest.update(f"rows={self._length}\n".encode('utf-8'))
+        for header, values in blocks:
+            digest.update(header)
+            digest.update(np.ascontiguousarray(values[order]).tobytes())
+    
+    def _canonical_order(self, keys: Dict[str, np.ndarray]) -> np.ndarray:
+        """Row order that only depends on the rows' content"""
+        if 'id' in keys:
+            order = np.argsort(keys['id'], kind='stable')
+            ids = keys['id'][order]
+            if not (ids[1:] == ids[:-1]).any():
+                return order
+        if not keys:
+            return np.arange(self._length)
+        # Repeated or missing ids: sort on every field (lexsort's last key is the primary one)
+        return np.lexsort([keys[field] for field in reversed(list(keys))])
+    
+    def _canonical_column(self, field: str) -> Tuple[np.ndarray, str, np.ndarray]:
+        """
+        Content of one field in a form that only depends on its values
+        
+        Returns:
+            Sort key, a text header describing the encoding, and the values
+            to hash (one element per listing)
+        """
+        column = self._columns[field]
+        
+        if field in NUMERIC_FIELDS:
+            # One bit pattern for every missing value
+            values = np.where(np.isnan(column), np.nan, column)
+            return values, "", values
+        
+        if field in CATEGORICAL_FIELDS:
+            names = self._categories.get(field, [])
+            used = np.unique(column[column >= 0])
+            ranked = sorted(used.tolist(), key=lambda code: repr(names[code]))
+            mapping = np.full(len(names) + 1, -1, dtype=np.int32)
+            mapping[ranked] = np.arange(len(ranked), dtype=np.int32)
+            values = mapping[column]
+            return values, repr([names[code] for code in ranked]), values
+        
+        if column.dtype == object:
+            distinct, values = np.unique(
+                np.array([repr(value) for value in column.tolist()]), return_inverse=True
+            )
+            values = values.astype(np.int64)
+            return values, repr(distinct.tolist()), values
+        
+        return column, "", column
+    
+    def _category_key(self, field: str) -> np.ndarray:
+        """Codes of a categorical field, keyed by value so that '' == missing"""
+        names = self._categories.get(field, [])
+        # Treat empty strings like missing values, as the dict path did
+        mapping = np.array([-1 if name == "" else code for code, name in enumerate(names)] + [-1])
+        return mapping[self.codes(field)].astype(np.int64)
+    
+    def _raw(self, field: str) -> np.ndarray:
+        """Stored array of a field, or an all-missing array"""
+        column = self._columns.get(field)
+        if column is not None:
+            return column
+        if field in NUMERIC_FIELDS:
+            return np.full(self._length, np.nan, dtype=NUMERIC_FIELDS[field])
+        if field in CATEGORICAL_FIELDS:
+            return np.full(self._length, -1, dtype=np.int32)
+        return np.full(self._length, None, dtype=object)
+    
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Listings as dicts with the stored fields"""
+        names = []
+        values = []
+        for field, column in self._columns.items():
+            names.append(field)
+            if field in NUMERIC_FIELDS:
+                as_list = column.tolist()
+                whole = field in INTEGER_FIELDS
+                values.append([
+                    None if value != value else int(value) if whole and value.is_integer() else value
+                    for value in as_list
+                ])
+            elif field in CATEGORICAL_FIELDS:
+                lookup = self._categories.get(field, []) + [None]
+                values.append([lookup[code] for code in column.tolist()])
+            else:
+                values.append(_text_values(column))
+        
+        if not names:
+            return [{} for _ in range(self._length)]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+
+class ListingTableBuilder:
+    """
+    Accumulate listings one at a time, then build a ListingTable
+    
+    Categorical values are encoded as they arrive, so repeated strings are
+    not kept once per listing while a large response is being read.
+    """
+    
+    def __init__(self):
+        self._length = 0
+        self._values: Dict[str, List[Any]] = {}
+        self._indexes: Dict[str, Dict[Any, int]] = {}
+        self._categories: Dict[str, List[Any]] = {}
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def append(self, record: Dict[str, Any]):
+        """Add one listing dict"""
+        for field, value in record.items():
+            if field not in LISTING_FIELDS:
+                continue
+            
+            values = self._values.get(field)
+            if values is None:
+                # Listings seen before this field appeared lacked it
+                missing = -1 if field in CATEGORICAL_FIELDS else None
+                values = self._values[field] = [missing] * self._length
+            
+            if field in CATEGORICAL_FIELDS and value is not None:
+                if isinstance(value, (list, dict)):
+                    value = str(value)
+                index = self._indexes.setdefault(field, {})
+                code = index.get(value)
+                if code is None:
+                    code = index[value] = len(index)
+                    self._categories.setdefault(field, []).append(value)
+                value = code
+            elif field in CATEGORICAL_FIELDS:
+                value = -1
+            values.append(value)
+        
+        self._length += 1
+        
+        # Fields this listing lacked
+        for field, values in self._values.items():
+            if len(values) < self._length:
+                values.append(-1 if field in CATEGORICAL_FIELDS else None)
+    
+    def extend(self, records: Iterable[Dict[str, Any]]):
+        """Add several listing dicts"""
+        for record in records:
+            self.append(record)
+    
+    def build(self) -> ListingTable:
+        """Build the table of everything added so far"""
+        columns: Dict[str, np.ndarray] = {}
+        for field in LISTING_FIELDS:
+            values = self._values.get(field)
+            if values is None:
+                continue
+            if field in NUMERIC_FIELDS:
+                columns[field] = _numeric(values, NUMERIC_FIELDS[field])
+            elif field in CATEGORICAL_FIELDS:
+                columns[field] = np.array(values, dtype=np.int32)
+            else:
+                columns[field] = _text(values)
+        
+        categories = {field: list(names) for field, names in self._categories.items()}
+        return ListingTable(self._length, columns, categories)
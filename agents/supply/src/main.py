@@ -7,20 +7,39 @@ import time
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional, Set, Tuple
 from loguru import logger
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.settings import settings
-from src.models import SupplyAnalysis, AgentMetrics, MarketData
-from src.collectors import ZillowCollector, RedfinCollector
+from src.models import SupplyAnalysis, AgentMetrics, MarketData, MarketJob
+from src.collectors import (
+    BaseCollector,
+    LastGoodStore,
+    ZillowCollector,
+    RedfinCollector,
+    MlsCollector,
+    ScrapingCollector,
+    replay_until,
+    shared_archive,
+    shared_http_client,
+    shared_last_good,
+    shared_response_cache,
+    shared_single_flight
+)
 from src.analyzers.trend_analyzer import TrendAnalyzer
 from src.scorers.supply_scorer import SupplyScorer
 from src.analyzers.ai_insights import AIInsightsGenerator
 from src.publishers.kafka_publisher import KafkaPublisher
 from src.publishers.database_writer import DatabaseWriter
+from src.pipeline import Pipeline, PipelineStage
+from src.task_graph import TaskGraph
+from src.scheduler import MarketScheduler
+from src.work_queue import MarketWorkQueue, LeaseLostError
+from src.fingerprint import fingerprint_market_data, MarketUnchanged
+from src.deadline import Deadline, DeadlineExceeded
 
 
 class SupplyAgent:
@@ -35,8 +54,23 @@ class SupplyAgent:
         self.start_time = time.time()
         
         # Initialize components
+        self.http = shared_http_client()
+        self.response_cache = shared_response_cache() if settings.enable_caching else None
+        self.last_good = shared_last_good() if settings.enable_stale_fallback else None
+        self.archive = (
+            shared_archive()
+            if settings.enable_response_archive or settings.collector_replay
+            else None
+        )
         self.zillow = ZillowCollector()
         self.redfin = RedfinCollector()
+        self.collectors: List[BaseCollector] = [self.zillow, self.redfin]
+        self.mls: Optional[MlsCollector] = None
+        if settings.mls_api_url:
+            self.mls = MlsCollector()
+            self.collectors.append(self.mls)
+        # Only used for markets where an API source failed
+        self.scraper = ScrapingCollector() if settings.enable_web_scraping else None
         self.analyzer = TrendAnalyzer()
         self.scorer = SupplyScorer()
         self.ai_generator = AIInsightsGenerator()
@@ -48,6 +82,15 @@ class SupplyAgent:
         self.markets_analyzed = 0
         self.successful_analyses = 0
         self.failed_analyses = 0
+        self.pipeline_stats: List[dict] = []
+        self.scheduler: Optional[MarketScheduler] = None
+        self.work_queue: Optional[MarketWorkQueue] = None
+        # Market -> (lease owner, analysis task) while a market is leased
+        self.leased_markets: Dict[str, Tuple[str, asyncio.Task]] = {}
+        self.lost_leases: Set[str] = set()
+        self.lease_handoffs = 0
+        self.fingerprints: Dict[str, str] = {}
+        self.unchanged_skips = 0
         
         self._setup_logging()
     
@@ -89,6 +132,8 @@ class SupplyAgent:
         logger.info(f"Kafka enabled: {settings.enable_kafka}")
         logger.info(f"Database enabled: {settings.enable_database}")
         logger.info(f"AI insights enabled: {settings.enable_ai_insights}")
+        if settings.collector_replay:
+            logger.info(f"Replaying collector responses from {self.archive.directory}")
         logger.info("=" * 80)
         
         # Connect to external services
@@ -116,6 +161,14 @@ class SupplyAgent:
     
     async def _run_loop(self):
         """Main agent loop"""
+        if settings.enable_distributed_mode:
+            await self._run_distributed_loop()
+            return
+        
+        if settings.enable_adaptive_scheduling:
+            await self._run_scheduled_loop()
+            return
+        
         while True:
             try:
                 await self._run_analysis_cycle()
@@ -128,6 +181,182 @@ class SupplyAgent:
                 logger.error(f"Error in main loop: {e}", exc_info=True)
                 await asyncio.sleep(60)  # Wait 1 minute before retry
     
+    async def _run_scheduled_loop(self):
+        """
+        Agent loop driven by the adaptive market scheduler
+        
+        Instead of rerunning every market on a fixed interval, each market is
+        refreshed when it falls due, and its next interval is derived from
+        its score and inventory volatility.
+        """
+        self.scheduler = MarketScheduler(settings.markets_list)
+        
+        while True:
+            try:
+                due = self.scheduler.pop_due()
+                
+                if due:
+                    logger.info(f"{len(due)} markets due: {', '.join(due)}")
+                    results = await self._analyze_markets_concurrently(due)
+                    
+                    for market in due:
+                        job = results.get(market)
+                        if job is None:
+                            self.scheduler.record_failure(market)
+                        elif job.unchanged:
+                            self.scheduler.record_unchanged(market)
+                        else:
+                            self.scheduler.record_analysis(
+                                market,
+                                job.analysis.score.overall_score,
+                                job.analysis.metrics.total_inventory
+                            )
+                    
+                    await self._publish_metrics()
+                    self.runs_completed += 1
+                    logger.info(f"Scheduler: {self.scheduler.get_stats()}")
+                
+                wait = self.scheduler.seconds_until_next()
+                if wait > 0:
+                    logger.info(f"Next market due in {wait / 60:.1f} minutes")
+                    await asyncio.sleep(wait)
+                
+            except Exception as e:
+                logger.error(f"Error in scheduler loop: {e}", exc_info=True)
+                await asyncio.sleep(60)  # Wait 1 minute before retry
+    
+    async def _run_distributed_loop(self):
+        """
+        Agent loop for running several replicas against one work queue
+        
+        Up to max_concurrent_markets workers each lease one due market at a
+        time from Postgres, analyze it and release it with its next due time.
+        A background task renews the leases of in-flight markets.
+        """
+        self.work_queue = MarketWorkQueue(self.database)
+        await self.work_queue.setup(settings.markets_list)
+        
+        if settings.enable_adaptive_scheduling:
+            self.scheduler = MarketScheduler([])
+        
+        workers = [
+            asyncio.create_task(self._distributed_worker(worker))
+            for worker in range(max(1, settings.max_concurrent_markets))
+        ]
+        background = [
+            asyncio.create_task(self._heartbeat_leases()),
+            asyncio.create_task(self._publish_metrics_periodically())
+        ]
+        
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers + background:
+                task.cancel()
+    
+    async def _distributed_worker(self, worker: int):
+        """
+        Lease, analyze and release markets until cancelled
+        
+        Each worker holds its leases under its own owner id. A market whose
+        lease is lost mid-analysis is handed off: it is neither completed
+        nor failed, since another worker owns it now.
+        """
+        owner = self.work_queue.owner_id(worker)
+        retry_seconds = settings.schedule_min_interval_minutes * 60
+        
+        while True:
+            try:
+                markets = await self.work_queue.claim(1, owner=owner)
+                if not markets:
+                    await asyncio.sleep(settings.work_queue_poll_seconds)
+                    continue
+                
+                market = markets[0]
+                task = asyncio.create_task(self._analyze_market_safe(market))
+                self.leased_markets[market] = (owner, task)
+                try:
+                    job = await task
+                except LeaseLostError as e:
+                    self._hand_off(market, str(e))
+                    continue
+                except asyncio.CancelledError:
+                    if market not in self.lost_leases:
+                        raise
+                    self._hand_off(market, "lease lost during analysis")
+                    continue
+                finally:
+                    self.leased_markets.pop(market, None)
+                    self.lost_leases.discard(market)
+                
+                if job is None:
+                    await self.work_queue.fail(market, retry_seconds, "analysis failed", owner=owner)
+                else:
+                    await self.work_queue.complete(market, self._next_run_seconds(job), owner=owner)
+                
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in distributed worker: {e}", exc_info=True)
+                await asyncio.sleep(settings.work_queue_poll_seconds)
+    
+    def _hand_off(self, market: str, reason: str):
+        """Drop a market whose lease now belongs to another worker"""
+        self.lease_handoffs += 1
+        logger.warning(f"Dropping {market}, another worker owns it now ({reason})")
+    
+    async def _heartbeat_leases(self):
+        """
+        Periodically renew the leases of markets being analyzed
+        
+        Analyses of markets whose lease was lost are cancelled, so no work
+        is wasted on results that could not be published.
+        """
+        while True:
+            await asyncio.sleep(settings.work_queue_heartbeat_seconds)
+            await self._renew_leases()
+    
+    async def _renew_leases(self):
+        """Renew every held lease, cancelling analyses of lost markets"""
+        by_owner: Dict[str, List[str]] = {}
+        for market, (owner, _) in self.leased_markets.items():
+            by_owner.setdefault(owner, []).append(market)
+        
+        for owner, markets in by_owner.items():
+            try:
+                lost = await self.work_queue.heartbeat(sorted(markets), owner=owner)
+            except Exception as e:
+                logger.error(f"Lease heartbeat failed: {e}")
+                continue
+            
+            for market in lost:
+                lease = self.leased_markets.get(market)
+                if lease is not None and lease[0] == owner:
+                    self.lost_leases.add(market)
+                    lease[1].cancel()
+    
+    async def _publish_metrics_periodically(self):
+        """Publish agent metrics once per run interval"""
+        while True:
+            await asyncio.sleep(settings.agent_run_interval_minutes * 60)
+            try:
+                await self._publish_metrics()
+            except Exception as e:
+                logger.error(f"Publishing agent metrics failed: {e}")
+            self.runs_completed += 1
+    
+    def _next_run_seconds(self, job: MarketJob) -> float:
+        """Seconds until a market should run again in distributed mode"""
+        if self.scheduler is None:
+            return settings.agent_run_interval_minutes * 60
+        if job.unchanged:
+            return self.scheduler.observe_unchanged(job.market)
+        return self.scheduler.observe(
+            job.market,
+            job.analysis.score.overall_score,
+            job.analysis.metrics.total_inventory
+        )
+    
     async def _run_analysis_cycle(self):
         """Run one complete analysis cycle for all markets"""
         cycle_start = time.time()
@@ -136,13 +365,13 @@ class SupplyAgent:
         logger.info(f"STARTING ANALYSIS CYCLE - {datetime.utcnow().isoformat()}")
         logger.info("=" * 80)
         
-        for market in settings.markets_list:
-            try:
-                await self._analyze_market(market)
-                self.successful_analyses += 1
-            except Exception as e:
-                logger.error(f"Failed to analyze {market}: {e}", exc_info=True)
-                self.failed_analyses += 1
+        if settings.enable_pipeline_mode:
+            await self._run_pipeline(settings.markets_list)
+        elif settings.enable_concurrent_markets:
+            await self._analyze_markets_concurrently(settings.markets_list)
+        else:
+            for market in settings.markets_list:
+                await self._analyze_market_safe(market)
         
         # Publish agent metrics
         await self._publish_metrics()
@@ -155,98 +384,457 @@ class SupplyAgent:
             f"CYCLE COMPLETE - Analyzed {len(settings.markets_list)} markets "
             f"in {cycle_time}ms"
         )
+        logger.info(f"HTTP pool: {self.http.get_stats()}")
+        if self.response_cache:
+            logger.info(f"Response cache: {self.response_cache.get_stats()}")
+        if self.last_good:
+            logger.info(f"Stale fallback: {self.last_good.get_stats()}")
         logger.info("=" * 80)
     
-    async def _analyze_market(self, market: str):
+    async def _analyze_markets_concurrently(
+        self,
+        markets: List[str]
+    ) -> Dict[str, Optional[MarketJob]]:
+        """
+        Analyze markets concurrently, bounded by max_concurrent_markets
+        
+        Each market runs in its own task, so a failure or a slow market only
+        holds its own concurrency slot.
+        
+        Returns:
+            Dict of market to its finished job (None if it failed)
+        """
+        limit = max(1, settings.max_concurrent_markets)
+        semaphore = asyncio.Semaphore(limit)
+        
+        logger.info(f"Analyzing {len(markets)} markets with concurrency {limit}")
+        
+        async def run(market: str) -> Optional[MarketJob]:
+            async with semaphore:
+                return await self._analyze_market_safe(market)
+        
+        results = await asyncio.gather(*(run(market) for market in markets))
+        return dict(zip(markets, results))
+    
+    async def _analyze_market_safe(self, market: str) -> Optional[MarketJob]:
+        """Analyze a market, isolating failures and updating counters"""
+        try:
+            job = await self._analyze_market(market)
+            self.successful_analyses += 1
+            return job
+        except LeaseLostError:
+            # Not a failure: the market is handed off to its new owner
+            raise
+        except DeadlineExceeded as e:
+            logger.warning(f"{market} exceeded its time budget and will be requeued: {e}")
+            self.failed_analyses += 1
+            return None
+        except Exception as e:
+            logger.error(f"Failed to analyze {market}: {e}", exc_info=True)
+            self.failed_analyses += 1
+            return None
+    
+    async def _analyze_market(self, market: str) -> MarketJob:
         """
         Analyze a single market
         
         Full pipeline:
-        1. Collect data from sources
+        1. Collect data from sources (concurrently with loading history)
+           and stop early if the data is unchanged since the last run
         2. Analyze trends
         3. Calculate score
         4. Generate AI insights
-        5. Publish to Kafka
-        6. Write to database
+        5. Publish to Kafka and write to database (concurrently)
+        
+        Every step runs within the market's time budget. Sources that miss it
+        are dropped and the result is marked partial; if nothing usable comes
+        back in time, DeadlineExceeded is raised so the market is requeued.
         """
-        start_time = time.time()
+        job = MarketJob(market=market, deadline=Deadline(settings.market_time_budget_seconds))
         
         logger.info(f"\n{'=' * 60}")
         logger.info(f"ANALYZING: {market}")
         logger.info(f"{'=' * 60}")
         
-        # Step 1: Collect data
-        logger.info("Step 1: Collecting data...")
-        zillow_result = await self.zillow.collect_safe(market)
-        redfin_result = await self.redfin.collect_safe(market)
+        graph = self._market_graph(job)
+        try:
+            await graph.run()
+        except MarketUnchanged:
+            await self._publish_unchanged(job)
+        logger.debug(f"{market} step timings (ms): {graph.timings_ms}")
         
-        # Gather successful results
-        market_data: List[MarketData] = []
-        data_sources = []
+        return job
+    
+    def _market_graph(self, job: MarketJob) -> TaskGraph:
+        """
+        Build the dependency graph of a market's analysis steps
         
-        if zillow_result.success and zillow_result.market_data:
-            market_data.append(zillow_result.market_data)
-            data_sources.append("zillow")
+        History loading doesn't depend on collection, and the Kafka and
+        database writes don't depend on each other, so each pair runs
+        concurrently.
+        """
+        graph = TaskGraph(job.market)
+        graph.add("collect", lambda: self._collect(job))
+        graph.add("fingerprint", lambda: self._check_fingerprint(job), after=["collect"])
+        graph.add("history", lambda: self._load_history(job))
+        graph.add("analyze", lambda: self._step_analyze(job), after=["fingerprint", "history"])
+        graph.add("score", lambda: self._step_score(job), after=["analyze"])
+        graph.add("insights", lambda: self._step_insights(job), after=["score"])
+        graph.add("build", lambda: self._build_analysis(job), after=["insights"])
+        graph.add("kafka", lambda: self._publish_kafka(job), after=["build"])
+        graph.add("database", lambda: self._write_database(job), after=["build"])
+        graph.add("complete", lambda: self._complete(job), after=["kafka", "database"])
+        return graph
+    
+    async def _step_collect(self, job: MarketJob) -> MarketJob:
+        """
+        Collect current data and load history for a market
         
-        if redfin_result.success and redfin_result.market_data:
-            market_data.append(redfin_result.market_data)
-            data_sources.append("redfin")
+        Runs as a task graph so that history loading is cancelled when
+        collection fails or finds the market unchanged.
+        """
+        job.deadline = Deadline(settings.market_time_budget_seconds)
         
-        if not market_data:
-            raise Exception("No data collected from any source")
+        graph = TaskGraph(job.market)
+        graph.add("collect", lambda: self._collect(job))
+        graph.add("fingerprint", lambda: self._check_fingerprint(job), after=["collect"])
+        graph.add("history", lambda: self._load_history(job))
         
-        logger.success(f"Collected data from {len(data_sources)} sources: {', '.join(data_sources)}")
+        try:
+            await graph.run()
+        except MarketUnchanged:
+            await self._publish_unchanged(job)
+        return job
+    
+    async def _collect(self, job: MarketJob):
+        """
+        Collect current data from all sources
         
-        # Step 2: Get historical data
-        logger.info("Step 2: Fetching historical data...")
-        historical = await self.database.get_historical_metrics(market, days_back=90)
-        logger.info(f"Found {len(historical)} historical data points")
+        A backfill job (with an as-of date) replays the archived responses
+        that were current at that date instead.
+        """
+        logger.info("Step 1: Collecting data...")
+        token = replay_until.set(job.as_of) if job.as_of is not None else None
+        try:
+            job.market_data, job.data_sources, timed_out = await self._collect_market(
+                job.market, job.deadline
+            )
+        finally:
+            if token is not None:
+                replay_until.reset(token)
+        if timed_out:
+            job.partial_reasons.append(f"timed out: {', '.join(timed_out)}")
+        
+        truncated = [data.source for data in job.market_data if data.is_truncated]
+        if truncated:
+            job.partial_reasons.append(f"truncated: {', '.join(truncated)}")
+        
+        stale = [data for data in job.market_data if data.is_stale]
+        if stale:
+            # Each stale source counts in proportion to its age
+            max_age = max(1, settings.stale_max_age_seconds)
+            job.staleness = sum(
+                min(1.0, LastGoodStore.age_seconds(data) / max_age) for data in stale
+            ) / len(job.market_data)
+            logger.warning(
+                f"Using stale data for {job.market} from: "
+                f"{', '.join(data.source for data in stale)}"
+            )
+    
+    async def _check_fingerprint(self, job: MarketJob):
+        """
+        Fingerprint collected listings and stop if they match the last run
         
-        # Step 3: Analyze trends
+        Raises:
+            MarketUnchanged: If the listings are identical to the last
+                successfully published analysis
+        """
+        # Hashing large markets' columns is kept off the event loop
+        job.fingerprint = await asyncio.to_thread(fingerprint_market_data, job.market_data)
+        
+        if not settings.enable_fingerprint_skip:
+            return
+        
+        previous = self.fingerprints.get(job.market)
+        if previous is None:
+            previous = await self.database.get_fingerprint(job.market)
+        
+        if previous == job.fingerprint:
+            job.unchanged = True
+            job.market_data = []
+            raise MarketUnchanged(job.market)
+    
+    async def _publish_unchanged(self, job: MarketJob):
+        """Emit a lightweight heartbeat instead of a full analysis"""
+        self.unchanged_skips += 1
+        logger.info(f"{job.market}: listings unchanged since last run, skipping analysis")
+        await self.kafka.publish_heartbeat(job.market, job.fingerprint)
+    
+    async def _load_history(self, job: MarketJob):
+        """Load historical metrics used for trend analysis"""
+        logger.info("Step 2: Fetching historical data...")
+        try:
+            job.historical = await job.deadline.run(
+                self.database.get_historical_metrics(job.market, days_back=90, as_of=job.as_of),
+                timeout=settings.collector_timeout_seconds
+            )
+        except DeadlineExceeded:
+            logger.warning(f"History for {job.market} not loaded in time, trends will be neutral")
+            job.historical = []
+            job.partial_reasons.append("history unavailable")
+        logger.info(f"Found {len(job.historical)} historical data points")
+    
+    async def _step_analyze(self, job: MarketJob) -> MarketJob:
+        """Analyze inventory metrics and trends"""
         logger.info("Step 3: Analyzing trends...")
-        metrics, trends = await self.analyzer.analyze(market, market_data, historical)
+        job.metrics, job.trends = await job.deadline.run(
+            self.analyzer.analyze(job.market, job.market_data, job.historical, as_of=job.as_of)
+        )
         
-        # Step 4: Calculate score
-        logger.info("Step 4: Calculating supply score...")
-        score = await self.scorer.calculate_score(metrics, trends)
+        # Raw listings are no longer needed once metrics are computed
+        job.market_data = []
         
-        # Step 5: Generate AI insights
+        return job
+    
+    async def _step_score(self, job: MarketJob) -> MarketJob:
+        """Calculate the supply score"""
+        logger.info("Step 4: Calculating supply score...")
+        job.score = await self.scorer.calculate_score(job.metrics, job.trends)
+        
+        if job.partial_reasons:
+            # Results built from incomplete inputs are less trustworthy
+            confidence = job.score.confidence * settings.partial_data_confidence_factor
+            job.score = job.score.model_copy(update={'confidence': round(confidence, 2)})
+            logger.warning(
+                f"{job.market} analyzed with partial data ({'; '.join(job.partial_reasons)}), "
+                f"confidence lowered to {job.score.confidence}"
+            )
+        
+        if job.staleness:
+            confidence = job.score.confidence * (1 - settings.stale_confidence_penalty * job.staleness)
+            job.score = job.score.model_copy(update={'confidence': round(confidence, 2)})
+            logger.warning(
+                f"{job.market} analyzed with stale data, confidence lowered to {job.score.confidence}"
+            )
+        
+        return job
+    
+    async def _step_insights(self, job: MarketJob) -> MarketJob:
+        """Generate AI insights"""
         logger.info("Step 5: Generating AI insights...")
-        ai_insights = await self.ai_generator.generate_insights(
-            market, metrics, trends, score
+        job.ai_insights = await self.ai_generator.generate_insights(
+            job.market, job.metrics, job.trends, job.score,
+            timeout=job.deadline.remaining()
         )
-        
-        # Step 6: Build final analysis
-        processing_time = int((time.time() - start_time) * 1000)
-        
-        analysis = SupplyAnalysis(
-            market=market,
-            metrics=metrics,
-            trends=trends,
-            score=score,
-            ai_insights=ai_insights,
-            data_sources=data_sources,
-            data_quality="high" if len(data_sources) >= 2 else "medium",
-            processing_time_ms=processing_time
+        return job
+    
+    async def _step_publish(self, job: MarketJob) -> MarketJob:
+        """Build the final analysis and publish it to Kafka and the database"""
+        await self._build_analysis(job)
+        await asyncio.gather(self._publish_kafka(job), self._write_database(job))
+        await self._complete(job)
+        return job
+    
+    async def _build_analysis(self, job: MarketJob):
+        """Assemble the final SupplyAnalysis"""
+        # In distributed mode, never publish a market another worker now owns
+        if self.work_queue is not None:
+            owner = self.leased_markets[job.market][0] if job.market in self.leased_markets else None
+            if owner is None or not await self.work_queue.holds_lease(job.market, owner=owner):
+                raise LeaseLostError(f"Lease for {job.market} lost before publishing")
+        
+        job.analysis = SupplyAnalysis(
+            timestamp=job.as_of or datetime.utcnow(),
+            market=job.market,
+            metrics=job.metrics,
+            trends=job.trends,
+            score=job.score,
+            ai_insights=job.ai_insights,
+            data_sources=job.data_sources,
+            data_quality=(
+                "partial" if job.partial_reasons
+                else "stale" if job.staleness
+                else "high" if len(job.data_sources) >= 2
+                else "medium"
+            ),
+            processing_time_ms=int((time.time() - job.started_at) * 1000)
         )
+    
+    async def _publish_kafka(self, job: MarketJob) -> bool:
+        """
+        Publish the analysis to Kafka
         
-        # Step 7: Publish to Kafka
+        Returns:
+            True if published, or if Kafka publishing is disabled
+        """
         logger.info("Step 6: Publishing to Kafka...")
-        await self.kafka.publish_analysis(analysis)
+        published = await self.kafka.publish_analysis(
+            job.analysis,
+            timeout=job.deadline.cap(floor=settings.deadline_publish_grace_seconds)
+        )
+        if not published and self.kafka.enabled:
+            job.publish_failures.append("kafka")
+            return False
+        return True
+    
+    async def _write_database(self, job: MarketJob) -> bool:
+        """
+        Write the analysis to the database
         
-        # Step 8: Write to database
+        Returns:
+            True if written, or if database writes are disabled
+        """
         logger.info("Step 7: Writing to database...")
-        await self.database.write_analysis(analysis)
-        
+        written = await self.database.write_analysis(
+            job.analysis,
+            timeout=job.deadline.cap(floor=settings.deadline_publish_grace_seconds)
+        )
+        if not written and self.database.enabled:
+            job.publish_failures.append("database")
+            return False
+        return True
+    
+    async def _complete(self, job: MarketJob):
+        """Record and log a finished market analysis"""
         self.markets_analyzed += 1
         
-        logger.success(f"\n✓ {market} analysis complete in {processing_time}ms")
+        # Only remember the fingerprint once the analysis reached every
+        # output, so a failed publish is retried instead of skipped as unchanged
+        if job.fingerprint and not job.publish_failures:
+            self.fingerprints[job.market] = job.fingerprint
+            await self.database.save_fingerprint(job.market, job.fingerprint)
+        elif job.fingerprint:
+            logger.warning(
+                f"{job.market}: publishing to {', '.join(job.publish_failures)} failed, "
+                f"fingerprint not recorded"
+            )
+        
+        metrics, score = job.metrics, job.score
+        logger.success(f"\n✓ {job.market} analysis complete in {job.analysis.processing_time_ms}ms")
         logger.info(f"  Score: {score.overall_score}/100 ({score.interpretation.value})")
         logger.info(f"  Inventory: {metrics.total_inventory:,} listings")
         logger.info(f"  Months of Supply: {metrics.months_of_supply}")
         logger.info(f"  Absorption Rate: {metrics.absorption_rate:.1%}")
         logger.info(f"{'=' * 60}\n")
     
+    async def _run_pipeline(self, markets: List[str], as_of: Optional[datetime] = None):
+        """
+        Analyze markets through the staged pipeline
+        
+        Collection, analysis, scoring, AI insights and publishing run as
+        separate stages with their own workers, so network, CPU and AI work
+        for different markets overlap. Bounded queues between stages let a
+        slow stage throttle collection. A market's time budget only runs
+        while a stage works on it, not while it waits in a queue.
+        
+        Args:
+            markets: Markets to analyze
+            as_of: Optional backfill date to stamp the analyses with
+        """
+        def within_budget(step):
+            async def run(job: MarketJob) -> MarketJob:
+                if job.deadline is not None:
+                    job.deadline.resume()
+                try:
+                    return await step(job)
+                finally:
+                    if job.deadline is not None:
+                        job.deadline.pause()
+            return run
+        
+        stages = [
+            PipelineStage("collect", within_budget(self._step_collect), settings.pipeline_collect_workers),
+            PipelineStage("analyze", within_budget(self._step_analyze), settings.pipeline_analyze_workers),
+            PipelineStage("score", within_budget(self._step_score), settings.pipeline_score_workers),
+            PipelineStage("insights", within_budget(self._step_insights), settings.pipeline_insights_workers),
+            PipelineStage("publish", within_budget(self._step_publish), settings.pipeline_publish_workers)
+        ]
+        
+        def on_complete(job: MarketJob):
+            self.successful_analyses += 1
+        
+        def on_error(job: MarketJob, stage: PipelineStage, error: Exception):
+            logger.error(f"Failed to analyze {job.market} in {stage.name} stage: {error}")
+            self.failed_analyses += 1
+        
+        pipeline = Pipeline(
+            stages,
+            queue_size=settings.pipeline_queue_size,
+            on_complete=on_complete,
+            on_error=on_error,
+            is_finished=lambda job: job.unchanged
+        )
+        
+        logger.info(f"Analyzing {len(markets)} markets through pipeline")
+        await pipeline.run(MarketJob(market=market, as_of=as_of) for market in markets)
+        
+        self.pipeline_stats = pipeline.get_stats()
+        for stats in self.pipeline_stats:
+            logger.info(f"  Stage {stats['name']}: {stats}")
+    
+    async def _collect_market(
+        self,
+        market: str,
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[List[MarketData], List[str], List[str]]:
+        """
+        Collect from all registered collectors concurrently
+        
+        Each source gets its own deadline, capped by the market's remaining
+        time budget; sources that fail or miss it are left out and the
+        analysis continues with the rest. If any source failed and web
+        scraping is enabled, the scraper is tried as an extra source.
+        
+        Returns:
+            Tuple of (MarketData list, names of the sources that returned
+            data, names of the sources that timed out)
+            
+        Raises:
+            DeadlineExceeded: If no source returned data and at least one
+                timed out
+        """
+        timeout = settings.collector_timeout_seconds
+        if deadline is not None:
+            timeout = deadline.cap(timeout)
+        
+        results = await asyncio.gather(*(
+            collector.collect_safe(market, timeout=timeout)
+            for collector in self.collectors
+        ))
+        
+        failed = [result.source for result in results if not result.success]
+        if failed and self.scraper is not None:
+            logger.warning(f"Falling back to scraping for {market} ({', '.join(failed)} failed)")
+            scrape_timeout = settings.scraping_timeout_seconds
+            if deadline is not None:
+                scrape_timeout = deadline.cap(scrape_timeout)
+            results.append(await self.scraper.collect_safe(market, timeout=scrape_timeout))
+        
+        market_data: List[MarketData] = []
+        data_sources = []
+        
+        for result in results:
+            if result.success and result.market_data:
+                market_data.append(result.market_data)
+                data_sources.append(result.source)
+            else:
+                logger.warning(f"Skipping {result.source} for {market}: {result.error}")
+        
+        # Sources answered with last good data aren't missing, just stale
+        timed_out = [
+            result.source for result in results
+            if result.timed_out and not result.success
+        ]
+        
+        if not market_data:
+            if timed_out:
+                raise DeadlineExceeded(f"No source returned data in time ({', '.join(timed_out)})")
+            raise Exception("No data collected from any source")
+        
+        logger.success(f"Collected data from {len(data_sources)} sources: {', '.join(data_sources)}")
+        
+        return market_data, data_sources, timed_out
+    
     async def _publish_metrics(self):
         """Publish agent performance metrics"""
         uptime = int(time.time() - self.start_time)
@@ -256,8 +844,8 @@ class SupplyAgent:
             successful_analyses=self.successful_analyses,
             failed_analyses=self.failed_analyses,
             average_processing_time_ms=0.0,  # Would calculate from tracking
-            api_calls_made=(self.zillow.call_count + self.redfin.call_count),
-            scraping_attempts=0,
+            api_calls_made=sum(collector.call_count for collector in self.collectors),
+            scraping_attempts=self.scraper.page_count if self.scraper else 0,
             data_quality_score=0.95,  # Would calculate from actual data quality
             claude_calls=self.ai_generator.call_count,
             claude_tokens_used=self.ai_generator.total_tokens,
@@ -273,9 +861,17 @@ class SupplyAgent:
         """Graceful shutdown"""
         logger.info("Shutting down Supply Agent...")
         
-        # Close collectors
-        await self.zillow.close()
-        await self.redfin.close()
+        # Close collectors and their shared connection pool
+        for collector in self.collectors:
+            await collector.close()
+        if self.scraper:
+            await self.scraper.close()
+        if self.last_good:
+            await self.last_good.close()
+        await self.http.close()
+        
+        # Stop analysis worker processes
+        self.analyzer.close()
         
         # Flush and close publishers
         self.kafka.flush()
@@ -289,16 +885,39 @@ class SupplyAgent:
         logger.info(f"  Markets analyzed: {self.markets_analyzed}")
         logger.info(f"  Successful: {self.successful_analyses}")
         logger.info(f"  Failed: {self.failed_analyses}")
+        logger.info(f"  Unchanged (skipped): {self.unchanged_skips}")
         logger.info(f"  Uptime: {int(time.time() - self.start_time)} seconds")
         
         logger.info("\nCollector Stats:")
-        logger.info(f"  Zillow: {self.zillow.get_stats()}")
-        logger.info(f"  Redfin: {self.redfin.get_stats()}")
+        for collector in self.collectors:
+            logger.info(f"  {collector.name}: {collector.get_stats()}")
+        if self.scraper:
+            logger.info(f"  {self.scraper.name}: {self.scraper.get_stats()}")
+        logger.info(f"  HTTP pool: {self.http.get_stats()}")
+        logger.info(f"  Request coalescing: {shared_single_flight().get_stats()}")
+        if self.response_cache:
+            logger.info(f"  Response cache: {self.response_cache.get_stats()}")
+        if self.last_good:
+            logger.info(f"  Stale fallback: {self.last_good.get_stats()}")
+        if self.archive:
+            logger.info(f"  Response archive: {self.archive.get_stats()}")
         
         logger.info("\nPublisher Stats:")
         logger.info(f"  Kafka: {self.kafka.get_stats()}")
         logger.info(f"  Database: {self.database.get_stats()}")
         
+        if self.pipeline_stats:
+            logger.info("\nPipeline Stats (last cycle):")
+            for stats in self.pipeline_stats:
+                logger.info(f"  {stats['name']}: {stats}")
+        
+        if self.scheduler:
+            logger.info(f"\nScheduler Stats: {self.scheduler.get_stats()}")
+        
+        if self.work_queue:
+            logger.info(f"\nWork Queue Stats: {self.work_queue.get_stats()}")
+            logger.info(f"  Lease handoffs: {self.lease_handoffs}")
+        
         logger.info("\nAI Stats:")
         logger.info(f"  {self.ai_generator.get_stats()}")
         
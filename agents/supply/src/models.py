@@ -1,10 +1,13 @@
 """
 Data models for Supply Agent
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Dict, List, Any
 from datetime import datetime
 from enum import Enum
+import time
+
+from .listings import ListingTable
 
 
 class MarketInterpretation(str, Enum):
@@ -90,10 +93,10 @@ class MarketData(BaseModel):
     market: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     
-    # Listing data
-    active_listings: List[Dict[str, Any]] = Field(default_factory=list)
-    pending_listings: List[Dict[str, Any]] = Field(default_factory=list)
-    sold_listings: List[Dict[str, Any]] = Field(default_factory=list)
+    # Listing data (lists of listing dicts are converted on validation)
+    active_listings: ListingTable = Field(default_factory=ListingTable)
+    pending_listings: ListingTable = Field(default_factory=ListingTable)
+    sold_listings: ListingTable = Field(default_factory=ListingTable)
     
     # Aggregated stats
     total_active: int = 0
@@ -107,6 +110,7 @@ class MarketData(BaseModel):
     # Quality metrics
     completeness: float = Field(default=1.0, ge=0, le=1, description="Data completeness (0-1)")
     is_stale: bool = Field(default=False, description="Data older than threshold")
+    is_truncated: bool = Field(default=False, description="Listing pages skipped (time budget or page limit)")
 
 
 class AgentMetrics(BaseModel):
@@ -146,5 +150,35 @@ class CollectorResult(BaseModel):
     success: bool
     market_data: Optional[MarketData] = None
     error: Optional[str] = None
+    timed_out: bool = False
     response_time_ms: int = 0
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class MarketJob(BaseModel):
+    """In-flight state of a market moving through the analysis steps"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    
+    market: str
+    started_at: float = Field(default_factory=time.time)
+    deadline: Optional[Any] = Field(None, description="Deadline for the whole analysis")
+    partial_reasons: List[str] = Field(default_factory=list, description="Why results are partial")
+    as_of: Optional[datetime] = Field(None, description="Backfill date the analysis is stamped with")
+    
+    # Collection
+    market_data: List[MarketData] = Field(default_factory=list)
+    data_sources: List[str] = Field(default_factory=list)
+    staleness: float = Field(0.0, ge=0, le=1, description="Share and age of stale source data (0 = all fresh)")
+    historical: List[Dict[str, Any]] = Field(default_factory=list)
+    
+    # Input fingerprint; unchanged jobs skip analysis and publishing
+    fingerprint: Optional[str] = None
+    unchanged: bool = False
+    
+    # Analysis results
+    metrics: Optional[InventoryMetrics] = None
+    trends: Optional[InventoryTrends] = None
+    score: Optional[SupplyScore] = None
+    ai_insights: Optional[AIInsights] = None
+    analysis: Optional[SupplyAnalysis] = None
+    publish_failures: List[str] = Field(default_factory=list, description="Outputs the analysis failed to reach")
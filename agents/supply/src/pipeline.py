@@ -0,0 +1,191 @@
+"""
+Staged pipeline engine for Supply Agent
+Runs market analysis steps as separate stages connected by bounded queues
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+from loguru import logger
+
+
+StageHandler = Callable[[Any], Awaitable[Any]]
+
+# Marks the end of input for a stage worker
+_STOP = object()
+
+
+class PipelineStage:
+    """
+    A single pipeline stage with its own worker pool
+    
+    Workers pull items from the stage's bounded input queue, run the handler
+    and push the result to the next stage. When the next queue is full the
+    worker blocks, which throttles every stage upstream of a slow one.
+    """
+    
+    def __init__(self, name: str, handler: StageHandler, workers: int = 1):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue: Optional[asyncio.Queue] = None
+        
+        # Metrics
+        self.processed = 0
+        self.error_count = 0
+        self.busy_time = 0.0
+        self.max_queue_depth = 0
+        self.first_started: Optional[float] = None
+        self.last_finished: Optional[float] = None
+    
+    @property
+    def queue_depth(self) -> int:
+        """Items currently waiting for this stage"""
+        return self.queue.qsize() if self.queue is not None else 0
+    
+    @property
+    def average_latency_ms(self) -> float:
+        """Average handler time per item"""
+        handled = self.processed + self.error_count
+        if handled == 0:
+            return 0.0
+        return self.busy_time / handled * 1000
+    
+    @property
+    def throughput_per_second(self) -> float:
+        """Items completed per second of stage wall time"""
+        if self.first_started is None or self.last_finished is None:
+            return 0.0
+        elapsed = self.last_finished - self.first_started
+        if elapsed <= 0:
+            return 0.0
+        return self.processed / elapsed
+    
+    @property
+    def utilization(self) -> float:
+        """Fraction of worker capacity spent inside the handler"""
+        if self.first_started is None or self.last_finished is None:
+            return 0.0
+        capacity = (self.last_finished - self.first_started) * self.workers
+        if capacity <= 0:
+            return 0.0
+        return min(1.0, self.busy_time / capacity)
+    
+    def get_stats(self) -> dict:
+        """Get stage statistics"""
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "errors": self.error_count,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_latency_ms": round(self.average_latency_ms, 1),
+            "throughput_per_second": round(self.throughput_per_second, 2),
+            "utilization": round(self.utilization, 2)
+        }
+
+
+class Pipeline:
+    """
+    Run items through a sequence of stages concurrently
+    
+    Every stage owns a bounded input queue, so at most
+    ``queue_size`` items wait in front of any stage. An item that raises in
+    a stage is handed to ``on_error`` and dropped; items that clear the last
+    stage, or for which ``is_finished`` returns True after any stage, are
+    handed to ``on_complete``.
+    """
+    
+    def __init__(
+        self,
+        stages: List[PipelineStage],
+        queue_size: int = 8,
+        on_complete: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[Any, PipelineStage, Exception], None]] = None,
+        is_finished: Optional[Callable[[Any], bool]] = None
+    ):
+        if not stages:
+            raise ValueError("Pipeline requires at least one stage")
+        
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.is_finished = is_finished
+    
+    async def run(self, items: Iterable[Any]):
+        """
+        Feed items through all stages and wait until the pipeline drains
+        
+        Args:
+            items: Input items for the first stage
+        """
+        for stage in self.stages:
+            stage.queue = asyncio.Queue(maxsize=self.queue_size)
+        
+        stage_tasks = []
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            workers = [
+                asyncio.create_task(self._worker(stage, next_stage))
+                for _ in range(stage.workers)
+            ]
+            stage_tasks.append(workers)
+        
+        try:
+            for item in items:
+                await self.stages[0].queue.put(item)
+                self._track_depth(self.stages[0])
+            
+            # Drain stage by stage: once every worker of a stage has exited,
+            # nothing else can reach the next stage, so it can be stopped too
+            for index, stage in enumerate(self.stages):
+                for _ in range(stage.workers):
+                    await stage.queue.put(_STOP)
+                await asyncio.gather(*stage_tasks[index])
+        finally:
+            for workers in stage_tasks:
+                for task in workers:
+                    if not task.done():
+                        task.cancel()
+    
+    async def _worker(self, stage: PipelineStage, next_stage: Optional[PipelineStage]):
+        """Process items for a stage until told to stop"""
+        while True:
+            item = await stage.queue.get()
+            if item is _STOP:
+                return
+            
+            started = time.time()
+            if stage.first_started is None:
+                stage.first_started = started
+            
+            try:
+                result = await stage.handler(item)
+            except Exception as e:
+                stage.error_count += 1
+                stage.busy_time += time.time() - started
+                stage.last_finished = time.time()
+                if self.on_error:
+                    self.on_error(item, stage, e)
+                else:
+                    logger.error(f"Pipeline stage {stage.name} failed: {e}")
+                continue
+            
+            stage.processed += 1
+            stage.busy_time += time.time() - started
+            stage.last_finished = time.time()
+            
+            if next_stage is not None and not (self.is_finished and self.is_finished(result)):
+                await next_stage.queue.put(result)
+                self._track_depth(next_stage)
+            elif self.on_complete:
+                self.on_complete(result)
+    
+    def _track_depth(self, stage: PipelineStage):
+        """Record the deepest a stage's queue has been"""
+        stage.max_queue_depth = max(stage.max_queue_depth, stage.queue_depth)
+    
+    def get_stats(self) -> List[dict]:
+        """Get statistics for every stage"""
+        return [stage.get_stats() for stage in self.stages]
@@ -11,6 +11,25 @@ from ..models import SupplyAnalysis
 from config.settings import settings
 
 
+# Columns of a supply_metrics row, in the order of _analysis_row
+INSERT_SQL = """
+INSERT INTO supply_metrics (
+    timestamp, market,
+    total_inventory, months_of_supply, absorption_rate, median_dom,
+    new_listings_30d, pending_sales, closed_sales_30d, price_reductions,
+    inventory_change_30d, inventory_change_90d, absorption_change,
+    dom_change_30d, new_listings_trend,
+    supply_score, score_inventory_component, score_absorption_component,
+    score_dom_component, score_trend_component, interpretation, confidence,
+    ai_summary, ai_key_findings, ai_recommendations, ai_risks, ai_opportunities,
+    data_sources, data_quality, processing_time_ms, raw_data
+) VALUES (
+    $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15,
+    $16, $17, $18, $19, $20, $21, $22, $23, $24, $25, $26, $27, $28, $29, $30, $31
+)
+"""
+
+
 class DatabaseWriter:
     """Write supply analysis results to PostgreSQL"""
     
@@ -103,18 +122,26 @@ class DatabaseWriter:
         
         CREATE INDEX IF NOT EXISTS idx_supply_created 
             ON supply_metrics(created_at DESC);
+        
+        -- Fingerprint of the listings behind each market's last analysis
+        CREATE TABLE IF NOT EXISTS supply_market_fingerprints (
+            market VARCHAR(255) PRIMARY KEY,
+            fingerprint VARCHAR(64) NOT NULL,
+            updated_at TIMESTAMP DEFAULT NOW()
+        );
         """
         
         async with self.pool.acquire() as conn:
             await conn.execute(create_sql)
             logger.success("Supply metrics table ready")
     
-    async def write_analysis(self, analysis: SupplyAnalysis) -> bool:
+    async def write_analysis(self, analysis: SupplyAnalysis, timeout: Optional[float] = None) -> bool:
         """
         Write supply analysis to database
         
         Args:
             analysis: SupplyAnalysis object
+            timeout: Optional statement timeout in seconds
             
         Returns:
             True if written successfully
@@ -124,66 +151,8 @@ class DatabaseWriter:
             return False
         
         try:
-            insert_sql = """
-            INSERT INTO supply_metrics (
-                timestamp, market,
-                total_inventory, months_of_supply, absorption_rate, median_dom,
-                new_listings_30d, pending_sales, closed_sales_30d, price_reductions,
-                inventory_change_30d, inventory_change_90d, absorption_change,
-                dom_change_30d, new_listings_trend,
-                supply_score, score_inventory_component, score_absorption_component,
-                score_dom_component, score_trend_component, interpretation, confidence,
-                ai_summary, ai_key_findings, ai_recommendations, ai_risks, ai_opportunities,
-                data_sources, data_quality, processing_time_ms, raw_data
-            ) VALUES (
-                $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15,
-                $16, $17, $18, $19, $20, $21, $22, $23, $24, $25, $26, $27, $28, $29, $30, $31
-            )
-            """
-            
-            # Prepare data
-            ai = analysis.ai_insights
-            
-            async with self.pool.acquire() as conn:
-                await conn.execute(
-                    insert_sql,
-                    analysis.timestamp,
-                    analysis.market,
-                    # Metrics
-                    analysis.metrics.total_inventory,
-                    analysis.metrics.months_of_supply,
-                    analysis.metrics.absorption_rate,
-                    analysis.metrics.median_dom,
-                    analysis.metrics.new_listings_30d,
-                    analysis.metrics.pending_sales,
-                    analysis.metrics.closed_sales_30d,
-                    analysis.metrics.price_reductions,
-                    # Trends
-                    analysis.trends.inventory_change_30d,
-                    analysis.trends.inventory_change_90d,
-                    analysis.trends.absorption_change,
-                    analysis.trends.dom_change_30d,
-                    analysis.trends.new_listings_trend,
-                    # Score
-                    analysis.score.overall_score,
-                    analysis.score.inventory_component,
-                    analysis.score.absorption_component,
-                    analysis.score.dom_component,
-                    analysis.score.trend_component,
-                    analysis.score.interpretation.value,
-                    analysis.score.confidence,
-                    # AI
-                    ai.summary if ai else None,
-                    ai.key_findings if ai else None,
-                    ai.recommendations if ai else None,
-                    ai.risks if ai else None,
-                    ai.opportunities if ai else None,
-                    # Metadata
-                    analysis.data_sources,
-                    analysis.data_quality,
-                    analysis.processing_time_ms,
-                    analysis.model_dump(mode='json')
-                )
+            async with self.pool.acquire(timeout=timeout) as conn:
+                await conn.execute(INSERT_SQL, *self._analysis_row(analysis), timeout=timeout)
             
             self.write_count += 1
             
@@ -196,10 +165,96 @@ class DatabaseWriter:
             logger.error(f"Database write failed: {e}")
             return False
     
+    def _analysis_row(self, analysis: SupplyAnalysis) -> tuple:
+        """Build the INSERT_SQL parameters for an analysis"""
+        ai = analysis.ai_insights
+        
+        return (
+            analysis.timestamp,
+            analysis.market,
+            # Metrics
+            analysis.metrics.total_inventory,
+            analysis.metrics.months_of_supply,
+            analysis.metrics.absorption_rate,
+            analysis.metrics.median_dom,
+            analysis.metrics.new_listings_30d,
+            analysis.metrics.pending_sales,
+            analysis.metrics.closed_sales_30d,
+            analysis.metrics.price_reductions,
+            # Trends
+            analysis.trends.inventory_change_30d,
+            analysis.trends.inventory_change_90d,
+            analysis.trends.absorption_change,
+            analysis.trends.dom_change_30d,
+            analysis.trends.new_listings_trend,
+            # Score
+            analysis.score.overall_score,
+            analysis.score.inventory_component,
+            analysis.score.absorption_component,
+            analysis.score.dom_component,
+            analysis.score.trend_component,
+            analysis.score.interpretation.value,
+            analysis.score.confidence,
+            # AI
+            ai.summary if ai else None,
+            ai.key_findings if ai else None,
+            ai.recommendations if ai else None,
+            ai.risks if ai else None,
+            ai.opportunities if ai else None,
+            # Metadata
+            analysis.data_sources,
+            analysis.data_quality,
+            analysis.processing_time_ms,
+            analysis.model_dump(mode='json')
+        )
+    
+    async def write_analyses(
+        self,
+        analyses: List[SupplyAnalysis],
+        timeout: Optional[float] = None
+    ) -> int:
+        """
+        Write many analyses in one transaction
+        
+        Args:
+            analyses: SupplyAnalysis objects to insert
+            timeout: Optional statement timeout in seconds
+            
+        Returns:
+            Number of rows written (0 if the batch failed)
+        """
+        if not analyses:
+            return 0
+        
+        if not self.enabled or self.pool is None:
+            logger.warning(f"Database disabled, skipping write of {len(analyses)} analyses")
+            return 0
+        
+        try:
+            async with self.pool.acquire(timeout=timeout) as conn:
+                async with conn.transaction():
+                    await conn.executemany(
+                        INSERT_SQL,
+                        [self._analysis_row(analysis) for analysis in analyses],
+                        timeout=timeout
+                    )
+            
+            self.write_count += len(analyses)
+            
+            logger.success(f"Wrote {len(analyses)} analyses to database")
+            
+            return len(analyses)
+            
+        except Exception as e:
+            self.error_count += len(analyses)
+            logger.error(f"Bulk database write failed: {e}")
+            return 0
+    
     async def get_historical_metrics(
         self,
         market: str,
-        days_back: int = 90
+        days_back: int = 90,
+        as_of: Optional[datetime] = None
     ) -> List[Dict[str, Any]]:
         """
         Retrieve historical metrics for a market
@@ -207,6 +262,8 @@ class DatabaseWriter:
         Args:
             market: Market identifier
             days_back: Number of days of history to retrieve
+            as_of: End of the history window (defaults to now); only rows
+                strictly before it are returned
             
         Returns:
             List of historical metric dictionaries
@@ -215,7 +272,8 @@ class DatabaseWriter:
             return []
         
         try:
-            cutoff = datetime.utcnow() - timedelta(days=days_back)
+            end = as_of or datetime.utcnow()
+            cutoff = end - timedelta(days=days_back)
             
             query = """
             SELECT 
@@ -227,12 +285,12 @@ class DatabaseWriter:
                 new_listings_30d,
                 supply_score
             FROM supply_metrics
-            WHERE market = $1 AND timestamp >= $2
+            WHERE market = $1 AND timestamp >= $2 AND timestamp < $3
             ORDER BY timestamp DESC
             """
             
             async with self.pool.acquire() as conn:
-                rows = await conn.fetch(query, market, cutoff)
+                rows = await conn.fetch(query, market, cutoff, end)
                 
                 return [dict(row) for row in rows]
                 
@@ -240,6 +298,58 @@ class DatabaseWriter:
             logger.error(f"Failed to retrieve historical metrics: {e}")
             return []
     
+    async def get_fingerprint(self, market: str) -> Optional[str]:
+        """
+        Get the input fingerprint of a market's last published analysis
+        
+        Args:
+            market: Market identifier
+            
+        Returns:
+            Fingerprint, or None if unknown or the database is disabled
+        """
+        if not self.enabled or self.pool is None:
+            return None
+        
+        try:
+            async with self.pool.acquire() as conn:
+                return await conn.fetchval(
+                    "SELECT fingerprint FROM supply_market_fingerprints WHERE market = $1",
+                    market
+                )
+        except Exception as e:
+            logger.error(f"Failed to retrieve fingerprint: {e}")
+            return None
+    
+    async def save_fingerprint(self, market: str, fingerprint: str) -> bool:
+        """
+        Persist the input fingerprint of a market's latest analysis
+        
+        Args:
+            market: Market identifier
+            fingerprint: Fingerprint of the analyzed listings
+            
+        Returns:
+            True if saved successfully
+        """
+        if not self.enabled or self.pool is None:
+            return False
+        
+        upsert_sql = """
+        INSERT INTO supply_market_fingerprints (market, fingerprint, updated_at)
+        VALUES ($1, $2, NOW())
+        ON CONFLICT (market) DO UPDATE
+        SET fingerprint = EXCLUDED.fingerprint, updated_at = NOW()
+        """
+        
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute(upsert_sql, market, fingerprint)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save fingerprint: {e}")
+            return False
+    
     async def close(self):
         """Close database connection pool"""
         if self.pool:
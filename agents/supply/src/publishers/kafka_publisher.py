@@ -2,8 +2,9 @@
 Kafka Publisher
 Publishes supply insights to Kafka topics
 """
+import asyncio
 import json
-from typing import Optional
+from typing import Any, Optional
 from datetime import datetime
 from loguru import logger
 from kafka import KafkaProducer
@@ -23,6 +24,8 @@ class KafkaPublisher:
         self.bootstrap_servers = settings.kafka_bootstrap_servers.split(',')
         self.insights_topic = settings.kafka_topic_supply_insights
         self.metrics_topic = settings.kafka_topic_agent_metrics
+        self.heartbeat_topic = settings.kafka_topic_supply_heartbeats
+        self.send_timeout = 10
         self.publish_count = 0
         self.error_count = 0
     
@@ -47,12 +50,37 @@ class KafkaPublisher:
             logger.error(f"Failed to connect to Kafka: {e}")
             self.enabled = False
     
-    async def publish_analysis(self, analysis: SupplyAnalysis) -> bool:
+    async def _send(
+        self,
+        topic: str,
+        value: dict,
+        key: Optional[bytes] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Send a message and wait for the broker acknowledgement
+        
+        kafka-python's send and future.get block, so they run in a worker
+        thread and the wait is bounded by the timeout.
+        
+        Returns:
+            RecordMetadata for the written message
+        """
+        timeout = self.send_timeout if timeout is None else min(timeout, self.send_timeout)
+        
+        def send_and_wait():
+            future = self.producer.send(topic, value=value, key=key)
+            return future.get(timeout=timeout)
+        
+        return await asyncio.wait_for(asyncio.to_thread(send_and_wait), timeout)
+    
+    async def publish_analysis(self, analysis: SupplyAnalysis, timeout: Optional[float] = None) -> bool:
         """
         Publish supply analysis to Kafka
         
         Args:
             analysis: SupplyAnalysis object
+            timeout: Optional limit in seconds on waiting for the broker
             
         Returns:
             True if published successfully
@@ -72,16 +100,14 @@ class KafkaPublisher:
             message['published_at'] = datetime.utcnow().isoformat()
             message['publisher'] = 'supply-agent'
             
-            # Publish
-            future = self.producer.send(
+            # Publish and wait for result
+            record_metadata = await self._send(
                 self.insights_topic,
-                value=message,
-                key=analysis.market.encode('utf-8')
+                message,
+                key=analysis.market.encode('utf-8'),
+                timeout=timeout
             )
             
-            # Wait for result
-            record_metadata = future.get(timeout=10)
-            
             self.publish_count += 1
             
             logger.success(
@@ -96,11 +122,56 @@ class KafkaPublisher:
             self.error_count += 1
             logger.error(f"Kafka publish failed: {e}")
             return False
+        except asyncio.TimeoutError:
+            self.error_count += 1
+            logger.error(f"Kafka publish for {analysis.market} timed out")
+            return False
         except Exception as e:
             self.error_count += 1
             logger.error(f"Unexpected error publishing to Kafka: {e}")
             return False
     
+    async def publish_heartbeat(self, market: str, fingerprint: Optional[str]) -> bool:
+        """
+        Publish a lightweight "unchanged" heartbeat for a market
+        
+        Sent instead of a full analysis when a market's listings are identical
+        to the last published run, so consumers know the market is still
+        being watched. Heartbeats go to their own topic so consumers of the
+        insights topic only ever see full SupplyAnalysis messages.
+        
+        Args:
+            market: Market identifier
+            fingerprint: Fingerprint of the unchanged listings
+            
+        Returns:
+            True if published successfully
+        """
+        if not self.enabled or self.producer is None:
+            return False
+        
+        try:
+            message = {
+                'agent': 'supply',
+                'market': market,
+                'status': 'unchanged',
+                'fingerprint': fingerprint,
+                'timestamp': datetime.utcnow().isoformat(),
+                'publisher': 'supply-agent'
+            }
+            
+            await self._send(self.heartbeat_topic, message, key=market.encode('utf-8'))
+            
+            self.publish_count += 1
+            logger.debug(f"Published unchanged heartbeat for {market}")
+            
+            return True
+            
+        except Exception as e:
+            self.error_count += 1
+            logger.error(f"Failed to publish heartbeat: {e}")
+            return False
+    
     async def publish_metrics(self, metrics: AgentMetrics) -> bool:
         """
         Publish agent metrics to Kafka
@@ -118,12 +189,7 @@ class KafkaPublisher:
             message = metrics.model_dump(mode='json')
             message['published_at'] = datetime.utcnow().isoformat()
             
-            future = self.producer.send(
-                self.metrics_topic,
-                value=message
-            )
-            
-            future.get(timeout=10)
+            await self._send(self.metrics_topic, message)
             
             logger.debug(f"Published agent metrics to Kafka")
             
@@ -0,0 +1,216 @@
+"""
+Adaptive market scheduler for Supply Agent
+Refreshes fast-moving markets more often than stable ones
+"""
+import heapq
+import statistics
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from loguru import logger
+
+from config.settings import settings
+
+
+class MarketScheduler:
+    """
+    Priority queue of markets keyed by next-due time
+    
+    After each analysis a market's refresh interval is recomputed from its
+    "heat", the larger of:
+    - how far its supply score sits from balanced (50)
+    - how much its score moved since the previous run
+    - the volatility (coefficient of variation) of its recent inventory
+    
+    A heat of 0 schedules the market at the maximum interval and a heat of 1
+    at the minimum interval.
+    """
+    
+    def __init__(
+        self,
+        markets: List[str],
+        min_interval_seconds: Optional[float] = None,
+        max_interval_seconds: Optional[float] = None,
+        initial_interval_seconds: Optional[float] = None,
+        now: Optional[float] = None
+    ):
+        self.min_interval = (
+            min_interval_seconds
+            if min_interval_seconds is not None
+            else settings.schedule_min_interval_minutes * 60
+        )
+        self.max_interval = (
+            max_interval_seconds
+            if max_interval_seconds is not None
+            else settings.schedule_max_interval_minutes * 60
+        )
+        if self.min_interval > self.max_interval:
+            raise ValueError("Minimum schedule interval exceeds maximum interval")
+        
+        base = (
+            initial_interval_seconds
+            if initial_interval_seconds is not None
+            else settings.agent_run_interval_minutes * 60
+        )
+        self.initial_interval = self._clamp(base)
+        
+        self._heap: List[Tuple[float, int, str]] = []
+        self._due_at: Dict[str, float] = {}
+        self._sequence = 0
+        self._scores: Dict[str, Deque[int]] = {}
+        self._inventory: Dict[str, Deque[int]] = {}
+        self.intervals: Dict[str, float] = {}
+        
+        now = time.time() if now is None else now
+        for market in markets:
+            self._push(market, now)
+    
+    def __len__(self) -> int:
+        return len(self._due_at)
+    
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """
+        Remove and return every market that is due
+        
+        Popped markets must be handed back with record_analysis,
+        record_unchanged or record_failure to be scheduled again.
+        """
+        now = time.time() if now is None else now
+        due = []
+        
+        while self._heap and self._heap[0][0] <= now:
+            due_at, _, market = heapq.heappop(self._heap)
+            if self._due_at.get(market) != due_at:
+                continue  # Superseded entry
+            del self._due_at[market]
+            due.append(market)
+        
+        return due
+    
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """Seconds until the next market is due (0 if one is overdue)"""
+        now = time.time() if now is None else now
+        if not self._due_at:
+            return self.max_interval
+        return max(0.0, min(self._due_at.values()) - now)
+    
+    def record_analysis(
+        self,
+        market: str,
+        score: int,
+        total_inventory: int,
+        now: Optional[float] = None
+    ) -> float:
+        """
+        Record a completed analysis and reschedule the market
+        
+        Returns:
+            Seconds until the market is due again
+        """
+        interval = self.observe(market, score, total_inventory)
+        self._schedule(market, interval, now)
+        return interval
+    
+    def observe(self, market: str, score: int, total_inventory: int) -> float:
+        """
+        Record an analysis result without queueing the market
+        
+        Used when something else (e.g. the distributed work queue) owns the
+        due times and only the adaptive interval is needed.
+        
+        Returns:
+            Adaptive refresh interval in seconds
+        """
+        window = settings.schedule_volatility_window
+        self._scores.setdefault(market, deque(maxlen=window)).append(score)
+        self._inventory.setdefault(market, deque(maxlen=window)).append(total_inventory)
+        
+        interval = self.compute_interval(market)
+        self.intervals[market] = interval
+        return interval
+    
+    def record_unchanged(self, market: str, now: Optional[float] = None) -> float:
+        """Reschedule a market whose data didn't change, backing off further"""
+        interval = self.observe_unchanged(market)
+        self._schedule(market, interval, now)
+        return interval
+    
+    def observe_unchanged(self, market: str) -> float:
+        """Back off a market's interval without queueing it"""
+        previous = self.intervals.get(market, self.initial_interval)
+        interval = self._clamp(previous * 1.5)
+        self.intervals[market] = interval
+        return interval
+    
+    def record_failure(self, market: str, now: Optional[float] = None) -> float:
+        """Reschedule a failed market for a retry after the minimum interval"""
+        self._schedule(market, self.min_interval, now, remember=False)
+        return self.min_interval
+    
+    def compute_interval(self, market: str) -> float:
+        """Refresh interval for a market based on its recent observations"""
+        scores = self._scores.get(market)
+        if not scores:
+            return self.initial_interval
+        
+        heat = self.market_heat(market)
+        return self._clamp(self.max_interval - heat * (self.max_interval - self.min_interval))
+    
+    def market_heat(self, market: str) -> float:
+        """How actively a market is moving (0 = stable, 1 = very active)"""
+        scores = list(self._scores.get(market, []))
+        inventory = list(self._inventory.get(market, []))
+        if not scores:
+            return 0.0
+        
+        score_heat = abs(scores[-1] - 50) / 50
+        
+        movement_heat = 0.0
+        if len(scores) >= 2:
+            movement_heat = min(1.0, abs(scores[-1] - scores[-2]) / 10)
+        
+        volatility_heat = 0.0
+        if len(inventory) >= 2:
+            mean = statistics.mean(inventory)
+            if mean > 0:
+                cv = statistics.pstdev(inventory) / mean
+                volatility_heat = min(1.0, cv / settings.schedule_volatility_scale)
+        
+        return max(score_heat, movement_heat, volatility_heat)
+    
+    def get_stats(self) -> dict:
+        """Get scheduler statistics"""
+        intervals = list(self.intervals.values())
+        return {
+            "markets": len(self),
+            "next_due_seconds": round(self.seconds_until_next(), 1),
+            "min_interval_minutes": round(min(intervals) / 60, 1) if intervals else None,
+            "max_interval_minutes": round(max(intervals) / 60, 1) if intervals else None,
+            "avg_interval_minutes": (
+                round(statistics.mean(intervals) / 60, 1) if intervals else None
+            )
+        }
+    
+    def _schedule(
+        self,
+        market: str,
+        interval: float,
+        now: Optional[float],
+        remember: bool = True
+    ):
+        """Push a market back onto the queue"""
+        now = time.time() if now is None else now
+        if remember:
+            self.intervals[market] = interval
+        self._push(market, now + interval)
+        logger.debug(f"Scheduled {market} in {interval / 60:.1f} minutes")
+    
+    def _push(self, market: str, due_at: float):
+        """Insert or move a market's entry in the heap"""
+        self._sequence += 1
+        self._due_at[market] = due_at
+        heapq.heappush(self._heap, (due_at, self._sequence, market))
+    
+    def _clamp(self, interval: float) -> float:
+        """Keep an interval within the configured bounds"""
+        return max(self.min_interval, min(self.max_interval, interval))
@@ -0,0 +1,88 @@
+"""
+Dependency-graph execution for Supply Agent
+Runs async steps as soon as the steps they depend on have finished
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+
+
+class TaskGraph:
+    """
+    Small DAG of async steps
+    
+    Steps are added with the names of the steps they must run after. Steps
+    can only depend on steps added before them, so the graph is acyclic by
+    construction. Independent steps run concurrently; if any step fails the
+    remaining ones are cancelled and the error is raised.
+    """
+    
+    def __init__(self, name: str = "graph"):
+        self.name = name
+        self._steps: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self._dependencies: Dict[str, List[str]] = {}
+        self.timings_ms: Dict[str, int] = {}
+    
+    def add(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        after: Iterable[str] = ()
+    ) -> "TaskGraph":
+        """
+        Add a step to the graph
+        
+        Args:
+            name: Unique step name
+            func: Zero-argument coroutine function to run
+            after: Names of steps that must complete first
+            
+        Returns:
+            The graph, for chaining
+        """
+        if name in self._steps:
+            raise ValueError(f"Duplicate step in {self.name}: {name}")
+        
+        dependencies = list(after)
+        for dependency in dependencies:
+            if dependency not in self._steps:
+                raise ValueError(
+                    f"Step {name} depends on unknown step {dependency} in {self.name}"
+                )
+        
+        self._steps[name] = func
+        self._dependencies[name] = dependencies
+        return self
+    
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run every step, respecting dependencies
+        
+        Returns:
+            Dict of step name to the step's return value
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        
+        async def run_step(name: str) -> Any:
+            for dependency in self._dependencies[name]:
+                await tasks[dependency]
+            
+            started = time.time()
+            result = await self._steps[name]()
+            self.timings_ms[name] = int((time.time() - started) * 1000)
+            return result
+        
+        for name in self._steps:
+            tasks[name] = asyncio.create_task(run_step(name))
+        
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            # Let cancelled steps unwind before surfacing the error
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        
+        return {name: task.result() for name, task in tasks.items()}
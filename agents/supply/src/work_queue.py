@@ -0,0 +1,223 @@
+"""
+Distributed market work queue
+Lets several agent replicas share markets through a Postgres lease table
+"""
+import os
+import socket
+from typing import List, Optional
+from loguru import logger
+
+from .publishers.database_writer import DatabaseWriter
+from config.settings import settings
+
+
+class LeaseLostError(Exception):
+    """Raised when a worker no longer holds the lease for a market"""
+    pass
+
+
+class MarketWorkQueue:
+    """
+    Postgres-backed queue of market jobs
+    
+    Each market has one row in supply_market_jobs. Workers claim due rows with
+    SELECT ... FOR UPDATE SKIP LOCKED, so concurrent replicas never claim the
+    same market, and hold them under a lease that they renew with heartbeats.
+    A lease that isn't renewed expires and the market becomes claimable again.
+    All times come from the database clock so replicas don't need to agree.
+    
+    Leases are held by an owner id. It defaults to the replica's worker id;
+    concurrent workers within a replica pass their own ids (see owner_id),
+    so one of them can't mistake a lease held by a sibling for its own.
+    """
+    
+    def __init__(self, database: DatabaseWriter, worker_id: Optional[str] = None):
+        self.name = "MarketWorkQueue"
+        self.database = database
+        self.worker_id = worker_id or settings.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = settings.work_queue_lease_seconds
+        self.claimed_count = 0
+        self.completed_count = 0
+        self.failed_count = 0
+        self.lost_lease_count = 0
+    
+    def owner_id(self, worker: int) -> str:
+        """Lease owner id of one worker coroutine of this replica"""
+        return f"{self.worker_id}-{worker}"
+    
+    async def setup(self, markets: List[str]):
+        """Create the jobs table and register markets that aren't queued yet"""
+        if self.database.pool is None:
+            raise RuntimeError("Distributed mode requires a database connection")
+        
+        create_sql = """
+        CREATE TABLE IF NOT EXISTS supply_market_jobs (
+            market VARCHAR(255) PRIMARY KEY,
+            next_run_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            lease_owner VARCHAR(255),
+            lease_expires_at TIMESTAMP,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_completed_at TIMESTAMP,
+            last_error TEXT,
+            updated_at TIMESTAMP DEFAULT NOW()
+        );
+        
+        CREATE INDEX IF NOT EXISTS idx_supply_jobs_due
+            ON supply_market_jobs(next_run_at);
+        """
+        
+        insert_sql = """
+        INSERT INTO supply_market_jobs (market)
+        SELECT unnest($1::varchar[])
+        ON CONFLICT (market) DO NOTHING
+        """
+        
+        async with self.database.pool.acquire() as conn:
+            await conn.execute(create_sql)
+            await conn.execute(insert_sql, markets)
+        
+        logger.success(f"Work queue ready ({len(markets)} markets, worker {self.worker_id})")
+    
+    async def claim(self, limit: int = 1, owner: Optional[str] = None) -> List[str]:
+        """
+        Lease up to ``limit`` due markets for this worker
+        
+        Args:
+            limit: Maximum number of markets to lease
+            owner: Lease owner id (default: the replica's worker id)
+            
+        Returns:
+            Markets now leased by this worker
+        """
+        claim_sql = """
+        UPDATE supply_market_jobs AS jobs
+        SET lease_owner = $1,
+            lease_expires_at = NOW() + make_interval(secs => $2),
+            attempts = jobs.attempts + 1,
+            updated_at = NOW()
+        FROM (
+            SELECT market
+            FROM supply_market_jobs
+            WHERE next_run_at <= NOW()
+              AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
+            ORDER BY next_run_at
+            LIMIT $3
+            FOR UPDATE SKIP LOCKED
+        ) AS due
+        WHERE jobs.market = due.market
+        RETURNING jobs.market
+        """
+        
+        async with self.database.pool.acquire() as conn:
+            rows = await conn.fetch(claim_sql, owner or self.worker_id, float(self.lease_seconds), limit)
+        
+        markets = [row['market'] for row in rows]
+        self.claimed_count += len(markets)
+        return markets
+    
+    async def heartbeat(self, markets: List[str], owner: Optional[str] = None) -> List[str]:
+        """
+        Extend this worker's leases
+        
+        Args:
+            markets: Markets leased by the owner
+            owner: Lease owner id (default: the replica's worker id)
+            
+        Returns:
+            Markets whose lease was lost (expired and claimed elsewhere)
+        """
+        if not markets:
+            return []
+        
+        heartbeat_sql = """
+        UPDATE supply_market_jobs
+        SET lease_expires_at = NOW() + make_interval(secs => $2),
+            updated_at = NOW()
+        WHERE market = ANY($3::varchar[]) AND lease_owner = $1
+        RETURNING market
+        """
+        
+        async with self.database.pool.acquire() as conn:
+            rows = await conn.fetch(heartbeat_sql, owner or self.worker_id, float(self.lease_seconds), markets)
+        
+        renewed = {row['market'] for row in rows}
+        lost = [market for market in markets if market not in renewed]
+        if lost:
+            self.lost_lease_count += len(lost)
+            logger.warning(f"Lost leases for: {', '.join(lost)}")
+        return lost
+    
+    async def holds_lease(self, market: str, owner: Optional[str] = None) -> bool:
+        """Check that this worker still holds an unexpired lease on a market"""
+        check_sql = """
+        SELECT 1 FROM supply_market_jobs
+        WHERE market = $1 AND lease_owner = $2 AND lease_expires_at > NOW()
+        """
+        
+        async with self.database.pool.acquire() as conn:
+            return await conn.fetchval(check_sql, market, owner or self.worker_id) is not None
+    
+    async def complete(
+        self,
+        market: str,
+        next_run_in_seconds: float,
+        owner: Optional[str] = None
+    ) -> bool:
+        """Release a market after a successful run and set its next due time"""
+        complete_sql = """
+        UPDATE supply_market_jobs
+        SET lease_owner = NULL,
+            lease_expires_at = NULL,
+            next_run_at = NOW() + make_interval(secs => $3),
+            last_completed_at = NOW(),
+            attempts = 0,
+            last_error = NULL,
+            updated_at = NOW()
+        WHERE market = $1 AND lease_owner = $2
+        """
+        
+        async with self.database.pool.acquire() as conn:
+            result = await conn.execute(
+                complete_sql, market, owner or self.worker_id, float(next_run_in_seconds)
+            )
+        
+        released = result.endswith(" 1")
+        if released:
+            self.completed_count += 1
+        return released
+    
+    async def fail(
+        self,
+        market: str,
+        retry_in_seconds: float,
+        error: Optional[str] = None,
+        owner: Optional[str] = None
+    ) -> bool:
+        """Release a market after a failed run so it is retried later"""
+        fail_sql = """
+        UPDATE supply_market_jobs
+        SET lease_owner = NULL,
+            lease_expires_at = NULL,
+            next_run_at = NOW() + make_interval(secs => $3),
+            last_error = $4,
+            updated_at = NOW()
+        WHERE market = $1 AND lease_owner = $2
+        """
+        
+        async with self.database.pool.acquire() as conn:
+            result = await conn.execute(
+                fail_sql, market, owner or self.worker_id, float(retry_in_seconds), error
+            )
+        
+        self.failed_count += 1
+        return result.endswith(" 1")
+    
+    def get_stats(self) -> dict:
+        """Get work queue statistics"""
+        return {
+            "worker_id": self.worker_id,
+            "claimed": self.claimed_count,
+            "completed": self.completed_count,
+            "failed": self.failed_count,
+            "lost_leases": self.lost_lease_count
+        }